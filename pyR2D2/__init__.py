@@ -13,12 +13,11 @@ A :class:`pyR2D2.Data` instance can be created as follows:
 
 """
 
-from . import cpp_util, fortran_util, util, write
+import importlib
+
 from .color import color
 from .constant import constant
-from .cpp_util import EOS
 from .data import Data
-from .data_io import zarr_util
 from .data_io.parameters import Parameters
 from .data_io.read import (
     After,
@@ -36,6 +35,36 @@ from .data_io.read import (
 )
 from .sync.sync import Sync
 
+# Submodules with heavy dependencies (zarr, scipy, matplotlib, the C++ extension)
+# are imported on first access, e.g. pyR2D2.zarr_util
+_lazy_modules = {
+    "cpp_util": ".cpp_util",
+    "fortran_util": ".fortran_util",
+    "util": ".util",
+    "write": ".write",
+    "zarr_util": ".data_io.zarr_util",
+}
+_lazy_attrs = {
+    "EOS": "cpp_util",
+}
+
+
+def __getattr__(name):
+    if name in _lazy_modules:
+        value = importlib.import_module(_lazy_modules[name], __name__)
+    elif name in _lazy_attrs:
+        value = getattr(__getattr__(_lazy_attrs[name]), name)
+    else:
+        raise AttributeError(f"module '{__name__}' has no attribute '{name}'")
+
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_lazy_modules) | set(_lazy_attrs))
+
+
 __all__ = [
     "Data",
     "Parameters",
@@ -1,5 +1,7 @@
+import json
 import os
 import zipfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
 
 import numpy as np
@@ -51,57 +53,85 @@ class Data:
 
     """
 
-    def __init__(self, datadir, verbose=False, self_old=None):
+    def __init__(self, datadir, verbose=False, self_old=None, cache=True):
         """
         Initialize pyR2D2.Data
+
+        Parameters
+        ----------
+        datadir : str or Path
+            Path to the data directory of the run
+        verbose : bool
+            If True, summary of the run is shown. By default False.
+        cache : bool or str or Path
+            If True, parameters are loaded from and saved to a cache file in the user
+            cache directory. A directory is used instead of the user cache directory.
+            See :class:`pyR2D2.Parameters`. By default True.
         """
         self.datadir = Path(datadir)
-        self.p = pyR2D2.Parameters(self)
-        self.qx = pyR2D2.XSelect(self)
-        self.qz = pyR2D2.ZSelect(self)
-        self.qm = pyR2D2.MPIRegion(self)
-        self.qf = pyR2D2.FullData(self)
-        self.qr = pyR2D2.RestrictedData(self)
-        self.qt = pyR2D2.OpticalDepth(self)
-        self.vc = pyR2D2.OnTheFly(self)
-        self.qs = pyR2D2.Slice(self)
-        self.q2 = pyR2D2.TwoDimension(self)
-        self.ms = pyR2D2.ModelS(self)
+        self.p = pyR2D2.Parameters(self, cache=cache, verbose=verbose)
         self.time = None
         self.qc = None
-        self.qp = pyR2D2.Previous(self)
-        self.qa = pyR2D2.After(self)
-        self.sync = pyR2D2.Sync(self)
 
         if verbose:
             self.summary()
 
-        eosdir = self.datadir.parent / "input_data"
-        if (eosdir / "eos_table_sero.npz").exists():
-            self.eos = pyR2D2.cpp_util.EOS(
-                self.log_ro_e.astype(np.float32),
-                self.se_e.astype(np.float32),
-                self.log_pr_e.astype(np.float32),
-                self.log_en_e.astype(np.float32),
-                self.log_te_e.astype(np.float32),
-                self.log_op_e.astype(np.float32),
-            )
-
-        if self.p.geometry == "YinYang":
-            self.yinyang = pyR2D2.cpp_util.YinYang(
-                self.p.yg_yy,
-                self.p.zg_yy,
-                self.p.y,
-                self.p.z,
-            )
+    # Readers are constructed on first access, e.g. d.qf, and kept afterwards
+    _readers = {
+        "qx": "XSelect",
+        "qz": "ZSelect",
+        "qm": "MPIRegion",
+        "qf": "FullData",
+        "qr": "RestrictedData",
+        "qt": "OpticalDepth",
+        "vc": "OnTheFly",
+        "qs": "Slice",
+        "q2": "TwoDimension",
+        "ms": "ModelS",
+        "qp": "Previous",
+        "qa": "After",
+        "sync": "Sync",
+    }
+
+    def _eos(self):
+        return pyR2D2.cpp_util.EOS(
+            self.log_ro_e.astype(np.float32),
+            self.se_e.astype(np.float32),
+            self.log_pr_e.astype(np.float32),
+            self.log_en_e.astype(np.float32),
+            self.log_te_e.astype(np.float32),
+            self.log_op_e.astype(np.float32),
+        )
+
+    def _yinyang(self):
+        return pyR2D2.cpp_util.YinYang(
+            self.p.yg_yy,
+            self.p.zg_yy,
+            self.p.y,
+            self.p.z,
+        )
 
     def __getattr__(self, name):
         """
-        When an attribute is not found in pyR2D2.Data, it is searched in pyR2D2.Data.p
+        Readers, eos and yinyang are constructed on first access.
+        Other attributes not found in pyR2D2.Data are searched in pyR2D2.Data.p
         """
-        if hasattr(self.p, name):
-            attr = getattr(self.p, name)
-            return attr
+        # self.__dict__ is used to avoid recursion before self.p is set
+        p = self.__dict__.get("p", None)
+        if p is not None:
+            if name in self._readers:
+                self.__dict__[name] = getattr(pyR2D2, self._readers[name])(self)
+                return self.__dict__[name]
+            if name == "eos" and "log_ro_e" in p.__dict__:
+                self.__dict__[name] = self._eos()
+                return self.__dict__[name]
+            if name == "yinyang" and p.geometry == "YinYang":
+                self.__dict__[name] = self._yinyang()
+                return self.__dict__[name]
+
+            if hasattr(p, name):
+                attr = getattr(p, name)
+                return attr
 
         raise AttributeError(
             f"'{type(self).__name__}' object has no attribute '{name}'"
@@ -113,6 +143,7 @@ class Data:
 
         Existing entries in time.zip are skipped.
         Newly added files under time/ are appended.
+        The time indices are updated afterwards. See :meth:`pyR2D2.Data.index_time`
 
         Parameters
         ----------
@@ -125,6 +156,8 @@ class Data:
         if not src.exists():
             raise FileNotFoundError(f"{src} does not exist")
 
+        self._close_time_zip()
+
         # zipfile.ZIP_STORED is used to avoid compression, which can be slow for many small files.
         # allowZip64=True is used to support large zip files.
         with zipfile.ZipFile(
@@ -134,8 +167,8 @@ class Data:
             existing = set(zf.namelist())
 
             for p in src.rglob("*"):
-                # Skip directories and non-files
-                if not p.is_file():
+                # Skip directories, non-files and the time indices
+                if not p.is_file() or p.suffix == ".idx":
                     continue
 
                 # Create a relative path for the archive name
@@ -149,6 +182,272 @@ class Data:
                 if remove_original:
                     os.remove(p)
 
+        self.index_time()
+
+    def _time_zip(self):
+        """
+        Returns a ZipFile of datadir/time.zip kept open between calls
+
+        The archive is reopened only when its modification time or size changes,
+        so the central directory is parsed once for many reads.
+        """
+        zippath = self.datadir / "time.zip"
+        st = os.stat(zippath)
+        stamp = (st.st_mtime_ns, st.st_size)
+
+        cached = self.__dict__.get("_time_zip_cache")
+        if cached is not None:
+            if cached[0] == stamp:
+                return cached[1]
+            cached[1].close()
+
+        zf = zipfile.ZipFile(zippath, "r")
+        self._time_zip_cache = (stamp, zf)
+        return zf
+
+    def _close_time_zip(self):
+        """
+        Closes the ZipFile of datadir/time.zip kept by self._time_zip
+        """
+        cached = self.__dict__.pop("_time_zip_cache", None)
+        if cached is not None:
+            cached[1].close()
+
+    def time_series(self, n0, n1=None, tau=False, use_zip=False):
+        """
+        Reads times of the time steps from n0 to n1
+
+        Parameters
+        ----------
+        n0 : int
+            first time step
+        n1 : int
+            last time step (inclusive). By default, self.nd, or self.nd_tau if tau is True
+        tau : bool
+            if True time for optical depth (high cadence)
+        use_zip: bool
+            if True, read time from time.zip instead of the original files
+            if False, read from the original file if it exists; otherwise, fall back to time.zip.
+
+        Returns
+        -------
+        time : numpy.ndarray, float64
+            (n1 - n0 + 1) array of time
+        """
+        subdir = "tau" if tau else "mhd"
+        if n1 is None:
+            n1 = self.nd_tau if tau else self.nd
+
+        time = np.empty(max(n1 - n0 + 1, 0), dtype=np.float64)
+
+        # steps in the time index are not read from the individual files
+        n_indexed = n0
+        if not use_zip:
+            index = self._time_index(tau)
+            n_indexed = min(max(len(index), n0), n1 + 1)
+            time[: n_indexed - n0] = index[n0:n_indexed]
+
+        for n in range(n_indexed, n1 + 1):
+            time[n - n0] = self._read_time_file(subdir, n, use_zip=use_zip)
+
+        return time
+
+    def _read_time_file(self, subdir, n, use_zip=False):
+        """
+        Reads time at a time step from time/subdir/t.dac.n or time.zip
+
+        Parameters
+        ----------
+        subdir : str
+            'mhd' or 'tau'
+        n : int
+            time step
+        use_zip: bool
+            if True, read time from time.zip instead of the original files
+
+        Returns
+        -------
+        time : float
+            time at the time step
+        """
+        dtype = np.dtype(self.endian + "d")
+        filename = f"t.dac.{n:08d}"
+        data = None
+        if not use_zip:
+            try:
+                with open(self.datadir / "time" / subdir / filename, "rb") as f:
+                    data = f.read(dtype.itemsize)
+            except FileNotFoundError:
+                pass
+
+        if data is None:
+            try:
+                data = self._time_zip().read(f"time/{subdir}/{filename}")
+            except (FileNotFoundError, KeyError):
+                raise FileNotFoundError(
+                    f"time/{subdir}/{filename} is found neither in {self.datadir} nor in time.zip"
+                ) from None
+
+        return np.frombuffer(data, dtype=dtype, count=1)[0]
+
+    def _time_index_path(self, tau=False):
+        return self.datadir / "time" / ("tau.idx" if tau else "mhd.idx")
+
+    def _time_index(self, tau=False, validate=True):
+        """
+        Returns the time index, i.e., the time of step n at position n
+
+        The index is reloaded only when its modification time or size changes.
+        It is checked against the time files once per load and value of nd,
+        see _time_index_is_valid, and an empty array is returned if it is out of date.
+
+        Parameters
+        ----------
+        tau : bool
+            if True time index for optical depth (high cadence)
+        validate : bool
+            if False the index is returned without the check
+
+        Returns
+        -------
+        time : numpy.ndarray, float64
+            time of the indexed steps. Empty if there is no index.
+        """
+        path = self._time_index_path(tau)
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            return np.empty(0, dtype=np.float64)
+        stamp = (st.st_mtime_ns, st.st_size)
+
+        cache = self.__dict__.setdefault("_time_index_cache", {})
+        if tau in cache and cache[tau][0] == stamp:
+            time, valid = cache[tau][1:]
+        else:
+            # a partially written last entry is ignored
+            time = np.fromfile(path, dtype="<f8", count=st.st_size // 8)
+            time = time.astype(np.float64)
+            time.flags.writeable = False
+            # result of the check for each nd
+            valid = {}
+            cache[tau] = (stamp, time, valid)
+
+        if not validate:
+            return time
+        nd = self.nd_tau if tau else self.nd
+        if nd not in valid:
+            valid[nd] = self._time_index_is_valid(time, tau)
+        if not valid[nd]:
+            return np.empty(0, dtype=np.float64)
+        return time
+
+    def _time_index_is_valid(self, index, tau=False):
+        """
+        Checks the time index against the time files
+
+        A restart rewrites the steps after the restart step, so the time of
+        the last indexed step and of the current last step nd are compared
+        with the files. The index is out of date if a time differs or
+        the file of the last indexed step is gone.
+
+        Parameters
+        ----------
+        index : numpy.ndarray, float64
+            time index
+        tau : bool
+            if True time index for optical depth (high cadence)
+
+        Returns
+        -------
+        valid : bool
+            True if the index agrees with the time files
+        """
+        if len(index) == 0:
+            return True
+        subdir = "tau" if tau else "mhd"
+        nd = self.nd_tau if tau else self.nd
+        n_last = len(index) - 1
+        for n in sorted({min(nd, n_last), n_last}):
+            try:
+                if self._read_time_file(subdir, n) != index[n]:
+                    return False
+            except FileNotFoundError:
+                if n == n_last:
+                    return False
+        return True
+
+    def index_time(self):
+        """
+        Updates the time indices datadir/time/mhd.idx and datadir/time/tau.idx
+
+        A time index is a raw little endian float64 array of the time of
+        every step from 0, read from time/ or time.zip. Only the steps after
+        the last indexed one are read. If the index does not agree with the
+        time files, e.g., after a restart, the index is rebuilt.
+        The index is written to a temporary file and renamed, so a reader
+        never sees a partial index.
+        """
+        for tau, subdir in [(False, "mhd"), (True, "tau")]:
+            path = self._time_index_path(tau)
+            # the index is checked afresh, since the files may have been rewritten
+            index = self._time_index(tau, validate=False)
+            if not self._time_index_is_valid(index, tau):
+                index = index[:0]
+
+            time = []
+            n = len(index)
+            while True:
+                try:
+                    time.append(self._read_time_file(subdir, n))
+                except FileNotFoundError:
+                    break
+                n += 1
+
+            if not time and (len(index) > 0 or not path.exists()):
+                continue
+
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+            try:
+                with open(tmp, "wb") as f:
+                    f.write(index.astype("<f8").tobytes())
+                    f.write(np.asarray(time, dtype="<f8").tobytes())
+                os.replace(tmp, path)
+            except BaseException:
+                try:
+                    tmp.unlink()
+                except OSError:
+                    pass
+                raise
+
+    def time_to_step(self, t, tau=False):
+        """
+        Returns the time step whose time is nearest to t
+
+        Parameters
+        ----------
+        t : float or array_like
+            time
+        tau : bool
+            if True time step for optical depth (high cadence)
+
+        Returns
+        -------
+        n : int or numpy.ndarray, int
+            time step nearest to t
+        """
+        time = self.time_series(0, tau=tau)
+        t = np.asarray(t, dtype=np.float64)
+
+        if len(time) == 1:
+            n = np.zeros(t.shape, dtype=int)
+        else:
+            n = np.clip(np.searchsorted(time, t), 1, len(time) - 1)
+            n = np.where(np.abs(t - time[n - 1]) <= np.abs(time[n] - t), n - 1, n)
+        if n.ndim == 0:
+            return int(n)
+        return n
+
     def time_read(self, n, tau=False, verbose=True, use_zip=False):
         """
         Reads time at a selected time step
@@ -172,25 +471,7 @@ class Data:
             time at a selected time step
         """
 
-        subdir = "tau" if tau else "mhd"
-        filename = f"t.dac.{n:08d}"
-
-        filepath = self.datadir / "time" / subdir / filename
-
-        if not filepath.exists() or use_zip:
-            zippath = self.datadir / "time.zip"
-            arcname = f"time/{subdir}/{filename}"
-
-            with zipfile.ZipFile(zippath, "r") as zf:
-                data = zf.read(arcname)
-                self.time = np.frombuffer(
-                    data,
-                    dtype=self.endian + "d",
-                    count=1,
-                )[0]
-        else:
-            with open(filepath, "rb") as f:
-                self.time = np.fromfile(f, self.endian + "d", 1)[0]
+        self.time = self.time_series(n, n, tau=tau, use_zip=use_zip)[0]
 
         if verbose:
             print("### time is stored in self.time ###")
@@ -221,3 +502,283 @@ class Data:
             self.qc = np.fromfile(
                 f, self.endian + "d", self.mtype * self.ixg * self.jxg * self.kxg
             ).reshape((self.ixg, self.jxg, self.kxg, self.mtype), order="F")
+
+    def mark_zarr_complete(self):
+        """
+        Marks the zarr stores of the run written by an older version as complete
+
+        Stores are written with a completion marker, and stores without it are
+        rejected by the readers as possibly half-written. This migrates the stores
+        of an older version in remap/qq/zarr, remap/vl/zarr, tau/zarr,
+        slice/zarr, prev/zarr and aftr/zarr at once.
+        See :func:`pyR2D2.zarr_util.mark_complete_tree`.
+
+        Returns
+        -------
+        list of Path
+            stores newly marked
+        """
+        marked = []
+        for subdir in ["remap/qq", "remap/vl", "tau", "slice", "prev", "aftr"]:
+            zarrdir = self.datadir / subdir / "zarr"
+            if zarrdir.is_dir():
+                marked += pyR2D2.zarr_util.mark_complete_tree(zarrdir)
+        return marked
+
+    _compress_kinds = ("qf", "qt", "qs")
+
+    def _slice_directions(self):
+        """
+        Slice directions with at least one slice
+        """
+        return [
+            direc
+            for direc in ["x", "y", "z"]
+            if self.p.__dict__.get(f"n{direc}_slice", 0) > 0
+        ]
+
+    def _compress_memory(self, kind, shards3d=None):
+        """
+        Rough estimate of the memory in bytes for compressing one time step of kind
+        """
+        if kind == "qf":
+            # FullData.compress keeps one chunk of at most 2**24 elements
+            # (or one shard) and its compressed copy in memory
+            if shards3d is not None:
+                return 2 * 4 * int(np.prod(shards3d))
+            return 2 * 4 * min(self.ix * self.jx * self.kx, 2**24)
+        if kind == "qt":
+            return 2 * 4 * len(pyR2D2.OpticalDepth.zarr_keys) * self.jx * self.kx
+
+        if self.geometry == "YinYang":
+            npost, jx, kx = 2, self.jxg_yy, self.kxg_yy
+        else:
+            npost, jx, kx = 1, self.jx, self.kx
+        size = {
+            "x": self.nx_slice * jx * kx,
+            "y": self.ix * self.ny_slice * kx,
+            "z": self.ix * jx * self.nz_slice,
+        }
+        # the directions are compressed one after another
+        return 2 * 4 * len(pyR2D2.Slice.zarr_keys) * npost * max(
+            [size[direc] for direc in self._slice_directions()], default=0
+        )
+
+    def _compress_source_exists(self, kind, n):
+        """
+        True if the source files of kind exist at time step n
+
+        Only one file per step is checked, e.g., the rank file of the first MPI process for "qf".
+        """
+        if kind == "qf":
+            nps = self.qf._remap_nps()
+            if not nps:
+                return False
+            return n in self.qf._manifest().steps(nps[0])
+        if kind == "qt":
+            return self.qt._get_filepath_optical_depth(n).exists()
+        direcs = self._slice_directions()
+        if not direcs:
+            return False
+        postfix = self.qs._get_postfixes()[0]
+        return self.qs._get_filepath_slice(0, direcs[0], n, postfix).exists()
+
+    def compress_range(
+        self,
+        kinds=("qf",),
+        steps=None,
+        workers=1,
+        memory_budget=None,
+        overwrite=False,
+        resume=True,
+        state_file=None,
+        store="dir",
+        shards3d=None,
+    ):
+        """
+        Compresses many time steps of remap/qq/, tau/ and slice/ into zarr format
+
+        Independent time steps are compressed in a process pool.
+        Each completed (kind, n) pair is journaled to a JSON-lines state file
+        together with store, shards3d and overwrite, so that a rerun with the
+        same settings after a crash skips finished work. A rerun with other
+        settings does not skip it. To redo a finished run with overwrite=True,
+        pass resume=False.
+
+        Parameters
+        ----------
+        kinds : list of str, optional
+            Kinds of data to be compressed. "qf" for :meth:`pyR2D2.FullData.compress`,
+            "qt" for :meth:`pyR2D2.OpticalDepth.compress`, and
+            "qs" for :meth:`pyR2D2.Slice.compress` in all slice directions.
+            By default ("qf",).
+        steps : iterable of int, optional
+            Time steps to be compressed. If None, the time steps up to
+            self.nd (self.nd_tau for "qt") whose source files exist are compressed.
+            By default None.
+        workers : int, optional
+            Number of worker processes. If 1, the steps are compressed in this process.
+            By default 1.
+        memory_budget : int, optional
+            Memory budget in bytes. The number of workers is reduced so that
+            the estimated memory usage of all the workers fits in the budget.
+            The estimate assumes one automatically sized chunk (or one shard
+            of shards3d) per worker in :meth:`pyR2D2.FullData.compress`;
+            the budget does not limit the chunk size itself.
+            By default None (no limit).
+        overwrite : bool, optional
+            If True, existing zarr files are overwritten. By default False.
+        resume : bool, optional
+            If True, (kind, n) pairs recorded in the state file are skipped.
+            If False, the state file is started afresh. By default True.
+        state_file : str or Path, optional
+            Path to the state file. By default datadir/.pyR2D2_compress_state.jsonl
+        store : str, optional
+            "dir" for .zarr directories, or "zip" for .zarr.zip files written
+            directly without the directories. By default "dir".
+        shards3d : tuple, optional
+            Shard shape of the 3D arrays to store the chunks in fewer files.
+            By default None (no sharding).
+
+        Returns
+        -------
+        list of tuple
+            (kind, n) pairs failed to be compressed. They are not journaled
+            and are retried in the next call.
+        """
+        if store not in ("dir", "zip"):
+            raise ValueError(f"Invalid store: {store}. Must be 'dir' or 'zip'.")
+        for kind in kinds:
+            if kind not in self._compress_kinds:
+                raise ValueError(
+                    f"Invalid kind: {kind}. Must be one of {self._compress_kinds}."
+                )
+
+        if state_file is None:
+            state_file = self.datadir / ".pyR2D2_compress_state.jsonl"
+        state_file = Path(state_file)
+
+        settings = {
+            "store": store,
+            "shards3d": None if shards3d is None else [int(s) for s in shards3d],
+            "overwrite": bool(overwrite),
+        }
+
+        done = set()
+        if resume and state_file.exists():
+            with open(state_file, "r") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        # a line truncated by a crash
+                        continue
+                    # entries of older versions have no settings
+                    entry_settings = {
+                        "store": entry.get("store", "dir"),
+                        "shards3d": entry.get("shards3d"),
+                        "overwrite": entry.get("overwrite", False),
+                    }
+                    if entry_settings == settings:
+                        done.add((entry["kind"], entry["n"]))
+        elif not resume:
+            state_file.unlink(missing_ok=True)
+
+        tasks = []
+        for kind in kinds:
+            if steps is None:
+                nd = self.nd_tau if kind == "qt" else self.nd
+                kind_steps = [
+                    n
+                    for n in range(nd + 1)
+                    if (kind, n) not in done and self._compress_source_exists(kind, n)
+                ]
+            else:
+                kind_steps = steps
+            tasks += [(kind, int(n)) for n in kind_steps if (kind, int(n)) not in done]
+
+        if not tasks:
+            return []
+
+        if memory_budget is not None:
+            memory = max(self._compress_memory(kind, shards3d) for kind in kinds)
+            workers_budget = max(int(memory_budget // max(memory, 1)), 1)
+            if workers_budget < workers:
+                print(
+                    f"Number of workers is reduced from {workers} to {workers_budget} for the memory budget."
+                )
+                workers = workers_budget
+
+        failed = []
+        with open(state_file, "a+") as journal:
+            # start a new line after a line truncated by a crash
+            if journal.tell() > 0:
+                journal.seek(journal.tell() - 1)
+                if journal.read(1) != "\n":
+                    journal.write("\n")
+
+            def _journal(kind, n):
+                journal.write(json.dumps({"kind": kind, "n": n, **settings}) + "\n")
+                journal.flush()
+                os.fsync(journal.fileno())
+
+            if workers == 1:
+                for kind, n in tasks:
+                    try:
+                        _compress_one(self, kind, n, overwrite, store, shards3d)
+                    except Exception as e:
+                        print(f"Failed to compress {kind} at n = {n}: {e}")
+                        failed.append((kind, n))
+                    else:
+                        _journal(kind, n)
+                return sorted(failed)
+
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                futures = {
+                    executor.submit(
+                        _compress_worker,
+                        str(self.datadir),
+                        kind,
+                        n,
+                        overwrite,
+                        store,
+                        shards3d,
+                    ): (kind, n)
+                    for kind, n in tasks
+                }
+                for future in as_completed(futures):
+                    kind, n = futures[future]
+                    try:
+                        future.result()
+                    except Exception as e:
+                        print(f"Failed to compress {kind} at n = {n}: {e}")
+                        failed.append((kind, n))
+                    else:
+                        _journal(kind, n)
+
+        return sorted(failed)
+
+
+def _compress_one(d, kind, n, overwrite, store, shards3d):
+    """
+    Compresses the time step n of kind. See :meth:`pyR2D2.Data.compress_range`
+    """
+    kwargs = dict(overwrite=overwrite, store=store, shards3d=shards3d)
+    if kind == "qf":
+        d.qf.compress(n, **kwargs)
+    elif kind == "qt":
+        d.qt.compress(n, **kwargs)
+    elif kind == "qs":
+        for direc in d._slice_directions():
+            d.qs.compress(n, direc, **kwargs)
+
+
+# pyR2D2.Data of each datadir in a worker process of Data.compress_range
+_worker_data = {}
+
+
+def _compress_worker(datadir, kind, n, overwrite, store, shards3d):
+    d = _worker_data.get(datadir)
+    if d is None:
+        d = _worker_data[datadir] = Data(datadir)
+    _compress_one(d, kind, n, overwrite, store, shards3d)
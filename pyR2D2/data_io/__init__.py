@@ -1,3 +1,24 @@
+import importlib
+
 from .parameters import *
 from .read import *
-from .zarr_util import *
+
+# zarr is imported on first access to zarr_util or one of its functions
+_zarr_util_names = ["open_zarr_group", "zip_zarr", "save", "load", "list_vars"]
+
+
+def __getattr__(name):
+    if name == "zarr_util" or name in _zarr_util_names:
+        # importlib is used since "from . import zarr_util" calls this function again
+        zarr_util = importlib.import_module(".zarr_util", __name__)
+        if name == "zarr_util":
+            return zarr_util
+        value = getattr(zarr_util, name)
+        globals()[name] = value
+        return value
+
+    raise AttributeError(f"module '{__name__}' has no attribute '{name}'")
+
+
+def __dir__():
+    return sorted(set(globals()) | {"zarr_util"} | set(_zarr_util_names))
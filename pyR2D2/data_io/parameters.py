@@ -1,17 +1,61 @@
+import hashlib
+import json
 import os
-import pydoc
+from itertools import islice
+from pathlib import Path
 
 import numpy as np
 
 import pyR2D2
 
+# directory of the cache files, overridden by the environment variable PYR2D2_CACHE_DIR
+_CACHE_DIR = Path(os.environ.get("XDG_CACHE_HOME", Path.home() / ".cache")) / "pyR2D2"
+# increment when the cached attributes change
+_CACHE_VERSION = 1
+# files relative to datadir, from which the cached attributes are read
+_CACHE_SOURCES = [
+    "param/params.dac",
+    "param/back.dac",
+    "param/xyz.dac",
+    "remap/vl/c.dac",
+    "remap/remap_info.dac",
+    "slice/params.dac",
+    "slice/slice.dac",
+    "../input_data/eos_table_sero.npz",
+]
+# attributes that are not cached
+_CACHE_EXCLUDE = ("data", "datadir", "nd", "nd_tau", "_cache_path", "_verbose")
+
+
+def cache_path(datadir, cache_dir=None):
+    """
+    Path of the parameter cache file of a run
+
+    Parameters
+    ----------
+    datadir : str or Path
+        Path to the data directory of the run
+    cache_dir : str or Path, optional
+        Directory of the cache files. If None, the environment variable
+        PYR2D2_CACHE_DIR or ~/.cache/pyR2D2 is used.
+
+    Returns
+    -------
+    path : Path
+        cache_dir/<hash of the absolute datadir>.npz
+    """
+    if cache_dir is None:
+        cache_dir = os.environ.get("PYR2D2_CACHE_DIR", _CACHE_DIR)
+    key = hashlib.sha1(str(Path(datadir).resolve()).encode()).hexdigest()[:16]
+    return Path(cache_dir) / f"{key}.npz"
+
 
 class Parameters:
     """
     Class for managing R2D2 basic parameters
     """
 
-    def __init__(self, data):
+    def __init__(self, data, cache=True, verbose: bool = False):
         """
         Initialize pyR2D2.Parameters
 
@@ -19,12 +63,26 @@ class Parameters:
         ----------
         data : pyR2D2.Data
             Instance of pyR2D2.Data
+        cache : bool or str or Path
+            If True, parameters are loaded from the cache file of the run in the user
+            cache directory (PYR2D2_CACHE_DIR or ~/.cache/pyR2D2) when it is up to date,
+            and the cache is written otherwise. A directory, e.g., datadir to share the
+            cache with other users, is used instead of the user cache directory.
+            If False, the cache is not used. By default True.
+        verbose : bool
+            If True, the reason is shown when the cache is not used or not written.
+            By default False.
         """
-        from scipy.io import FortranFile
-
         self.data = data
         # datadir is Path
         self.datadir = data.datadir
+        self._verbose = verbose
+        if cache is True:
+            self._cache_path = cache_path(self.datadir)
+        elif cache is False or cache is None:
+            self._cache_path = None
+        else:
+            self._cache_path = cache_path(self.datadir, cache_dir=cache)
 
         # Time control parameters
         with open(self.datadir / "param" / "nd.dac", "r") as f:
@@ -32,11 +90,79 @@ class Parameters:
             self.nd = int(nn[0])  # current maximum time step
             self.nd_tau = int(nn[1])  # current maximum time step for tau
 
-        # data/time/tau のファイルの数を数え、nd_tauと比較して大きい方をnd_tauとする
+        # data/time/tau のファイルを調べ、nd_tauより先のステップがあればnd_tauを更新する
         if os.path.isdir(self.datadir / "time" / "tau"):
-            self.nd_tau = max(
-                len(os.listdir(self.datadir / "time" / "tau")) - 1, self.nd_tau
-            )
+            self.nd_tau = self._find_nd_tau(self.nd_tau)
+
+        if not (self._cache_path and self._load_cache()):
+            self._read_sources()
+            if self._cache_path:
+                self._save_cache()
+
+        # read original data
+        if os.path.exists(self.datadir / "cont_log.txt"):
+            with open(self.datadir / "cont_log.txt") as f:
+                self.origin = list(islice(f, 7))[6][-11:-7]
+        else:
+            self.origin = "N/A"
+
+        self._generate_docstring()
+
+    def _find_nd_tau(self, nd_tau: int):
+        """
+        Finds the last time step for tau in datadir/time/tau
+
+        The search starts from nd_tau in nd.dac or the last step in the time
+        index (time/tau.idx) and probes the files t.dac.%08d with exponentially
+        growing steps followed by a binary search, so the directory is not listed.
+        The directory is listed only when the file of the starting step is found
+        neither in time/tau nor in time.zip.
+
+        Parameters
+        ----------
+        nd_tau : int
+            time step for tau in nd.dac
+
+        Returns
+        -------
+        nd_tau : int
+            last time step for tau
+        """
+        taudir = self.datadir / "time" / "tau"
+
+        def _exists(n):
+            return os.path.exists(taudir / f"t.dac.{n:08d}")
+
+        try:
+            n_index = os.stat(self.datadir / "time" / "tau.idx").st_size // 8 - 1
+        except OSError:
+            n_index = -1
+        n0 = max(nd_tau, n_index)
+
+        if n0 > n_index and not _exists(n0):
+            if not os.path.exists(self.datadir / "time.zip"):
+                return max(len(os.listdir(taudir)) - 1, nd_tau)
+            return n0
+
+        # t.dac.n0 exists. Find n1 with missing t.dac.n1, then bisect
+        step = 1
+        while _exists(n0 + step):
+            n0 += step
+            step *= 2
+        n1 = n0 + step
+        while n1 - n0 > 1:
+            n = (n0 + n1) // 2
+            if _exists(n):
+                n0 = n
+            else:
+                n1 = n
+        return n0
+
+    def _read_sources(self):
+        """
+        Reads parameters from the source files of the run
+        """
+        from scipy.io import FortranFile
 
         # Read basic parameters
         with open(self.datadir / "param" / "params.dac", "r") as f:
@@ -287,14 +413,109 @@ class Parameters:
             self.dlogro_e = self.log_ro_e[1] - self.log_ro_e[0]
             self.dse_e = self.se_e[1] - self.se_e[0]
 
-        # read original data
-        if os.path.exists(self.datadir / "cont_log.txt"):
-            with open(self.datadir / "cont_log.txt") as f:
-                self.origin = f.readlines()[6][-11:-7]
-        else:
-            self.origin = "N/A"
+    def _cache_sources(self):
+        """
+        Returns (path, mtime_ns, size) of the files the cached parameters depend on
 
-        self._generate_docstring()
+        Missing files are recorded with mtime_ns = size = -1.
+        """
+        sources = []
+        for path in _CACHE_SOURCES:
+            try:
+                st = os.stat(self.datadir / path)
+                sources.append([path, st.st_mtime_ns, st.st_size])
+            except OSError:
+                sources.append([path, -1, -1])
+        return sources
+
+    def _load_cache(self):
+        """
+        Loads parameters from the cache file
+
+        Returns
+        -------
+        loaded : bool
+            True if the cache is up to date and the parameters are loaded
+        """
+        try:
+            with np.load(self._cache_path, allow_pickle=False) as npz:
+                meta = json.loads(str(npz["__meta__"]))
+                if (
+                    meta["version"] != _CACHE_VERSION
+                    or meta["sources"] != self._cache_sources()
+                ):
+                    if self._verbose:
+                        print(f"Parameter cache {self._cache_path} is out of date")
+                    return False
+                attrs = {}
+                for key in meta["keys"]:
+                    if key in meta["values"]:
+                        attrs[key] = meta["values"][key]
+                    elif key in meta["scalars"]:
+                        attrs[key] = npz[key][()]
+                    else:
+                        attrs[key] = npz[key]
+        except FileNotFoundError:
+            return False
+        except (OSError, KeyError, ValueError) as e:
+            if self._verbose:
+                print(f"Parameter cache {self._cache_path} is not used: {e}")
+            return False
+
+        self.__dict__.update(attrs)
+        return True
+
+    def _save_cache(self):
+        """
+        Saves parameters to the cache file
+
+        The cache is written to a temporary file and renamed, so a reader
+        never sees a partial file. Nothing is written if the cache directory is not writable.
+        """
+        arrays = {}
+        meta = {
+            "version": _CACHE_VERSION,
+            "sources": self._cache_sources(),
+            "keys": [],
+            "values": {},
+            "scalars": [],
+        }
+        for key, value in self.__dict__.items():
+            if key in _CACHE_EXCLUDE:
+                continue
+            if isinstance(value, np.ndarray):
+                arrays[key] = value
+            elif isinstance(value, np.generic):
+                arrays[key] = np.asarray(value)
+                meta["scalars"].append(key)
+            elif isinstance(value, (bool, int, float, str, list)):
+                meta["values"][key] = value
+            else:
+                if self._verbose:
+                    print(f"Parameter cache is not written: {key} cannot be cached")
+                return
+            meta["keys"].append(key)
+        try:
+            arrays["__meta__"] = np.array(json.dumps(meta))
+        except TypeError as e:
+            if self._verbose:
+                print(f"Parameter cache is not written: {e}")
+            return
+
+        path = self._cache_path
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with open(tmp, "wb") as f:
+                np.savez(f, **arrays)
+            os.replace(tmp, path)
+        except OSError as e:
+            if self._verbose:
+                print(f"Parameter cache {path} is not written: {e}")
+            try:
+                tmp.unlink()
+            except OSError:
+                pass
 
     def yinyang_setup(self):
         """
@@ -453,6 +674,11 @@ class Parameters:
         if update_json:
             self._update_json_template(json_file)
 
+        # the class docstring is extended only once
+        if "_docstring_added" in self.__class__.__dict__:
+            return
+        self.__class__._docstring_added = True
+
         gene_space = ""
         desc_space = " " * 4
 
@@ -1,6 +1,9 @@
 import gc
 import os
 import subprocess
+import threading
+import warnings
+from collections import deque
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 
@@ -10,8 +13,420 @@ import pyR2D2
 
 
 def _zarr_zarrzip_exists(path):
-    path = Path(path)
-    return path.exists() or Path(str(path) + ".zip").exists()
+    # stores left half-written by a killed job do not have the completion marker
+    return pyR2D2.zarr_util.is_complete(path)
+
+
+class _RemapManifest:
+    """
+    Cached listing of remap/qq/ rank files and their zarr copies
+
+    The rank files of a time step are stat-ed (in parallel) when the step is
+    first accessed, so reading one step does not scan the whole remap/qq/ tree.
+    The result is reused until the modification time of one of the sentinel
+    directories changes. A new time step written by R2D2 adds a file to every
+    rank directory, so the directories of the first and the last rank are used
+    as sentinels for the rank files. Then only the accessed steps are stat-ed again.
+    """
+
+    def __init__(self, qqdir, npe: int, max_workers: int = 8):
+        """
+        Initialize the _RemapManifest
+
+        Parameters
+        ----------
+        qqdir : pathlib.Path
+            Path to remap/qq/
+        npe : int
+            Number of MPI processes
+        max_workers : int
+            Number of worker threads used for stat-ing the rank files
+        """
+        self.qqdir = Path(qqdir)
+        self.npe = npe
+        self.max_workers = max_workers
+
+        self._lock = threading.Lock()
+        self._rank_stamp = None
+        self._zarr_stamp = None
+
+        self.nested = None
+        self.zarr = set()  # time steps with a .zarr directory
+        self.zarr_zip = set()  # time steps with a .zarr.zip file
+        self._sizes = {}  # time step -> int64 array of rank file sizes (-1 if missing)
+        self._listing = {}  # np0 -> (mtime, time steps) of a listed rank directory
+
+    @staticmethod
+    def _mtime(path):
+        try:
+            return os.stat(path).st_mtime_ns
+        except FileNotFoundError:
+            return -1
+
+    def rank_dir(self, np0: int):
+        """
+        Directory that contains the rank files of MPI process np0
+        """
+        if self.nested:
+            return self.qqdir / f"{np0//1000:05d}" / f"{np0:08d}"
+        # directoryを分けない古いバージョン対応
+        return self.qqdir
+
+    def filepath(self, n: int, np0: int):
+        """
+        File path of the rank file of MPI process np0 at time step n
+        """
+        return self.rank_dir(np0) / f"qq.dac.{n:08d}.{np0:08d}"
+
+    def _get_rank_stamp(self):
+        paths = [self.qqdir, self.rank_dir(0), self.rank_dir(self.npe - 1)]
+        return tuple(self._mtime(path) for path in paths)
+
+    def _get_zarr_stamp(self):
+        return self._mtime(self.qqdir / "zarr")
+
+    def _scan_zarr(self):
+        stamp = self._get_zarr_stamp()
+        zarr, zarr_zip = set(), set()
+        if stamp != -1:
+            with os.scandir(self.qqdir / "zarr") as it:
+                for entry in it:
+                    parts = entry.name.split(".")
+                    if len(parts) < 3 or parts[0] != "qq" or not parts[1].isdigit():
+                        continue
+                    if parts[2:] == ["zarr"]:
+                        zarr.add(int(parts[1]))
+                    elif parts[2:] == ["zarr", "zip"]:
+                        zarr_zip.add(int(parts[1]))
+
+        self.zarr = zarr
+        self.zarr_zip = zarr_zip
+        self._zarr_stamp = stamp
+
+    def refresh(self):
+        """
+        Forget the stat-ed steps if remap/qq/ has been modified since they were stat-ed
+        """
+        with self._lock:
+            nested = (self.qqdir / "00000").is_dir()
+            if nested != self.nested:
+                self.nested = nested
+                self._listing = {}
+            # stamp is taken before stat-ing, so that files added meanwhile
+            # invalidate the cached steps
+            stamp = self._get_rank_stamp()
+            if stamp != self._rank_stamp:
+                self._sizes = {}
+                self._rank_stamp = stamp
+            if self._zarr_stamp is None or self._get_zarr_stamp() != self._zarr_stamp:
+                self._scan_zarr()
+
+    def invalidate(self):
+        """
+        Force a rescan at the next access
+        """
+        with self._lock:
+            self.nested = None
+            self._rank_stamp = None
+            self._zarr_stamp = None
+            self._sizes = {}
+            self._listing = {}
+
+    def sizes(self, n: int):
+        """
+        Sizes of the rank files at time step n in bytes
+
+        The files are stat-ed when the step is first accessed. Missing files have size -1.
+        """
+        sizes = self._sizes.get(n)
+        if sizes is None:
+            sizes = self._stat_step(n)
+            self._sizes[n] = sizes
+        return sizes
+
+    def _stat_step(self, n: int):
+        def _size(np0):
+            try:
+                return os.stat(self.filepath(n, np0)).st_size
+            except FileNotFoundError:
+                return -1
+
+        sizes = np.empty(self.npe, dtype=np.int64)
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            sizes[:] = list(executor.map(_size, range(self.npe)))
+        return sizes
+
+    def exists(self, n: int):
+        """
+        Bool array of the existing rank files at time step n
+        """
+        return self.sizes(n) >= 0
+
+    def missing(self, n: int, nps):
+        """
+        MPI processes whose rank file does not exist at time step n
+
+        Parameters
+        ----------
+        n : int
+            time step
+        nps : list of int
+            MPI process numbers to be checked
+
+        Returns
+        -------
+        missing : list of int
+            MPI process numbers whose rank file is missing
+        """
+        exists = self.exists(n)
+        return [np0 for np0 in nps if not exists[np0]]
+
+    def steps(self, np0: int = 0):
+        """
+        Time steps with a rank file of MPI process np0
+
+        Only the directory of np0 is listed, again only when it has been modified.
+        """
+        path = self.rank_dir(np0)
+        mtime = self._mtime(path)
+        cached = self._listing.get(np0)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+
+        suffix = f".{np0:08d}"
+        steps = []
+        if mtime != -1:
+            with os.scandir(path) as it:
+                for entry in it:
+                    name = entry.name
+                    if not (name.startswith("qq.dac.") and name.endswith(suffix)):
+                        continue
+                    step = name[len("qq.dac.") : -len(suffix)]
+                    if step.isdigit():
+                        steps.append(int(step))
+        steps.sort()
+        self._listing[np0] = (mtime, steps)
+        return steps
+
+    def has_zarr(self, n: int):
+        """
+        True if the .zarr directory exists at time step n
+        """
+        return n in self.zarr
+
+    def has_zarr_zip(self, n: int):
+        """
+        True if the .zarr.zip file exists at time step n
+        """
+        return n in self.zarr_zip
+
+
+_staging = threading.local()
+
+
+def _read_into(f, dtype, count: int):
+    """
+    Reads count elements from the current position of f into a staging buffer
+
+    The staging buffer is kept per thread and grows to the largest read, so
+    repeated reads do not allocate. The returned array is a view into the
+    buffer with the on-disk dtype and is only valid until the next call in
+    the same thread. Assigning it to a native array byteswaps in the same copy.
+
+    Parameters
+    ----------
+    f : file object
+        binary file opened for reading
+    dtype : np.dtype
+        on-disk data type
+    count : int
+        number of elements to be read
+
+    Returns
+    -------
+    buf : numpy.ndarray
+        1D view of count elements into the staging buffer
+    """
+    dtype = np.dtype(dtype)
+    nbytes = int(count) * dtype.itemsize
+    buf = getattr(_staging, "buf", None)
+    if buf is None or buf.nbytes < nbytes:
+        buf = np.empty(nbytes, dtype=np.uint8)
+        _staging.buf = buf
+
+    nread = f.readinto(memoryview(buf[:nbytes]))
+    if nread != nbytes:
+        raise ValueError(
+            f"Unexpected end of file in {f.name}: {nread} bytes read, {nbytes} expected"
+        )
+    return buf[:nbytes].view(dtype)
+
+
+def _index_to_slice(index):
+    """
+    Convert an evenly spaced integer array into an equivalent slice
+    """
+    if len(index) == 1:
+        return slice(index[0], index[0] + 1)
+    step = index[1] - index[0]
+    stop = index[-1] + step
+    return slice(index[0], stop if stop >= 0 else None, step)
+
+
+class _LazyRemapArray:
+    """
+    3D array-like object of one variable in remap/qq/ backed by np.memmap
+
+    Nothing is read at construction. Indexing with integers and slices
+    touches only the rank files and the bytes overlapping the requested slab
+    and returns a numpy.ndarray of native-endian float32.
+
+    Attributes
+    ----------
+    shape : tuple
+        (ix, jx, kx)
+    dtype : numpy.dtype
+        float32
+    ndim : int
+        3
+    """
+
+    max_open = 256  # maximum number of memory maps kept open per array
+
+    def __init__(self, reader, n: int, key: str):
+        """
+        Initialize the _LazyRemapArray
+
+        Parameters
+        ----------
+        reader : pyR2D2.FullData
+            reader used for the domain decomposition and file paths
+        n : int
+            time step
+        key : str
+            variable name
+        """
+        self.n = n
+        self.key = key
+        self.shape = (reader.ix, reader.jx, reader.kx)
+        self.dtype = np.dtype(np.float32)
+        self.ndim = 3
+
+        self._file_dtype = np.dtype(reader.endian + "f4")
+        self._blocks = []
+        for np0 in reader._remap_nps():
+            self._blocks.append(
+                (
+                    reader.iss[np0],
+                    reader.iee[np0] + 1,
+                    reader.jss[np0],
+                    reader.jee[np0] + 1,
+                    reader._get_filepath_remap_qq(n, np0),
+                    reader._remap_qq_offset(np0, key),
+                )
+            )
+        self._memmaps = {}
+
+    def __len__(self):
+        return self.shape[0]
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__} key='{self.key}' n={self.n} shape={self.shape}>"
+
+    @property
+    def size(self):
+        return self.shape[0] * self.shape[1] * self.shape[2]
+
+    @property
+    def nbytes(self):
+        return self.size * self.dtype.itemsize
+
+    def _memmap(self, block):
+        i0, i1, j0, j1, filepath, offset = block
+        mm = self._memmaps.pop(filepath, None)
+        if mm is None:
+            if len(self._memmaps) >= self.max_open:
+                # drop the least recently used map
+                self._memmaps.pop(next(iter(self._memmaps)))
+            mm = np.memmap(
+                filepath,
+                dtype=self._file_dtype,
+                mode="r",
+                offset=offset,
+                shape=(i1 - i0, j1 - j0, self.shape[2]),
+                order="F",
+            )
+        self._memmaps[filepath] = mm
+        return mm
+
+    def _normalize(self, index):
+        if not isinstance(index, tuple):
+            index = (index,)
+        if any(item is Ellipsis for item in index):
+            pos = index.index(Ellipsis)
+            fill = (slice(None),) * (3 - len(index) + 1)
+            index = index[:pos] + fill + index[pos + 1 :]
+        if len(index) > 3:
+            raise IndexError(f"too many indices for array: {len(index)} > 3")
+        index = index + (slice(None),) * (3 - len(index))
+
+        ranges = []
+        squeeze = []
+        for item, size in zip(index, self.shape):
+            if isinstance(item, slice):
+                ranges.append(np.arange(*item.indices(size)))
+                squeeze.append(slice(None))
+            elif isinstance(item, (int, np.integer)):
+                item = int(item)
+                if item < -size or item >= size:
+                    raise IndexError(f"index {item} is out of bounds for size {size}")
+                ranges.append(np.array([item % size]))
+                squeeze.append(0)
+            else:
+                raise TypeError(
+                    f"{self.__class__.__name__} supports only integers and slices, got {type(item)}"
+                )
+        return ranges, tuple(squeeze)
+
+    def __getitem__(self, index):
+        (ii, jj, kk), squeeze = self._normalize(index)
+        out = np.empty((len(ii), len(jj), len(kk)), dtype=self.dtype)
+        if out.size == 0:
+            return out[squeeze]
+        k_slice = _index_to_slice(kk)
+
+        for block in self._blocks:
+            i0, i1, j0, j1 = block[:4]
+            i_mask = (ii >= i0) & (ii < i1)
+            j_mask = (jj >= j0) & (jj < j1)
+            if not i_mask.any() or not j_mask.any():
+                continue
+            i_out = np.nonzero(i_mask)[0]
+            j_out = np.nonzero(j_mask)[0]
+            out[
+                i_out[0] : i_out[-1] + 1, j_out[0] : j_out[-1] + 1, :
+            ] = self._memmap(block)[
+                _index_to_slice(ii[i_mask] - i0),
+                _index_to_slice(jj[j_mask] - j0),
+                k_slice,
+            ]
+        return out[squeeze]
+
+    def __array__(self, dtype=None, copy=None):
+        """
+        Whole array read from the rank files
+
+        The data are always assembled from the files into a new array,
+        so copy=False, which forbids a copy, cannot be honoured.
+        """
+        if copy is False:
+            raise ValueError(
+                f"{self.__class__.__name__} reads the data from files and cannot be converted without a copy"
+            )
+        out = self[...]
+        if dtype is not None:
+            out = out.astype(dtype, copy=False)
+        return out
 
 
 class _BaseReader:
@@ -31,6 +446,88 @@ class _BaseReader:
             f"'{self.__class__.__name__}' object has no attribute '{name}'"
         )
 
+    def _clone(self):
+        """
+        Copy of the reader without data arrays
+
+        The copy shares pyR2D2.Data with the original and is used as an independent
+        read buffer, e.g., in background threads.
+        """
+        clone = self.__class__.__new__(self.__class__)
+        clone.__dict__.update(
+            {
+                key: None if isinstance(value, np.ndarray) else value
+                for key, value in self.__dict__.items()
+            }
+        )
+        return clone
+
+    def _iter_steps(self, steps, read, prefetch: int = 2, keys=None):
+        """
+        Core generator of iter_steps
+
+        The data of the following time steps are read in background threads into
+        a ring of prefetch + 1 reader copies while the caller works on the current
+        one, so that at most prefetch + 1 time steps are kept in memory.
+
+        Parameters
+        ----------
+        steps : iterable of int
+            time steps to be read
+        read : callable
+            read(reader, n) reads time step n into reader
+        prefetch : int
+            Number of time steps read ahead
+        keys : str, list, or tuple, optional
+            Variables to be yielded. By default (None or "all") all arrays read by `read`.
+
+        Yields
+        ------
+        n : int
+            time step
+        qq : dict of numpy.ndarray
+            Data at time step n. The arrays are reused for a later time step
+            after the next iteration, so copy them to keep them.
+        """
+        if prefetch < 0:
+            raise ValueError(f"prefetch should be >= 0, but got {prefetch}")
+        if isinstance(keys, str):
+            keys = None if keys == "all" else [keys]
+
+        steps = list(steps)
+        slots = [self._clone() for _ in range(min(prefetch + 1, max(len(steps), 1)))]
+
+        def _task(slot, n):
+            read(slot, n)
+            return {
+                key: value
+                for key, value in slot.__dict__.items()
+                if isinstance(value, np.ndarray) and (keys is None or key in keys)
+            }
+
+        executor = ThreadPoolExecutor(max_workers=max(prefetch, 1))
+        pending = deque()
+        try:
+            for m, n in enumerate(steps[: len(slots)]):
+                pending.append((n, executor.submit(_task, slots[m], n)))
+            m_next = len(pending)
+
+            while pending:
+                n, future = pending.popleft()
+                yield n, future.result()
+
+                # the reader of the time step just consumed is reused
+                if m_next < len(steps):
+                    slot = slots[m_next % len(slots)]
+                    pending.append(
+                        (steps[m_next], executor.submit(_task, slot, steps[m_next]))
+                    )
+                    m_next += 1
+        finally:
+            for _, future in pending:
+                future.cancel()
+            executor.shutdown(wait=True)
+
 
 class _BaseRemapReader(_BaseReader):
     """
@@ -84,9 +581,10 @@ class _BaseRemapReader(_BaseReader):
             memflag = True
             # check if the shape of allocated array is the same as ijk.
             # If not, allocate a new array. This is to avoid memory error when the shape of data changes.
-            if self.__dict__.get(key, None) is not None:
-                memflag = not self.__dict__[key].shape == ijk
-            if self.__dict__.get(key, None) is None or memflag:
+            # Lazy arrays and zarr arrays are never reused as a buffer.
+            if isinstance(self.__dict__.get(key, None), np.ndarray):
+                memflag = not self.__dict__[key].shape == tuple(ijk)
+            if memflag:
                 self.__dict__[key] = np.empty(ijk, dtype=np.float32)
 
     def _dtype_remap_qq(self, np0):
@@ -128,6 +626,127 @@ class _BaseRemapReader(_BaseReader):
 
         return dtype
 
+    def _remap_qq_offset(self, np0: int, key: str):
+        """
+        Byte offset of a variable in the rank file of remap/qq/
+
+        Parameters
+        ----------
+        np0 : int
+            MPI process number
+        key : str
+            variable name. One of remap_keys + remap_keys_add
+
+        Returns
+        -------
+        offset : int
+            byte offset of the variable in the rank file
+        """
+        byte_n_ijk = int(self.iixl[np0]) * int(self.jjxl[np0]) * self.kx * 4
+        if key in self.remap_keys:
+            return self.remap_keys.index(key) * byte_n_ijk
+        return (self.mtype + self.remap_keys_add.index(key)) * byte_n_ijk
+
+    def _memmap_remap_qq(self, n: int, np0: int):
+        """
+        Memory map of a rank file of remap/qq/
+
+        Parameters
+        ----------
+        n : int
+            time step
+        np0 : int
+            MPI process number
+
+        Returns
+        -------
+        qq : dict of numpy.memmap
+            (iixl, jjxl, kx) view of each variable in remap_keys + remap_keys_add.
+            Nothing is read until the views are indexed.
+        """
+        shape = (self.iixl[np0], self.jjxl[np0], self.kx)
+        n_ijk = int(self.iixl[np0]) * int(self.jjxl[np0]) * self.kx
+        mm = np.memmap(
+            self._get_filepath_remap_qq(n, np0), dtype=self.endian + "f4", mode="r"
+        )
+
+        qq = {}
+        for key in self.remap_keys + self.remap_keys_add:
+            start = self._remap_qq_offset(np0, key) // 4
+            qq[key] = mm[start : start + n_ijk].reshape(shape, order="F")
+        return qq
+
+    def _read_remap_qq_region(
+        self,
+        n: int,
+        keys: list,
+        i0: int,
+        i1: int,
+        j0: int,
+        j1: int,
+        k0: int,
+        k1: int,
+        out: dict,
+        max_workers: int = 1,
+    ):
+        """
+        Reads the region [i0:i1, j0:j1, k0:k1] of remap/qq/ into out
+
+        Only the requested keys and the k-range are read from each overlapping
+        rank file. In Fortran order the k-range of a variable is a contiguous
+        run of iixl*jjxl*(k1-k0) elements.
+
+        Parameters
+        ----------
+        n : int
+            time step
+        keys : list of str
+            variables to be read
+        i0, i1, j0, j1, k0, k1 : int
+            index range of the region (the end is exclusive)
+        out : dict of numpy.ndarray
+            (i1-i0, j1-j0, k1-k0) output array for each key
+        max_workers : int
+            Number of workers for parallel reading of rank files
+        """
+        dtype = np.dtype(self.endian + "f4")
+        nps = [
+            np0
+            for np0 in self._remap_nps()
+            if not (
+                self.iss[np0] >= i1
+                or self.iee[np0] < i0
+                or self.jss[np0] >= j1
+                or self.jee[np0] < j0
+            )
+        ]
+
+        def _read_one(np0: int):
+            n_ij = int(self.iixl[np0]) * int(self.jjxl[np0])
+
+            isrt_rcv = max(0, self.iss[np0] - i0)
+            iend_rcv = min(i1 - i0, self.iee[np0] - i0 + 1)
+            jsrt_rcv = max(0, self.jss[np0] - j0)
+            jend_rcv = min(j1 - j0, self.jee[np0] - j0 + 1)
+
+            isrt_snd = isrt_rcv - (self.iss[np0] - i0)
+            iend_snd = isrt_snd + (iend_rcv - isrt_rcv)
+            jsrt_snd = jsrt_rcv - (self.jss[np0] - j0)
+            jend_snd = jsrt_snd + (jend_rcv - jsrt_rcv)
+
+            with open(self._get_filepath_remap_qq(n, np0), "rb") as f:
+                for key in keys:
+                    f.seek(self._remap_qq_offset(np0, key) + k0 * n_ij * 4, os.SEEK_SET)
+                    buf = _read_into(f, dtype, n_ij * (k1 - k0))
+                    out[key][isrt_rcv:iend_rcv, jsrt_rcv:jend_rcv, :] = buf.reshape(
+                        (self.iixl[np0], self.jjxl[np0], k1 - k0), order="F"
+                    )[isrt_snd:iend_snd, jsrt_snd:jend_snd, :]
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = [executor.submit(_read_one, np0) for np0 in nps]
+            for future in as_completed(futures):
+                future.result()
+
     def _get_filepath_remap_qq(self, n, np0):
         """
         get file path of remap/qq/
@@ -144,16 +763,70 @@ class _BaseRemapReader(_BaseReader):
         filepath : pathlib.Path
             file path of remap/qq/
         """
-        if (self.datadir / "remap" / "qq" / "00000").is_dir():
-            cnou = f"{np0//1000:05d}"
-            cno = f"{np0:08d}"
-            filepath = (
-                self.datadir / "remap" / "qq" / cnou / cno / f"qq.dac.{n:08d}.{np0:08d}"
-            )
-        else:
-            # directoryを分けない古いバージョン対応
-            filepath = self.datadir / "remap" / "qq" / f"qq.dac.{n:08d}.{np0:08d}"
-        return filepath
+        return self._manifest(refresh=False).filepath(n, np0)
+
+    def _manifest(self, refresh: bool = True):
+        """
+        Manifest of remap/qq/ shared by all the remap readers of pyR2D2.Data
+
+        Parameters
+        ----------
+        refresh : bool
+            If True, the stat-ed steps are forgotten when remap/qq/ has been modified since they were stat-ed.
+            If False, they are reused as long as they exist.
+
+        Returns
+        -------
+        manifest : _RemapManifest
+            manifest of remap/qq/
+        """
+        manifest = self.data.__dict__.get("_remap_manifest")
+        if manifest is None:
+            manifest = _RemapManifest(self.datadir / "remap" / "qq", self.npe)
+            self.data._remap_manifest = manifest
+        if refresh or manifest.nested is None:
+            manifest.refresh()
+        return manifest
+
+    def _remap_nps(self, ir0s=None):
+        """
+        MPI processes that own a block of remap/qq/
+
+        Parameters
+        ----------
+        ir0s : list of int, optional
+            Restrict to the x-regions ir0 (1-based). By default all x-regions.
+
+        Returns
+        -------
+        nps : list of int
+            MPI process numbers
+        """
+        if ir0s is None:
+            ir0s = range(1, self.ixr + 1)
+
+        nps = []
+        for ir0 in ir0s:
+            for jr0 in range(1, self.jxr + 1):
+                np0 = self.np_ijr[ir0 - 1, jr0 - 1]
+                if ir0 == self.ir[np0] and jr0 == self.jr[np0]:
+                    nps.append(np0)
+        return nps
+
+    def _remap_qq_missing(self, n: int, nps):
+        """
+        True if any rank file of nps is missing at time step n
+        """
+        return len(self._manifest().missing(n, nps)) > 0
+
+    def _remap_zarr_exists(self, n: int):
+        """
+        True if the zarr or zarr.zip copy of remap/qq/ exists at time step n
+        """
+        manifest = self._manifest()
+        if not (manifest.has_zarr(n) or manifest.has_zarr_zip(n)):
+            return False
+        return _zarr_zarrzip_exists(self._get_filepath_remap_zarr(n))
 
     def _get_filepath_remap_zarr(self, n: int):
         """
@@ -173,6 +846,11 @@ class _BaseRemapReader(_BaseReader):
         return self.datadir / "remap" / "qq" / "zarr" / f"qq.{n:08d}.zarr"
 
     def _add_docstring(self):
+        # the class docstring is extended only once
+        if "_docstring_added" in self.__class__.__dict__:
+            return
+        self.__class__._docstring_added = True
+
         docstring = "\n"
         docstring += "    Attributes\n"
         docstring += "    ----------\n"
@@ -245,15 +923,9 @@ class XSelect(_BaseRemapReader):
         i0 = np.argmin(np.abs(self.p.x - xs))
         ir0 = self.i2ir[i0]
 
-        missing = False
         # check if original binary files exists
-        for jr0 in range(1, self.jxr + 1):
-            np0 = self.np_ijr[ir0 - 1, jr0 - 1]
-            if jr0 == self.jr[np0]:
-                filepath = self._get_filepath_remap_qq(n, np0)
-                if not filepath.exists():
-                    missing = True
-                    break
+        target_nps = self._remap_nps(ir0s=[ir0])
+        missing = self._remap_qq_missing(n, target_nps)
 
         if missing and not zarr_flag:
             if verbose:
@@ -272,7 +944,7 @@ class XSelect(_BaseRemapReader):
 
             # If zarr_flag is True, try to read from zarr file
             zarr_path = self._get_filepath_remap_zarr(n)
-            if not _zarr_zarrzip_exists(zarr_path):
+            if not self._remap_zarr_exists(n):
                 raise FileNotFoundError(f"Zarr file does not exist: {zarr_path}")
             qq = pyR2D2.zarr_util.load(zarr_path, names=names, i0=i0, i1=i0 + 1)
             for key in qq.keys():
@@ -293,64 +965,184 @@ class XSelect(_BaseRemapReader):
 
             for key in keys_input:
                 if key not in self.remap_keys + self.remap_keys_add:
-                    print("######")
-                    print("key =", key)
-                    print(
-                        "key should be one of ", self.remap_keys + self.remap_keys_add
+                    raise ValueError(
+                        f"key should be one of {self.remap_keys + self.remap_keys_add}, but got {key}"
                     )
-                    print("return")
-                    return
 
             self._allocate_remap_qq(ijk=[self.jx, self.kx], keys=keys_input)
-            dtype = np.dtype(self.endian + "f4")
-
-            target_nps = []
-            for jr0 in range(1, self.jxr + 1):
-                np0 = self.np_ijr[ir0 - 1, jr0 - 1]
-
-                if jr0 == self.jr[np0]:
-                    target_nps.append(np0)
 
             def _read_one(np0: int):
-                n_ijk = self.iixl[np0] * self.jjxl[np0] * self.kx
-                byte_n_ijk = n_ijk * 4  # for float32
-                byte_n_ijk_mtype = byte_n_ijk * self.mtype
-
-                offset = {
-                    "pr": byte_n_ijk_mtype,
-                    "te": byte_n_ijk_mtype + byte_n_ijk,
-                    "op": byte_n_ijk_mtype + 2 * byte_n_ijk,
-                }
-                filepath = self._get_filepath_remap_qq(n, np0)
-                out = {}
-                with open(filepath, "rb") as f:
-                    for key in keys_input:
-                        if key in self.remap_keys:
-                            m_idx = self.remap_keys.index(key)
-                            f.seek(m_idx * byte_n_ijk, os.SEEK_SET)
-                            buf = np.fromfile(f, dtype=dtype, count=n_ijk)
-                            out[key] = buf.reshape(
-                                (self.iixl[np0], self.jjxl[np0], self.kx), order="F"
-                            )[i0 - self.iss[np0], :, :]
-                        elif key in self.remap_keys_add:
-                            f.seek(offset[key], os.SEEK_SET)
-                            buf = np.fromfile(f, dtype=dtype, count=n_ijk)
-                            out[key] = buf.reshape(
-                                (self.iixl[np0], self.jjxl[np0], self.kx), order="F"
-                            )[i0 - self.iss[np0], :, :]
-                    j0, j1 = self.jss[np0], self.jee[np0] + 1
-                    return (np0, j0, j1, out)
+                # Only the plane i0 is copied from the memory map. In Fortran order
+                # it is a regular pattern with a stride of iixl elements, so the rank
+                # block is neither read into a buffer nor copied. The kernel pages in
+                # whole pages, so pages are skipped on disk when iixl*4 bytes exceeds
+                # the page size.
+                qq = self._memmap_remap_qq(n, np0)
+                j0, j1 = self.jss[np0], self.jee[np0] + 1
+                for key in keys_input:
+                    self.__dict__[key][j0:j1, :] = qq[key][i0 - self.iss[np0], :, :]
 
             with ThreadPoolExecutor(max_workers=max_workers) as executor:
                 futures = [executor.submit(_read_one, np0) for np0 in target_nps]
                 for future in as_completed(futures):
-                    np0, j0, j1, out = future.result()
-                    for key, arr in out.items():
-                        self.__dict__[key][j0:j1, :] = arr
+                    future.result()
 
             self.info = {}
             self.info["xs"] = self.x[i0]
 
+    def iter_steps(
+        self,
+        xs: float,
+        steps,
+        keys="all",
+        prefetch: int = 2,
+        zarr_flag: bool = False,
+        max_workers: int = 1,
+    ):
+        """
+        Iterates over time steps of 2D selected data at a certain x
+
+        The following time steps are read in background threads while
+        the caller works on the current one.
+
+        Parameters
+        ----------
+        xs : float
+            A selected height for data
+        steps : iterable of int
+            Selected time steps for data
+        keys : str, list, or tuple
+            Kind of variable. See :meth:`pyR2D2.XSelect.read`
+        prefetch : int
+            Number of time steps read ahead. At most prefetch + 1 time steps are kept in memory
+        zarr_flag : bool
+            If True, read from zarr format instead of binary format
+        max_workers : int
+            The number of worker threads to use for reading files at each time step
+
+        Yields
+        ------
+        n : int
+            time step
+        qq : dict of numpy.ndarray
+            2D data for each key. The arrays are reused after the next iteration.
+
+        Examples
+        --------
+        .. code-block:: python
+
+            for n, qq in d.qx.iter_steps(d.xmax, range(n0, d.nd + 1), keys=["vx", "bx"]):
+                vxrms = np.sqrt((qq["vx"] ** 2).mean())
+        """
+
+        def _read(reader, n):
+            reader.read(xs, n, keys=keys, zarr_flag=zarr_flag, max_workers=max_workers)
+
+        return self._iter_steps(steps, _read, prefetch=prefetch, keys=keys)
+
+    def read_many(
+        self,
+        xs_list,
+        n: int,
+        keys="all",
+        zarr_flag: bool = False,
+        max_workers: int = 1,
+        verbose: bool = False,
+    ):
+        """
+        Reads 2D selected data at several x in a single pass
+
+        The heights are grouped by the x-region of remap/qq/ and each rank file is
+        opened only once. On the zarr path a single orthogonal selection is used,
+        so that each chunk is read only once.
+
+        Parameters
+        ----------
+        xs_list : list of float
+            Selected heights for data
+        n : int
+            A selected time step for data
+        keys : str, list, or tuple
+            Kind of variable. See :meth:`pyR2D2.XSelect.read`
+        zarr_flag : bool
+            If True, read from zarr format instead of binary format
+        max_workers : int
+            The number of worker threads to use for reading files
+        verbose : bool
+            If True, print verbose output
+
+        Returns
+        -------
+        qq : dict of numpy.ndarray
+            (len(xs_list), jx, kx) array for each key.
+            The selected heights are stored in self.info["xs"]
+        """
+
+        i_list = np.array([np.argmin(np.abs(self.p.x - xs)) for xs in xs_list])
+
+        if isinstance(keys, str):
+            if keys == "all":
+                keys_input = self.remap_keys + self.remap_keys_add
+            else:
+                keys_input = [keys]
+        elif isinstance(keys, (list, tuple)):
+            keys_input = list(keys)
+        else:
+            raise TypeError("keys must be str, list, or tuple")
+
+        for key in keys_input:
+            if key not in self.remap_keys + self.remap_keys_add:
+                raise ValueError(
+                    f"key should be one of {self.remap_keys + self.remap_keys_add}, but got {key}"
+                )
+
+        ir0s = np.unique(self.i2ir[i_list])
+        target_nps = self._remap_nps(ir0s=ir0s)
+        missing = self._remap_qq_missing(n, target_nps)
+
+        if missing and not zarr_flag:
+            if verbose:
+                print("Some original binary files are missing.")
+                print("Trying to read from zarr file.")
+            zarr_flag = True
+
+        self.info = {}
+        self.info["xs"] = self.x[i_list]
+
+        if zarr_flag:
+            zarr_path = self._get_filepath_remap_zarr(n)
+            if not self._remap_zarr_exists(n):
+                raise FileNotFoundError(f"Zarr file does not exist: {zarr_path}")
+            if keys == "all":
+                keys_input = [
+                    key
+                    for key in pyR2D2.zarr_util.list_vars(zarr_path)
+                    if key not in ["x", "y", "z"]
+                ]
+            return pyR2D2.zarr_util.load(zarr_path, names=keys_input, i_index=i_list)
+
+        qq = {
+            key: np.empty((len(i_list), self.jx, self.kx), dtype=np.float32)
+            for key in keys_input
+        }
+
+        def _read_one(np0: int):
+            # output index and local i index of the heights in this rank
+            t = np.where(self.i2ir[i_list] == self.ir[np0])[0]
+            i_local = i_list[t] - self.iss[np0]
+            qqq = self._memmap_remap_qq(n, np0)
+            j0, j1 = self.jss[np0], self.jee[np0] + 1
+            for key in keys_input:
+                for tt, il in zip(t, i_local):
+                    qq[key][tt, j0:j1, :] = qqq[key][il, :, :]
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = [executor.submit(_read_one, np0) for np0 in target_nps]
+            for future in as_completed(futures):
+                future.result()
+
+        return qq
+
 
 class ZSelect(_BaseRemapReader):
     """
@@ -362,7 +1154,15 @@ class ZSelect(_BaseRemapReader):
 
     """
 
-    def read(self, zs: float, n: int):
+    def read(
+        self,
+        zs: float,
+        n: int,
+        keys="all",
+        zarr_flag: bool = False,
+        max_workers: int = 1,
+        verbose: bool = False,
+    ):
         """
         Reads 2D slice data at constant z
         The data is stored in self.qz dictionary
@@ -373,41 +1173,83 @@ class ZSelect(_BaseRemapReader):
             A selected z for data
         n : int
             A selected time step for data
-
+        keys : str, list, or tuple
+            Kind of variable. See :meth:`pyR2D2.FullData.read` for options
+        zarr_flag : bool
+            If True, read from zarr format instead of binary format
+        max_workers : int
+            The number of worker threads to use for reading files
+        verbose : bool
+            If True, print verbose output
         """
         k0 = np.argmin(np.abs(self.z - zs))
 
-        self._allocate_remap_qq(ijk=[self.ix, self.jx])
+        target_nps = self._remap_nps()
+        missing = self._remap_qq_missing(n, target_nps)
 
-        for ir0 in range(1, self.ixr + 1):
-            for jr0 in range(1, self.jxr + 1):
-                np0 = self.np_ijr[ir0 - 1, jr0 - 1]
+        if missing and not zarr_flag:
+            if verbose:
+                print("Some original binary files are missing.")
+                print("Trying to read from zarr file.")
+            zarr_flag = True
+
+        if zarr_flag:
+            if keys == "all":
+                names = keys
+            else:
+                if isinstance(keys, str):
+                    names = [keys, "x", "y", "z"]
+                else:
+                    names = list(keys) + ["x", "y", "z"]
+
+            zarr_path = self._get_filepath_remap_zarr(n)
+            if not self._remap_zarr_exists(n):
+                raise FileNotFoundError(f"Zarr file does not exist: {zarr_path}")
+            qq = pyR2D2.zarr_util.load(zarr_path, names=names, k0=k0, k1=k0 + 1)
+            for key in qq.keys():
+                if key in ["x", "y", "z"]:
+                    self.__dict__[key] = qq[key]
+                else:
+                    self.__dict__[key] = qq[key][:, :, 0]
+        else:
+            if isinstance(keys, str):
+                if keys == "all":
+                    keys_input = self.remap_keys + self.remap_keys_add
+                else:
+                    keys_input = [keys]
+            elif isinstance(keys, (list, tuple)):
+                keys_input = list(keys)
+            else:
+                raise TypeError("keys must be str, list, or tuple")
+
+            for key in keys_input:
+                if key not in self.remap_keys + self.remap_keys_add:
+                    raise ValueError(
+                        f"key should be one of {self.remap_keys + self.remap_keys_add}, but got {key}"
+                    )
+
+            self._allocate_remap_qq(ijk=[self.ix, self.jx], keys=keys_input)
+            dtype = np.dtype(self.endian + "f4")
 
-                dtype = self._dtype_remap_qq(np0)
-                filepath = self._get_filepath_remap_qq(n, np0)
-
-                qqq_mem = np.memmap(filepath, dtype=dtype, mode="r", shape=(1,))
-                qqq = qqq_mem[0]
-
-                for key, m in zip(self.remap_keys, range(self.mtype)):
-                    self.__dict__[key][
-                        self.iss[np0] : self.iee[np0] + 1,
-                        self.jss[np0] : self.jee[np0] + 1,
-                    ] = qqq["qq"].reshape(
-                        (self.iixl[np0], self.jjxl[np0], self.kx, self.mtype), order="F"
-                    )[
-                        :, :, k0, m
-                    ]
-
-                for key in self.remap_keys_add:
-                    self.__dict__[key][
-                        self.iss[np0] : self.iee[np0] + 1,
-                        self.jss[np0] : self.jee[np0] + 1,
-                    ] = qqq[key].reshape(
-                        (self.iixl[np0], self.jjxl[np0], self.kx), order="F"
-                    )[
-                        :, :, k0
-                    ]
+            def _read_one(np0: int):
+                # In Fortran order the plane k0 of a variable is
+                # a contiguous block of iixl*jjxl elements
+                n_ij = int(self.iixl[np0]) * int(self.jjxl[np0])
+                i0, i1 = self.iss[np0], self.iee[np0] + 1
+                j0, j1 = self.jss[np0], self.jee[np0] + 1
+                with open(self._get_filepath_remap_qq(n, np0), "rb") as f:
+                    for key in keys_input:
+                        offset = self._remap_qq_offset(np0, key) + k0 * n_ij * 4
+                        f.seek(offset, os.SEEK_SET)
+                        buf = _read_into(f, dtype, n_ij)
+                        self.__dict__[key][i0:i1, j0:j1] = buf.reshape(
+                            (self.iixl[np0], self.jjxl[np0]), order="F"
+                        )
+
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                futures = [executor.submit(_read_one, np0) for np0 in target_nps]
+                for future in as_completed(futures):
+                    future.result()
 
         self.info = {}
         self.info["zs"] = self.z[k0]
@@ -423,7 +1265,14 @@ class MPIRegion(_BaseRemapReader):
 
     """
 
-    def read(self, ixrt, n):
+    def read(
+        self,
+        ixrt,
+        n,
+        keys="all",
+        max_workers: int = 1,
+        out: dict = None,
+    ):
         """
         Reads 3D data at a selected a MPI process in x-direction.
         corrensponding to ixr-th region in remap coordinate
@@ -438,38 +1287,55 @@ class MPIRegion(_BaseRemapReader):
 
         n : int
             A selected time step for data
+        keys : str, list, or tuple
+            Kind of variable. See :meth:`pyR2D2.FullData.read` for options
+        max_workers : int
+            Number of workers for parallel reading of binary files
+        out : dict of numpy.ndarray, optional
+            Output buffers. (len(i_ixrt), jx, kx) float32 array for each key.
+            The data is written into them and they are stored as attributes, so that
+            a loop over x-regions can reuse the same buffers. By default None
+            (the buffers are allocated internally).
         """
-        # corresponding MPI process
-        nps = np.where(self.ir - 1 == ixrt)[0]
         # correnponding i range
         self.i_ixrt = np.where(self.i2ir - 1 == ixrt)[0]
 
-        self._allocate_remap_qq(ijk=[len(self.i_ixrt), self.jx, self.kx])
+        if isinstance(keys, str):
+            if keys == "all":
+                keys_input = self.remap_keys + self.remap_keys_add
+            else:
+                keys_input = [keys]
+        elif isinstance(keys, (list, tuple)):
+            keys_input = list(keys)
+        else:
+            raise TypeError("keys must be str, list, or tuple")
 
-        for np0 in nps:
-            if self.iixl[np0] != 0:
-                dtype = self._dtype_remap_qq(np0)
-                filepath = self._get_filepath_remap_qq(n, np0)
+        ijk = (len(self.i_ixrt), self.jx, self.kx)
+        if out is None:
+            self._allocate_remap_qq(ijk=ijk, keys=keys_input)
+        else:
+            for key in keys_input:
+                if key not in out:
+                    raise ValueError(f"out does not have a buffer for {key}")
+                if out[key].shape != ijk or out[key].dtype != np.float32:
+                    raise ValueError(
+                        f"out['{key}'] should be a float32 array of shape {ijk}, "
+                        f"but got {out[key].dtype} array of shape {out[key].shape}"
+                    )
+                self.__dict__[key] = out[key]
 
-                with open(filepath, "rb") as f:
-                    qqq = np.fromfile(f, dtype=dtype, count=1)
-                    for key, m in zip(self.remap_keys, range(self.mtype)):
-                        self.__dict__[key][
-                            :, self.jss[np0] : self.jee[np0] + 1, :
-                        ] = qqq["qq"].reshape(
-                            (self.iixl[np0], self.jjxl[np0], self.kx, self.mtype),
-                            order="F",
-                        )[
-                            :, :, :, m
-                        ]
-                    for key in self.remap_keys_add:
-                        self.__dict__[key][
-                            :, self.jss[np0] : self.jee[np0] + 1, :
-                        ] = qqq[key].reshape(
-                            (self.iixl[np0], self.jjxl[np0], self.kx), order="F"
-                        )[
-                            :, :, :
-                        ]
+        self._read_remap_qq_region(
+            n,
+            keys_input,
+            self.i_ixrt[0],
+            self.i_ixrt[-1] + 1,
+            0,
+            self.jx,
+            0,
+            self.kx,
+            out=self.__dict__,
+            max_workers=max_workers,
+        )
 
 
 class FullData(_BaseRemapReader):
@@ -492,6 +1358,7 @@ class FullData(_BaseRemapReader):
         max_workers: int = 1,
         zarr_flag: bool = False,
         verbose: bool = False,
+        lazy: bool = False,
     ):
         """
         Reads 3D full data
@@ -521,24 +1388,21 @@ class FullData(_BaseRemapReader):
         verbose : bool
             If True, print verbose output
 
+        lazy : bool
+            If True, nothing is read here. Each variable is stored as a 3D array-like
+            object backed by memory maps of the rank files (or as a zarr array when
+            the data is read from zarr format). Only the bytes overlapping a requested
+            slab are read when it is indexed, e.g., :code:`d.qf.ro[i0:i1, :, k0]`.
+            By default False.
+
         Notes
         -----
         If keys is 'all', all variables are read
         """
 
         # check if original binary files exists
-        missing = False
-        for ir0 in range(1, self.ixr + 1):
-            for jr0 in range(1, self.jxr + 1):
-                np0 = self.np_ijr[ir0 - 1, jr0 - 1]
-                if ir0 == self.ir[np0] and jr0 == self.jr[np0]:
-
-                    filepath = self._get_filepath_remap_qq(n, np0)
-                    if not filepath.exists():
-                        missing = True
-                        break
-            if missing:
-                break
+        target_nps = self._remap_nps()
+        missing = self._remap_qq_missing(n, target_nps)
 
         if missing and not zarr_flag:
             if verbose:
@@ -556,10 +1420,19 @@ class FullData(_BaseRemapReader):
                     names = list(keys) + ["x", "y", "z"]
 
             zarr_filepath = self._get_filepath_remap_zarr(n)
-            if not _zarr_zarrzip_exists(zarr_filepath):
+            if not self._remap_zarr_exists(n):
                 print(f"zarr or zarr.zip file does not exist at n={n}.")
                 return
 
+            if lazy:
+                root = pyR2D2.zarr_util.open_zarr_group(zarr_filepath)
+                if names == "all":
+                    names = list(root.array_keys())
+                for key in names:
+                    self.__dict__[key] = root[key]
+                self.params = root.attrs["params"]
+                return
+
             qq, params = pyR2D2.zarr_util.load(
                 zarr_filepath, with_attrs=True, names=names
             )
@@ -582,61 +1455,77 @@ class FullData(_BaseRemapReader):
 
             for key in keys_input:
                 if key not in self.remap_keys + self.remap_keys_add:
-                    print("######")
-                    print("key =", key)
-                    print(
-                        "key should be one of ", self.remap_keys + self.remap_keys_add
+                    raise ValueError(
+                        f"key should be one of {self.remap_keys + self.remap_keys_add}, but got {key}"
                     )
-                    print("return")
-                    return
+
+            if lazy:
+                for key in keys_input:
+                    self.__dict__[key] = _LazyRemapArray(self, n, key)
+                return
 
             self._allocate_remap_qq(ijk=[self.ix, self.jx, self.kx], keys=keys_input)
             dtype = np.dtype(self.endian + "f4")
 
-            target_nps = []
-            for ir0 in range(1, self.ixr + 1):
-                for jr0 in range(1, self.jxr + 1):
-                    np0 = self.np_ijr[ir0 - 1, jr0 - 1]
-                    if ir0 == self.ir[np0] and jr0 == self.jr[np0]:
-                        target_nps.append(np0)
+            def _read_one(np0: int):
+                # Each variable is copied once from the staging buffer into
+                # its slab of the destination, byteswapping on the way if needed
+                shape = (self.iixl[np0], self.jjxl[np0], self.kx)
+                n_ijk = int(self.iixl[np0]) * int(self.jjxl[np0]) * self.kx
+                i0, i1 = self.iss[np0], self.iee[np0] + 1
+                j0, j1 = self.jss[np0], self.jee[np0] + 1
+                with open(self._get_filepath_remap_qq(n, np0), "rb") as f:
+                    for key in keys_input:
+                        f.seek(self._remap_qq_offset(np0, key), os.SEEK_SET)
+                        buf = _read_into(f, dtype, n_ijk)
+                        self.__dict__[key][i0:i1, j0:j1, :] = buf.reshape(
+                            shape, order="F"
+                        )
+
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                futures = [executor.submit(_read_one, np0) for np0 in target_nps]
+                for future in as_completed(futures):
+                    future.result()
+
+    def iter_steps(
+        self,
+        steps,
+        keys="all",
+        prefetch: int = 2,
+        zarr_flag: bool = False,
+        max_workers: int = 1,
+    ):
+        """
+        Iterates over time steps of 3D full data
+
+        The following time steps are read in background threads while
+        the caller works on the current one.
+
+        Parameters
+        ----------
+        steps : iterable of int
+            Selected time steps for data
+        keys : str, list, or tuple
+            Kind of variable. See :meth:`pyR2D2.FullData.read`
+        prefetch : int
+            Number of time steps read ahead. At most prefetch + 1 time steps are kept in memory
+        zarr_flag : bool
+            If True, read from zarr format instead of binary format
+        max_workers : int
+            Number of workers for parallel reading of binary files at each time step
 
-            def _read_one(np0: int):
-                n_ijk = self.iixl[np0] * self.jjxl[np0] * self.kx
-                byte_n_ijk = n_ijk * 4  # for float32
-                byte_n_ijk_mtype = byte_n_ijk * self.mtype
-
-                offset = {
-                    "pr": byte_n_ijk_mtype,
-                    "te": byte_n_ijk_mtype + byte_n_ijk,
-                    "op": byte_n_ijk_mtype + 2 * byte_n_ijk,
-                }
-                filepath = self._get_filepath_remap_qq(n, np0)
-                out = {}
-                with open(filepath, "rb") as f:
-                    for key in keys_input:
-                        if key in self.remap_keys:
-                            m_idx = self.remap_keys.index(key)
-                            f.seek(m_idx * byte_n_ijk, os.SEEK_SET)
-                            buf = np.fromfile(f, dtype=dtype, count=n_ijk)
-                            out[key] = buf.reshape(
-                                (self.iixl[np0], self.jjxl[np0], self.kx), order="F"
-                            )
-                        elif key in self.remap_keys_add:
-                            f.seek(offset[key], os.SEEK_SET)
-                            buf = np.fromfile(f, dtype=dtype, count=n_ijk)
-                            out[key] = buf.reshape(
-                                (self.iixl[np0], self.jjxl[np0], self.kx), order="F"
-                            )
-                i0, i1 = self.iss[np0], self.iee[np0] + 1
-                j0, j1 = self.jss[np0], self.jee[np0] + 1
-                return (np0, i0, i1, j0, j1, out)
+        Yields
+        ------
+        n : int
+            time step
+        qq : dict of numpy.ndarray
+            3D data for each key. The arrays are reused after the next iteration.
+        """
 
-            with ThreadPoolExecutor(max_workers=max_workers) as executor:
-                futures = [executor.submit(_read_one, np0) for np0 in target_nps]
-                for future in as_completed(futures):
-                    np0, i0, i1, j0, j1, out = future.result()
-                    for key, arr in out.items():
-                        self.__dict__[key][i0:i1, j0:j1, :] = arr
+        def _read(reader, n):
+            reader.read(n, keys=keys, zarr_flag=zarr_flag, max_workers=max_workers)
+
+        return self._iter_steps(steps, _read, prefetch=prefetch, keys=keys)
 
     def compress(
         self,
@@ -652,11 +1541,22 @@ class FullData(_BaseRemapReader):
         keys: list = zarr_keys,
         overwrite: bool = False,
         max_workers: int = 1,
-        lightweight: bool = False,
+        lightweight: bool = None,
+        store: str = "dir",
+        shards3d: tuple = None,
     ):
         """
         Compresses the remap/qq/ data for a given time step n into zarr format
 
+        Each zarr chunk (shard if shards3d is given) is filled from the rank files
+        overlapping it and written independently, so the memory usage is bounded
+        by max_workers chunks (shards).
+
+        The k-range of a variable is read from a rank file for the whole i-j extent
+        of the rank, so a rank file overlapped by m chunks (shards) in the i-j plane
+        is read m times. Chunks not smaller than the rank blocks (iixl, jjxl) in
+        i and j avoid this read amplification.
+
         Parameters
         ----------
         n : int
@@ -682,21 +1582,38 @@ class FullData(_BaseRemapReader):
         overwrite : bool, optional
             If True, overwrite the existing zarr file. If False and the zarr file already exists, the function will print a message and return without doing anything. By default False.
         max_workers : int, optional
-            Number of workers for parallel reading of binary files when lightweight is True. By default 1.
+            Number of workers for parallel writing of chunks. At most max_workers chunks are kept in memory. By default 1.
         lightweight : bool, optional
-            If True, the function reads and writes each variable separately to save memory. This is useful when the data is too large to fit in memory. By default False (all variables are read and written together).
+            Deprecated and ignored. The data are always written chunk by chunk
+            directly from the rank files, so the memory usage does not depend on this option.
+        store : str, optional
+            "dir" for a .zarr directory, or "zip" for a .zarr.zip file written
+            directly without the directory. With "zip", the rank files are read twice,
+            since the per-chunk digests are written with the metadata before the chunks.
+            By default "dir".
+        shards3d : tuple, optional
+            Shard shape for the 3D data. The chunks are stored as sub-chunks in one
+            object per shard, which reduces the number of files. It must be a multiple of
+            chunks3d. If chunks3d is None, the chunk size is chosen to divide the shard shape.
+            By default None (no sharding).
 
         """
 
+        if lightweight is not None:
+            warnings.warn(
+                "lightweight is deprecated and ignored. FullData.compress always writes chunk by chunk.",
+                DeprecationWarning,
+                stacklevel=2,
+            )
+
         if zarr_filepath is None:
             zarr_filepath = self._get_filepath_remap_zarr(n)
         else:
             zarr_filepath = Path(zarr_filepath)
 
-        if not overwrite and zarr_filepath.exists():
-            print(
-                f"File {zarr_filepath} already exists. Set overwrite=True to overwrite it."
-            )
+        output = pyR2D2.zarr_util.output_path(zarr_filepath, store)
+        if not overwrite and output.exists():
+            print(f"File {output} already exists. Set overwrite=True to overwrite it.")
             return
 
         i_start = 0 if i_start is None else i_start
@@ -726,6 +1643,10 @@ class FullData(_BaseRemapReader):
                     jk_count += 1
 
             chunks3d = (i_size_chunk, j_size_chunk, k_size_chunk)
+            if shards3d is not None:
+                chunks3d = pyR2D2.zarr_util.inner_chunks(shards3d, chunks3d)
+        else:
+            pyR2D2.zarr_util.check_shards(shards3d, chunks3d)
 
         params_dict = {
             "i_start": i_start,
@@ -740,39 +1661,96 @@ class FullData(_BaseRemapReader):
         vars_dict["x"] = self.x[i_start : i_start + i_size]
         vars_dict["y"] = self.y[j_start : j_start + j_size]
         vars_dict["z"] = self.z[k_start : k_start + k_size]
-        pyR2D2.zarr_util.save(
-            zarr_filepath, vars_dict, params_dict, chunks3d=chunks3d, mode="w"
-        )
+        # Each chunk is filled directly from the rank files overlapping it and
+        # written independently, so at most max_workers chunks are in memory.
+        # A shard is rewritten as a whole, so the blocks are aligned to the shards
+        ci, cj, ck = chunks3d if shards3d is None else shards3d
+        regions = [
+            (i0, min(i0 + ci, i_size), j0, min(j0 + cj, j_size), k0, min(k0 + ck, k_size))
+            for i0 in range(0, i_size, ci)
+            for j0 in range(0, j_size, cj)
+            for k0 in range(0, k_size, ck)
+        ]
 
-        if lightweight:
-            for key in keys:
-                print(key)
-                self.read(n=n, keys=key, max_workers=max_workers, zarr_flag=False)
-                arr = self.__dict__[key][
-                    i_start : i_start + i_size,
-                    j_start : j_start + j_size,
-                    k_start : k_start + k_size,
-                ]
-                pyR2D2.zarr_util.save(
-                    zarr_filepath, {key: arr}, chunks3d=chunks3d, mode="a"
+        arrays = {}
+        digests = {key: {} for key in keys}
+        # metadata in a zip file cannot be rewritten, so the digests are computed
+        # in a first pass and written with the metadata of the arrays
+        digests_first = store == "zip"
+
+        def _read_one(key, region):
+            i0, i1, j0, j1, k0, k1 = region
+            out = {key: np.empty((i1 - i0, j1 - j0, k1 - k0), dtype=np.float32)}
+            self._read_remap_qq_region(
+                n,
+                [key],
+                i_start + i0,
+                i_start + i1,
+                j_start + j0,
+                j_start + j1,
+                k_start + k0,
+                k_start + k1,
+                out,
+            )
+            return out[key]
+
+        def _digest_one(key, region):
+            i0, i1, j0, j1, k0, k1 = region
+            digests[key].update(
+                pyR2D2.zarr_util.block_digests(
+                    _read_one(key, region), chunks3d, (i0, j0, k0)
                 )
-                del self.__dict__[key]
-                del arr
-                gc.collect()
-        else:
+            )
 
-            self.read(n=n, keys=keys, max_workers=max_workers, zarr_flag=False)
+        def _write_one(key, region):
+            i0, i1, j0, j1, k0, k1 = region
+            block = _read_one(key, region)
+            arrays[key][i0:i1, j0:j1, k0:k1] = block
+            if not digests_first:
+                digests[key].update(
+                    pyR2D2.zarr_util.block_digests(block, chunks3d, (i0, j0, k0))
+                )
 
-            vars_dict = {}
-            for key in keys:
-                vars_dict[key] = self.__dict__[key][
-                    i_start : i_start + i_size,
-                    j_start : j_start + j_size,
-                    k_start : k_start + k_size,
+        def _run(func):
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                futures = [
+                    executor.submit(func, key, region)
+                    for key in keys
+                    for region in regions
                 ]
-            pyR2D2.zarr_util.save(
-                zarr_filepath, vars_dict, params_dict, chunks3d=chunks3d, mode="a"
+                for future in as_completed(futures):
+                    future.result()
+
+        # the store is built in a temporary sibling and renamed when finished,
+        # so a killed job does not leave a half-written store.
+        # With store="zip", chunks are encoded in parallel and written into the zip file
+        with pyR2D2.zarr_util.store_writer(
+            zarr_filepath, params=params_dict, store=store
+        ) as root:
+            pyR2D2.zarr_util.save(root, vars_dict, chunks3d=chunks3d)
+            if digests_first:
+                _run(_digest_one)
+            arrays.update(
+                pyR2D2.zarr_util.create_arrays(
+                    root,
+                    {key: (i_size, j_size, k_size) for key in keys},
+                    chunks=tuple(chunks3d),
+                    shards=shards3d,
+                    attributes=(
+                        {key: {"digests": digests[key]} for key in keys}
+                        if digests_first
+                        else None
+                    ),
+                )
             )
+            _run(_write_one)
+
+            # digests are used by FullData.check instead of re-reading the rank files
+            if not digests_first:
+                for key in keys:
+                    pyR2D2.zarr_util.set_digests(arrays[key], digests[key])
+
+        self._manifest(refresh=False).invalidate()
 
     @staticmethod
     def _check_core(qq1, qq2, key):
@@ -791,20 +1769,29 @@ class FullData(_BaseRemapReader):
         """
         Check if the remap/qq/ file exists for all MPI processes for a given time step n
 
+        The zarr file is streamed once against the per-chunk digests recorded by
+        FullData.compress, and only mismatched chunks are compared with the rank files.
+        Zarr files without digests are compared with the rank files entirely.
+
         Parameters
         ----------
         n : int
             A selected time step for data
         keys : list or str
             List of values to check. If the check fails for any of the values, the function returns False. By default, all values are checked.
+        max_workers : int
+            Number of workers for parallel reading. By default 1.
         lightweight : bool
             If True, check is done for each value separately to save memory. This is useful when the data is too large to fit in memory. By default, False (all values are checked together).
+            Only used for zarr files without digests.
         """
 
+        manifest = self._manifest()
         zarr_filepath = self._get_filepath_remap_zarr(n)
-        if not zarr_filepath.exists():
+        # the zarr directory or the zarr.zip file is checked
+        if not self._remap_zarr_exists(n):
             print(
-                f"Zarr file does not exist at n={n}. Please run FullData.compress() to create it."
+                f"Zarr file does not exist or is incomplete at n={n}. Please run FullData.compress() to create it."
             )
             return False
 
@@ -815,14 +1802,54 @@ class FullData(_BaseRemapReader):
                 )
                 return False
 
-        for np0 in range(self.npe):
-            filepath = self._get_filepath_remap_qq(n, np0)
-            if self.iixl[np0] * self.jjxl[np0] != 0:
-                if not filepath.exists():
-                    print(f"File {filepath} does not exist. Anyway you can delete it.")
-                    return True
+        nps = [np0 for np0 in range(self.npe) if self.iixl[np0] * self.jjxl[np0] != 0]
+        missing = manifest.missing(n, nps)
+        if len(missing) > 0:
+            filepath = manifest.filepath(n, missing[0])
+            print(f"File {filepath} does not exist. Anyway you can delete it.")
+            return True
+
+        # truncated rank files cannot be compared with the zarr file
+        sizes = manifest.sizes(n)
+        for np0 in nps:
+            size = (self.mtype + 3) * self.iixl[np0] * self.jjxl[np0] * self.kx * 4
+            if sizes[np0] != size:
+                print(
+                    f"File {manifest.filepath(n, np0)} has {sizes[np0]} bytes, but {size} bytes are expected."
+                )
+                return False
 
-        if lightweight:
+        mismatched = pyR2D2.zarr_util.verify(
+            zarr_filepath, keys, max_workers=max_workers
+        )
+        if all(key in mismatched for key in keys):
+            # only the chunks not matching their digests are compared with the rank files
+            root = pyR2D2.zarr_util.open_zarr_group(zarr_filepath)
+            params = root.attrs["params"]
+            for key in keys:
+                for _, (si, sj, sk) in mismatched[key]:
+                    shape = (si.stop - si.start, sj.stop - sj.start, sk.stop - sk.start)
+                    qq = {key: np.empty(shape, dtype=np.float32)}
+                    self._read_remap_qq_region(
+                        n,
+                        [key],
+                        params["i_start"] + si.start,
+                        params["i_start"] + si.stop,
+                        params["j_start"] + sj.start,
+                        params["j_start"] + sj.stop,
+                        params["k_start"] + sk.start,
+                        params["k_start"] + sk.stop,
+                        qq,
+                    )
+                    try:
+                        qq_zarr = root[key][si, sj, sk]
+                    except Exception as e:
+                        print(f"Chunk of {key} cannot be read: {e}")
+                        return False
+                    if not self._check_core(qq_zarr, qq[key], key):
+                        return False
+        # zarr files compressed without digests are compared with the rank files
+        elif lightweight:
             for i in range(0, self.ix, self.ix // 3):
                 self.qx.read(self.x[i], n=n, zarr_flag=True)
                 qq_copy = {}
@@ -871,17 +1898,19 @@ class FullData(_BaseRemapReader):
             check_flag = self.check(n=n, lightweight=lightweight)
 
         if check_flag:
-            if (self.datadir / "remap" / "qq" / "00000").is_dir():
+            manifest = self._manifest()
+            if manifest.nested:
                 base = self.datadir / "remap" / "qq"
                 print(
                     "Deleting files in",
                     f"{base}/*/*/qq.dac.{n:08d}.*",
                 )
-                for np0 in range(self.npe):
-
-                    filepath = self._get_filepath_remap_qq(n, np0)
-                    if filepath.exists():
+                for np0 in np.where(manifest.exists(n))[0]:
+                    filepath = manifest.filepath(n, np0)
+                    try:
                         filepath.unlink()
+                    except FileNotFoundError:
+                        pass
             else:
                 print(
                     "Deleting",
@@ -900,6 +1929,7 @@ class FullData(_BaseRemapReader):
                     ],
                     check=True,
                 )
+            manifest.invalidate()
 
     def clear(self, keys="all"):
         """
@@ -933,9 +1963,11 @@ class FullData(_BaseRemapReader):
         """
 
         zarr_filepath = self._get_filepath_remap_zarr(n)
-        return pyR2D2.zarr_util.zip_zarr(
+        zip_path = pyR2D2.zarr_util.zip_zarr(
             zarr_filepath, overwrite=overwrite, remove_original=remove_original
         )
+        self._manifest(refresh=False).invalidate()
+        return zip_path
 
 
 class RestrictedData(_BaseRemapReader):
@@ -959,6 +1991,7 @@ class RestrictedData(_BaseRemapReader):
         z0: float = None,
         z1: float = None,
         zarr_flag: bool = False,
+        max_workers: int = 1,
         verbose: bool = False,
     ):
         """
@@ -978,6 +2011,8 @@ class RestrictedData(_BaseRemapReader):
             Maximum x, y, z by default, the maximum of the domain
         zarr_flag : bool
             If True, read from zarr format instead of binary format
+        max_workers : int
+            Number of workers for parallel reading of binary files
         verbose : bool
             If True, print verbose output
         """
@@ -1003,18 +2038,8 @@ class RestrictedData(_BaseRemapReader):
         kxr = k1 - k0 + 1
 
         # check if original binary files exists
-        missing = False
-        for ir0 in range(1, self.ixr + 1):
-            for jr0 in range(1, self.jxr + 1):
-                np0 = self.np_ijr[ir0 - 1, jr0 - 1]
-                if ir0 == self.ir[np0] and jr0 == self.jr[np0]:
-
-                    filepath = self._get_filepath_remap_qq(n, np0)
-                    if not filepath.exists():
-                        missing = True
-                        break
-            if missing:
-                break
+        target_nps = self._remap_nps()
+        missing = self._remap_qq_missing(n, target_nps)
 
         if missing and not zarr_flag:
             if verbose:
@@ -1032,7 +2057,7 @@ class RestrictedData(_BaseRemapReader):
                     names = list(keys) + ["x", "y", "z"]
 
             zarr_filepath = self._get_filepath_remap_zarr(n)
-            if not _zarr_zarrzip_exists(zarr_filepath):
+            if not self._remap_zarr_exists(n):
                 print(f"Zarr file does not exist at n={n}.")
                 return
 
@@ -1065,64 +2090,18 @@ class RestrictedData(_BaseRemapReader):
             for key in keys_input:
                 self.__dict__[key] = np.zeros((ixr, jxr, kxr), dtype=np.float32)
 
-            for ir0 in range(1, self.ixr + 1):
-                for jr0 in range(1, self.jxr + 1):
-                    np0 = self.np_ijr[ir0 - 1, jr0 - 1]
-
-                    if not (
-                        self.iss[np0] > i1
-                        or self.iee[np0] < i0
-                        or self.jss[np0] > j1
-                        or self.jee[np0] < j0
-                    ):
-
-                        dtype = self._dtype_remap_qq(np0)
-                        filepath = self._get_filepath_remap_qq(n, np0)
-
-                        with open(filepath, "rb") as f:
-                            qqq = np.fromfile(f, dtype=dtype, count=1)
-
-                            for key in keys_input:
-                                isrt_rcv = max([0, self.iss[np0] - i0])
-                                iend_rcv = min([ixr, self.iee[np0] - i0 + 1])
-                                jsrt_rcv = max([0, self.jss[np0] - j0])
-                                jend_rcv = min([jxr, self.jee[np0] - j0 + 1])
-
-                                isrt_snd = isrt_rcv - (self.iss[np0] - i0)
-                                iend_snd = isrt_snd + (iend_rcv - isrt_rcv)
-                                jsrt_snd = jsrt_rcv - (self.jss[np0] - j0)
-                                jend_snd = jsrt_snd + (jend_rcv - jsrt_rcv)
-
-                                if key in self.remap_keys:
-                                    m = self.remap_keys.index(key)
-
-                                    self.__dict__[key][
-                                        isrt_rcv:iend_rcv, jsrt_rcv:jend_rcv, :
-                                    ] = qqq["qq"].reshape(
-                                        (
-                                            self.iixl[np0],
-                                            self.jjxl[np0],
-                                            self.kx,
-                                            self.mtype,
-                                        ),
-                                        order="F",
-                                    )[
-                                        isrt_snd:iend_snd,
-                                        jsrt_snd:jend_snd,
-                                        k0 : k1 + 1,
-                                        m,
-                                    ]
-                                else:
-                                    self.__dict__[key][
-                                        isrt_rcv:iend_rcv, jsrt_rcv:jend_rcv, :
-                                    ] = qqq[key].reshape(
-                                        (self.iixl[np0], self.jjxl[np0], self.kx),
-                                        order="F",
-                                    )[
-                                        isrt_snd:iend_snd,
-                                        jsrt_snd:jend_snd,
-                                        k0 : k1 + 1,
-                                    ]
+            self._read_remap_qq_region(
+                n,
+                keys_input,
+                i0,
+                i1 + 1,
+                j0,
+                j1 + 1,
+                k0,
+                k1 + 1,
+                out=self.__dict__,
+                max_workers=max_workers,
+            )
 
         self.info = {
             "x": self.x[i0 : i1 + 1],
@@ -1336,35 +2315,101 @@ class OpticalDepth(_BaseReader):
                         (self.m_tu, self.m_in, self.jx, self.kx), order="F"
                     )[mt, mk, :, :]
 
+    def iter_steps(
+        self,
+        steps,
+        keys="all",
+        prefetch: int = 2,
+        zarr_flag: bool = False,
+    ):
+        """
+        Iterates over time steps of 2D data at certain optical depths
+
+        The following time steps are read in background threads while
+        the caller works on the current one.
+
+        Parameters
+        ----------
+        steps : iterable of int
+            Selected time steps for data
+        keys : str or list or tuple, optional
+            List of values to be yielded. If 'all', all values are yielded. By default 'all'.
+        prefetch : int
+            Number of time steps read ahead. At most prefetch + 1 time steps are kept in memory
+        zarr_flag : bool, optional
+            Whether to read from zarr file, by default False
+
+        Yields
+        ------
+        n : int
+            time step
+        qq : dict of numpy.ndarray
+            2D data for each key. The arrays are reused after the next iteration.
+        """
+
+        def _read(reader, n):
+            reader.read(n, zarr_flag=zarr_flag, keys=keys)
+
+        return self._iter_steps(steps, _read, prefetch=prefetch, keys=keys)
+
     def compress(
         self,
         n: int,
         zarr_filepath: str = None,
         keys: list = zarr_keys,
         overwrite: bool = False,
+        store: str = "dir",
+        shards3d: tuple = None,
     ):
+        """
+        Compresses the tau/ data for a given time step n into zarr format
+
+        Parameters
+        ----------
+        n : int
+            A selected time step for data
+        zarr_filepath : str, optional
+            File path for the output zarr file. If None, the default file path is used. By default None.
+        keys : list, optional
+            List of variables to be compressed. By default, it includes all variables in zarr_keys.
+        overwrite : bool, optional
+            If True, overwrite the existing zarr file. By default False.
+        store : str, optional
+            "dir" for a .zarr directory, or "zip" for a .zarr.zip file written
+            directly without the directory. By default "dir".
+        shards3d : tuple, optional
+            Shard shape to store the chunks in fewer files. By default None (no sharding).
+        """
 
         if zarr_filepath is None:
             zarr_filepath = self._get_filepath_optical_depth_zarr(n)
         else:
             zarr_filepath = Path(zarr_filepath)
 
-        if not overwrite and zarr_filepath.exists():
-            print(
-                f"File {zarr_filepath} already exists. Set overwrite=True to overwrite it."
-            )
+        output = pyR2D2.zarr_util.output_path(zarr_filepath, store)
+        if not overwrite and output.exists():
+            print(f"File {output} already exists. Set overwrite=True to overwrite it.")
             return
 
         self.read(n=n, zarr_flag=False)
         chunk_max = 4096
         chunks3d = (1, min(self.jx, chunk_max), min(self.kx, chunk_max))
+        if shards3d is not None:
+            chunks3d = pyR2D2.zarr_util.inner_chunks(shards3d, chunks3d)
         vars_dict = {}
         for key in keys:
             vars_dict[key] = self.__dict__[key]
 
         params_dict = {}
         pyR2D2.zarr_util.save(
-            zarr_filepath, vars_dict, params_dict, chunks3d=chunks3d, mode="w"
+            zarr_filepath,
+            vars_dict,
+            params_dict,
+            chunks3d=chunks3d,
+            mode="w",
+            digests=True,
+            store=store,
+            shards3d=shards3d,
         )
 
     def check(self, n: int, keys: list = zarr_keys):
@@ -1380,9 +2425,9 @@ class OpticalDepth(_BaseReader):
         """
 
         zarr_filepath = self._get_filepath_optical_depth_zarr(n)
-        if not zarr_filepath.exists():
+        if not _zarr_zarrzip_exists(zarr_filepath):
             print(
-                f"Zarr file does not exist at n={n}. Please run OpticalDepth.compress() to create it."
+                f"Zarr file does not exist or is incomplete at n={n}. Please run OpticalDepth.compress() to create it."
             )
             return False
 
@@ -1393,6 +2438,12 @@ class OpticalDepth(_BaseReader):
                 )
                 return False
 
+        # the binary file is read only when the digests do not match
+        mismatched = pyR2D2.zarr_util.verify(zarr_filepath, keys)
+        if all(key in mismatched and not mismatched[key] for key in keys):
+            print(f"Check passed at n={n}")
+            return True
+
         self.read(n=n, zarr_flag=True)
         qq_copy = {}
         for key in keys:
@@ -1474,59 +2525,457 @@ class OnTheFly(_BaseReader):
             for m in range(m_total):
                 self.__dict__[self.cl[m]] = None
 
-        self._generate_docstring()
+        self._generate_docstring()
+
+    def read(self, n, zarr_flag: bool = False):
+        """
+        Reads on the fly analysis data from fortran.
+        The data is stored in self.vc dictionary
+
+        Parameters
+        ----------
+        n : int
+            A selected time step for data
+        zarr_flag : bool
+            If True, read from the zarr stores instead of binary format.
+            If the binary files do not exist, the zarr stores are read. By default, False.
+        """
+
+        planes = ["xy", "xz", "flux"] + (["spex"] if self.geometry == "YinYang" else [])
+        if zarr_flag or not all(
+            self._get_filepath_on_the_fly(plane, n).exists() for plane in planes
+        ):
+            vc = self.read_series(n, n, zarr_flag=zarr_flag)
+            for key in vc.keys():
+                self.__dict__[key] = vc[key][0]
+            return
+
+        # read xy plane data
+        with open(self.datadir / "remap" / "vl" / f"vl_xy.dac.{n:08d}", "rb") as f:
+            vl = np.fromfile(
+                f, self.endian + "f", self.m2d_xy * self.ix * self.jx
+            ).reshape((self.ix, self.jx, self.m2d_xy), order="F")
+
+        for m in range(self.m2d_xy):
+            self.__dict__[self.cl[m]] = vl[:, :, m]
+
+        # read xz plane data
+        with open(self.datadir / "remap" / "vl" / f"vl_xz.dac.{n:08d}", "rb") as f:
+            vl = np.fromfile(
+                f, self.endian + "f", self.m2d_xz * self.ix * self.kx
+            ).reshape((self.ix, self.kx, self.m2d_xz), order="F")
+
+        for m in range(self.m2d_xz):
+            self.__dict__[self.cl[m + self.m2d_xy]] = vl[:, :, m]
+
+        # read flux related value
+        with open(self.datadir / "remap" / "vl" / f"vl_flux.dac.{n:08d}", "rb") as f:
+            vl = np.fromfile(
+                f, self.endian + "f", self.m2d_flux * (self.ix + 1) * self.jx
+            ).reshape((self.ix + 1, self.jx, self.m2d_flux), order="F")
+
+        for m in range(self.m2d_flux):
+            self.__dict__[self.cl[m + self.m2d_xy + self.m2d_xz]] = vl[:, :, m]
+
+        # read spectra
+        if self.geometry == "YinYang":
+            with open(
+                self.datadir / "remap" / "vl" / f"vl_spex.dac.{n:08d}", "rb"
+            ) as f:
+                vl = np.fromfile(
+                    f, self.endian + "f", self.m2d_spex * self.ix * self.kx // 4
+                ).reshape((self.ix, self.kx // 4, self.m2d_spex), order="F")
+
+            for m in range(self.m2d_spex):
+                self.__dict__[
+                    self.cl[m + self.m2d_xy + self.m2d_xz + self.m2d_flux]
+                ] = vl[:, :, m]
+
+    def _get_filepath_on_the_fly(self, plane: str, n: int):
+        return self.datadir / "remap" / "vl" / f"vl_{plane}.dac.{n:08d}"
+
+    def _get_filepath_on_the_fly_zarr(self, plane: str):
+        return self.datadir / "remap" / "vl" / "zarr" / f"vl_{plane}.zarr"
+
+    def _planes(self):
+        """
+        Returns the plane types and their values in self.cl
+        """
+        planes = {}
+        for key in self.cl:
+            plane = self._layout(key)[0]
+            planes.setdefault(plane, []).append(key)
+        return planes
+
+    def _layout(self, key: str):
+        """
+        Location of a value in the on the fly analysis files
+
+        Parameters
+        ----------
+        key : str
+            value in self.cl
+
+        Returns
+        -------
+        plane : str
+            'xy', 'xz', 'flux', or 'spex'. The value is in vl_{plane}.dac.{n:08d}
+        m : int
+            index of the value in the file
+        shape : tuple of int
+            shape of the value
+        """
+        planes = [
+            ("xy", self.m2d_xy, (self.ix, self.jx)),
+            ("xz", self.m2d_xz, (self.ix, self.kx)),
+            ("flux", self.m2d_flux, (self.ix + 1, self.jx)),
+        ]
+        if self.geometry == "YinYang":
+            planes.append(("spex", self.m2d_spex, (self.ix, self.kx // 4)))
+
+        if key not in self.cl:
+            raise ValueError(f"key should be one of {self.cl}, but got {key}")
+        m = self.cl.index(key)
+        for plane, m2d, shape in planes:
+            if m < m2d:
+                return plane, m, shape
+            m -= m2d
+        raise ValueError(f"{key} is not in the on the fly analysis files")
+
+    def read_series(
+        self,
+        n0: int,
+        n1: int,
+        keys=None,
+        reduce: str = None,
+        max_workers: int = 1,
+        zarr_flag: bool = False,
+    ):
+        """
+        Reads on the fly analysis data from time step n0 to n1
+
+        Only the requested values are read from the files. Time steps without
+        binary files are read from the zarr stores written by
+        :meth:`pyR2D2.OnTheFly.compress`.
+
+        Parameters
+        ----------
+        n0 : int
+            first time step
+        n1 : int
+            last time step (inclusive)
+        keys : str, list, or tuple, optional
+            Values in self.cl to be read. By default (None) all values are read.
+        reduce : str, optional
+            Reduction in the second (horizontal) direction applied on reading.
+            'mean' for the average and 'rms' for the root mean square.
+            For the xy and flux planes in spherical geometry, the average
+            is weighted by sin(y). By default (None), no reduction.
+        max_workers : int
+            Number of workers for parallel reading of time steps
+        zarr_flag : bool
+            If True, read from the zarr stores instead of binary format. By default, False.
+
+        Returns
+        -------
+        vc : dict of numpy.ndarray
+            (n1 - n0 + 1, ...) array for each key. float32 without reduction
+            and float64 with reduction.
+        """
+        if keys is None:
+            keys_input = list(self.cl)
+        elif isinstance(keys, str):
+            keys_input = [keys]
+        elif isinstance(keys, (list, tuple)):
+            keys_input = list(keys)
+        else:
+            raise TypeError("keys must be str, list, or tuple")
+
+        if reduce not in [None, "mean", "rms"]:
+            raise ValueError(f"reduce should be None, 'mean', or 'rms', but got {reduce}")
+
+        layouts = {key: self._layout(key) for key in keys_input}
+        nt = n1 - n0 + 1
+
+        weights = {}
+        vc = {}
+        for key, (plane, m, shape) in layouts.items():
+            if reduce is None:
+                vc[key] = np.empty((nt,) + shape, dtype=np.float32)
+                continue
+            if plane == "spex":
+                raise ValueError(f"reduce is not available for spectra: {key}")
+            if plane in ["xy", "flux"] and self.geometry != "Cartesian":
+                weights[key] = np.sin(self.y)
+            else:
+                weights[key] = np.ones(shape[1])
+            weights[key] = weights[key] / weights[key].sum()
+            vc[key] = np.empty((nt, shape[0]), dtype=np.float64)
+
+        dtype = np.dtype(self.endian + "f4")
+
+        def _reduce(key, vl):
+            # vl is (..., shape[0], shape[1])
+            if reduce is None:
+                return vl
+            if reduce == "mean":
+                return vl.astype(np.float64) @ weights[key]
+            return np.sqrt(vl.astype(np.float64) ** 2 @ weights[key])
+
+        planes = sorted(set(plane for plane, _, _ in layouts.values()))
+
+        def _read_one(n: int):
+            missing = []
+            for plane in planes:
+                try:
+                    f = open(self._get_filepath_on_the_fly(plane, n), "rb")
+                except FileNotFoundError:
+                    missing.append(plane)
+                    continue
+                with f:
+                    for key, (plane_key, m, shape) in layouts.items():
+                        if plane_key != plane:
+                            continue
+                        # each value is a contiguous block in Fortran order
+                        f.seek(m * shape[0] * shape[1] * dtype.itemsize, os.SEEK_SET)
+                        buf = _read_into(f, dtype, shape[0] * shape[1])
+                        vc[key][n - n0] = _reduce(key, buf.reshape(shape, order="F"))
+            return n, missing
+
+        zarr_steps = {plane: [] for plane in planes}
+        if zarr_flag:
+            for plane in planes:
+                zarr_steps[plane] = list(range(n0, n1 + 1))
+        else:
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                futures = [executor.submit(_read_one, n) for n in range(n0, n1 + 1)]
+                for future in as_completed(futures):
+                    n, missing = future.result()
+                    for plane in missing:
+                        zarr_steps[plane].append(n)
+
+        # time steps without binary files are read from the zarr stores
+        for plane in planes:
+            if not zarr_steps[plane]:
+                continue
+            steps = sorted(zarr_steps[plane])
+            zarr_filepath = self._get_filepath_on_the_fly_zarr(plane)
+            if not _zarr_zarrzip_exists(zarr_filepath):
+                raise FileNotFoundError(
+                    f"Binary files or zarr store of vl_{plane} do not exist for time steps {steps}"
+                )
+            keys_plane = [key for key in keys_input if layouts[key][0] == plane]
+            vl = pyR2D2.zarr_util.load_steps(zarr_filepath, steps, names=keys_plane)
+            index = np.array(steps) - n0
+            for key in keys_plane:
+                vc[key][index] = _reduce(key, vl[key])
+
+        return vc
+
+    def _stored_steps(self, plane: str):
+        """
+        Time steps stored in the zarr store of a plane type
+        """
+        zarr_filepath = self._get_filepath_on_the_fly_zarr(plane)
+        if not _zarr_zarrzip_exists(zarr_filepath):
+            return np.empty(0, dtype=np.int64)
+        return pyR2D2.zarr_util.open_zarr_group(zarr_filepath)["n"][:]
+
+    def compress(
+        self,
+        n0: int = 0,
+        n1: int = None,
+        chunk_steps: int = 64,
+        max_workers: int = 1,
+    ):
+        """
+        Compress on the fly analysis data into time-chunked zarr stores
+
+        The data of each plane type are stored in remap/vl/zarr/vl_{plane}.zarr,
+        where plane is 'xy', 'xz', 'flux', or 'spex'. Each store has an (nt, ...)
+        array for each value in self.cl and the time steps in the array "n".
+        Time steps after the last stored one are appended, so the stores can be
+        updated as the calculation proceeds.
+
+        Parameters
+        ----------
+        n0 : int
+            first time step, by default 0
+        n1 : int
+            last time step (inclusive), by default self.nd
+        chunk_steps : int
+            chunk size along time, by default 64
+        max_workers : int
+            Number of workers for parallel reading of files
+        """
+        if n1 is None:
+            n1 = self.nd
+
+        for plane, keys in self._planes().items():
+            zarr_filepath = self._get_filepath_on_the_fly_zarr(plane)
+            if not zarr_filepath.exists() and _zarr_zarrzip_exists(zarr_filepath):
+                print(f"Zipped zarr store {zarr_filepath}.zip cannot be appended.")
+                continue
+
+            n_stored = self._stored_steps(plane)
+            n_start = n0 if len(n_stored) == 0 else max(n0, int(n_stored[-1]) + 1)
+            steps = [
+                n
+                for n in range(n_start, n1 + 1)
+                if self._get_filepath_on_the_fly(plane, n).exists()
+            ]
+            for i in range(0, len(steps), chunk_steps):
+                batch = steps[i : i + chunk_steps]
+                # missing steps are skipped, so only contiguous runs of steps are read
+                runs = np.split(np.array(batch), np.nonzero(np.diff(batch) != 1)[0] + 1)
+                parts = [
+                    self.read_series(
+                        int(run[0]), int(run[-1]), keys=keys, max_workers=max_workers
+                    )
+                    for run in runs
+                ]
+                pyR2D2.zarr_util.append_steps(
+                    zarr_filepath,
+                    batch,
+                    {key: np.concatenate([part[key] for part in parts]) for key in keys},
+                    params={},
+                    chunk_steps=chunk_steps,
+                )
+
+    def check(self, n0: int = 0, n1: int = None):
+        """
+        Check if the on the fly analysis data from n0 to n1 are stored in the zarr stores
+
+        Time steps whose binary files exist are compared with the zarr stores.
+
+        Parameters
+        ----------
+        n0 : int
+            first time step, by default 0
+        n1 : int
+            last time step (inclusive), by default self.nd
+
+        Returns
+        -------
+        bool
+            True if all binary files in the range are stored in the zarr stores
+        """
+        if n1 is None:
+            n1 = self.nd
+
+        for plane, keys in self._planes().items():
+            n_stored = set(self._stored_steps(plane).tolist())
+            steps = [
+                n
+                for n in range(n0, n1 + 1)
+                if self._get_filepath_on_the_fly(plane, n).exists()
+            ]
+            not_stored = [n for n in steps if n not in n_stored]
+            if not_stored:
+                print(
+                    f"Time steps {not_stored} of vl_{plane} are not stored. Please run OnTheFly.compress() to store them."
+                )
+                return False
+
+            if not steps:
+                continue
+            vc_zarr = pyR2D2.zarr_util.load_steps(
+                self._get_filepath_on_the_fly_zarr(plane), steps, names=keys
+            )
+            for m, n in enumerate(steps):
+                vc_bin = self.read_series(n, n, keys=keys)
+                for key in keys:
+                    if not np.array_equal(vc_bin[key][0], vc_zarr[key][m]):
+                        print(f"Data mismatch for {key} at n={n}.")
+                        return False
+
+        print(f"Check passed from n={n0} to n={n1}")
+        return True
 
-    def read(self, n):
+    def delete(self, n0: int = 0, n1: int = None, force: bool = False):
         """
-        Reads on the fly analysis data from fortran.
-        The data is stored in self.vc dictionary
+        Delete binary files of on the fly analysis data stored in the zarr stores
 
         Parameters
         ----------
-        n : int
-            A selected time step for data
+        n0 : int
+            first time step, by default 0
+        n1 : int
+            last time step (inclusive), by default self.nd
+        force : bool
+            If True, delete the files without comparing them with the zarr stores.
+            Files of time steps not stored in the zarr stores are never deleted.
         """
+        if n1 is None:
+            n1 = self.nd
 
-        # read xy plane data
-        with open(self.datadir / "remap" / "vl" / f"vl_xy.dac.{n:08d}", "rb") as f:
-            vl = np.fromfile(
-                f, self.endian + "f", self.m2d_xy * self.ix * self.jx
-            ).reshape((self.ix, self.jx, self.m2d_xy), order="F")
+        if not force and not self.check(n0, n1):
+            return
 
-        for m in range(self.m2d_xy):
-            self.__dict__[self.cl[m]] = vl[:, :, m]
+        for plane in self._planes().keys():
+            for n in self._stored_steps(plane).tolist():
+                if n0 <= n <= n1:
+                    filepath = self._get_filepath_on_the_fly(plane, n)
+                    if filepath.exists():
+                        filepath.unlink()
 
-        # read xz plane data
-        with open(self.datadir / "remap" / "vl" / f"vl_xz.dac.{n:08d}", "rb") as f:
-            vl = np.fromfile(
-                f, self.endian + "f", self.m2d_xz * self.ix * self.kx
-            ).reshape((self.ix, self.kx, self.m2d_xz), order="F")
+    def zip(self, overwrite: bool = False, remove_original: bool = False):
+        """
+        Compress the zarr stores of on the fly analysis data into zip files
 
-        for m in range(self.m2d_xz):
-            self.__dict__[self.cl[m + self.m2d_xy]] = vl[:, :, m]
+        A zipped store cannot be appended by :meth:`pyR2D2.OnTheFly.compress`.
 
-        # read flux related value
-        with open(self.datadir / "remap" / "vl" / f"vl_flux.dac.{n:08d}", "rb") as f:
-            vl = np.fromfile(
-                f, self.endian + "f", self.m2d_flux * (self.ix + 1) * self.jx
-            ).reshape((self.ix + 1, self.jx, self.m2d_flux), order="F")
+        Parameters
+        ----------
+        overwrite : bool
+            If True, overwrite existing zip files.
+        remove_original : bool
+            If True, remove the original .zarr directories after verifying that the zip files are equivalent.
 
-        for m in range(self.m2d_flux):
-            self.__dict__[self.cl[m + self.m2d_xy + self.m2d_xz]] = vl[:, :, m]
+        Returns
+        -------
+        list
+            paths of the zip files
+        """
+        zip_paths = []
+        for plane in self._planes().keys():
+            zip_paths.append(
+                pyR2D2.zarr_util.zip_zarr(
+                    self._get_filepath_on_the_fly_zarr(plane),
+                    overwrite=overwrite,
+                    remove_original=remove_original,
+                )
+            )
+        return zip_paths
 
-        # read spectra
-        if self.geometry == "YinYang":
-            with open(
-                self.datadir / "remap" / "vl" / f"vl_spex.dac.{n:08d}", "rb"
-            ) as f:
-                vl = np.fromfile(
-                    f, self.endian + "f", self.m2d_spex * self.ix * self.kx // 4
-                ).reshape((self.ix, self.kx // 4, self.m2d_spex), order="F")
+    def iter_steps(self, steps, keys=None, prefetch: int = 2):
+        """
+        Iterates over time steps of on the fly analysis data
 
-            for m in range(self.m2d_spex):
-                self.__dict__[
-                    self.cl[m + self.m2d_xy + self.m2d_xz + self.m2d_flux]
-                ] = vl[:, :, m]
+        The following time steps are read in background threads while
+        the caller works on the current one.
+
+        Parameters
+        ----------
+        steps : iterable of int
+            Selected time steps for data
+        keys : str, list, or tuple, optional
+            Values in self.cl to be yielded. By default (None) all values are yielded.
+        prefetch : int
+            Number of time steps read ahead. At most prefetch + 1 time steps are kept in memory
+
+        Yields
+        ------
+        n : int
+            time step
+        vc : dict of numpy.ndarray
+            on the fly analysis data for each key. The arrays are reused after the next iteration.
+        """
+
+        def _read(reader, n):
+            reader.read(n)
+
+        return self._iter_steps(steps, _read, prefetch=prefetch, keys=keys)
 
     def _update_json_template(
         self,
@@ -1558,13 +3007,18 @@ class OnTheFly(_BaseReader):
         update_json=False,
     ):
         """
-        Generate docstring for pyR2D2.Parameters
+        Generate docstring for pyR2D2.OnTheFly
         """
         import json
 
         if update_json:
             self._update_json_template(json_file)
 
+        # the class docstring is extended only once
+        if "_docstring_added" in self.__class__.__dict__:
+            return
+        self.__class__._docstring_added = True
+
         gene_space = ""
         desc_space = " " * 4
 
@@ -1800,6 +3254,46 @@ class Slice(_BaseReader):
             # self.info["slice"] = slice[n_slice]
             # self.info["n_slice"] = n_slice
 
+    def iter_steps(
+        self,
+        n_slice,
+        direc,
+        steps,
+        prefetch: int = 2,
+        zarr_flag: bool = False,
+    ):
+        """
+        Iterates over time steps of 2D data of slice
+
+        The following time steps are read in background threads while
+        the caller works on the current one.
+
+        Parameters
+        ----------
+        n_slice : int
+            index of slice
+        direc : str
+            slice direction. 'x', 'y', or 'z'
+        steps : iterable of int
+            Selected time steps for data
+        prefetch : int
+            Number of time steps read ahead. At most prefetch + 1 time steps are kept in memory
+        zarr_flag : bool
+            If True, read from zarr format instead of binary format. By default, False.
+
+        Yields
+        ------
+        n : int
+            time step
+        qq : dict of numpy.ndarray
+            2D data for each key. The arrays are reused after the next iteration.
+        """
+
+        def _read(reader, n):
+            reader.read(n_slice, direc, n, zarr_flag=zarr_flag)
+
+        return self._iter_steps(steps, _read, prefetch=prefetch)
+
     def compress(
         self,
         n: int,
@@ -1813,6 +3307,8 @@ class Slice(_BaseReader):
         k_size: int = None,
         keys: list = zarr_keys,
         overwrite: bool = False,
+        store: str = "dir",
+        shards3d: tuple = None,
     ):
         """
         Compress 2D slice data into zarr format
@@ -1841,6 +3337,11 @@ class Slice(_BaseReader):
             Keys for the variables to be compressed, by default zarr_keys
         overwrite : bool, optional
             Whether to overwrite the existing zarr file, by default False
+        store : str, optional
+            "dir" for a .zarr directory, or "zip" for a .zarr.zip file written
+            directly without the directory, by default "dir"
+        shards3d : tuple, optional
+            Shard shape to store the chunks in fewer files, by default None (no sharding)
         """
 
         postfixes = self._get_postfixes()
@@ -1850,10 +3351,9 @@ class Slice(_BaseReader):
         else:
             zarr_filepath = Path(zarr_filepath)
 
-        if not overwrite and zarr_filepath.exists():
-            print(
-                f"File {zarr_filepath} already exists. Set overwrite=True to overwrite it."
-            )
+        output = pyR2D2.zarr_util.output_path(zarr_filepath, store)
+        if not overwrite and output.exists():
+            print(f"File {output} already exists. Set overwrite=True to overwrite it.")
             return
 
         if not direc in ["x", "y", "z"]:
@@ -1916,6 +3416,9 @@ class Slice(_BaseReader):
                         (i_size, j_size, len(self.z_slice)), dtype=np.float32
                     )
 
+        if shards3d is not None:
+            chunks3d = pyR2D2.zarr_util.inner_chunks(shards3d, chunks3d)
+
         xyz_slice = self.xyz_slice_select(direc)
         for n_slice in range(len(xyz_slice)):
             self.read(n_slice=n_slice, direc=direc, n=n)
@@ -1935,7 +3438,14 @@ class Slice(_BaseReader):
                         ]
 
         pyR2D2.zarr_util.save(
-            zarr_filepath, vars_dict, params_dict, chunks3d=chunks3d, mode="w"
+            zarr_filepath,
+            vars_dict,
+            params_dict,
+            chunks3d=chunks3d,
+            mode="w",
+            digests=True,
+            store=store,
+            shards3d=shards3d,
         )
 
     def check(
@@ -1947,9 +3457,9 @@ class Slice(_BaseReader):
 
         postfixes = self._get_postfixes()
         zarr_filepath = self._get_filepath_slice_zarr(n, direc)
-        if not zarr_filepath.exists():
+        if not _zarr_zarrzip_exists(zarr_filepath):
             print(
-                f"Zarr file does not exist at n={n} and direc={direc}. Please run Slice.compress() to create it."
+                f"Zarr file does not exist or is incomplete at n={n} and direc={direc}. Please run Slice.compress() to create it."
             )
             return False
 
@@ -1969,6 +3479,13 @@ class Slice(_BaseReader):
                     print(f"File {filepath} does not exist. Anyway you can delete it.")
                     return True
 
+        # the binary files are read only when the digests do not match
+        names = [key + postfix for key in keys for postfix in postfixes]
+        mismatched = pyR2D2.zarr_util.verify(zarr_filepath, names)
+        if all(name in mismatched and not mismatched[name] for name in names):
+            print(f"Check passed at n={n} and direc={direc}.")
+            return True
+
         for n_slice in range(len(xyz_slice)):
             self.read(n_slice=n_slice, direc=direc, n=n, zarr_flag=True)
             qq_copy = {}
@@ -2066,7 +3583,34 @@ class TwoDimension(_BaseReader):
         for key in self.value_keys:
             self.__dict__[key] = None
 
-    def read(self, n):
+    def _get_filepath_two_dimension(self, n: int):
+        return self.datadir / "remap" / "qq" / f"qq.dac.{n:08d}"
+
+    def _get_filepath_two_dimension_zarr(self):
+        return self.datadir / "remap" / "qq" / "zarr" / "qq2d.zarr"
+
+    def _two_dimension_keys(self, keys):
+        """
+        List of keys to be read, out of value_keys[:mtype]
+        """
+        if isinstance(keys, str):
+            if keys == "all":
+                keys_input = self.value_keys[: self.mtype]
+            else:
+                keys_input = [keys]
+        elif isinstance(keys, (list, tuple)):
+            keys_input = list(keys)
+        else:
+            raise TypeError("keys must be str, list, or tuple")
+
+        for key in keys_input:
+            if key not in self.value_keys[: self.mtype]:
+                raise ValueError(
+                    f"key should be one of {self.value_keys[: self.mtype]}, but got {key}"
+                )
+        return keys_input
+
+    def read(self, n, zarr_flag: bool = False):
         """
         Reads full data of 2D calculation
         The data is stored in self.q2 dictionary
@@ -2075,22 +3619,21 @@ class TwoDimension(_BaseReader):
         ----------
         n : int
             A selected time step for data
+        zarr_flag : bool
+            If True, read from the zarr store instead of binary format.
+            If the binary file does not exist, the zarr store is read. By default, False.
         """
 
-        ### Only when memory is not allocated
-        ### and the size of array is different
-        ### memory is allocated
-        memflag = True
-        if self.ro is not None:
-            memflag = self.ro.shape != (self.ix, self.jx)
-        if self.ro is None or memflag:
-            for key in self.value_keys:
-                self.__dict__[key] = np.zeros((self.ix, self.jx))
+        if zarr_flag or not self._get_filepath_two_dimension(n).exists():
+            qq = self.read_series(n, n, zarr_flag=True)
+            for key in qq.keys():
+                self.__dict__[key] = qq[key][0]
+            return
 
         dtype = np.dtype(
             [("qq", self.endian + str((self.mtype + 5) * self.ix * self.jx) + "f")]
         )
-        with open(self.datadir / "remap" / "qq" / f"qq.dac.{n:08d}", "rb") as f:
+        with open(self._get_filepath_two_dimension(n), "rb") as f:
             qq = np.fromfile(f, dtype=dtype, count=1)
 
         for key, m in zip(self.value_keys, range(self.mtype)):
@@ -2098,6 +3641,163 @@ class TwoDimension(_BaseReader):
                 (self.mtype + 5, self.ix, self.jx), order="F"
             )[m, :, :]
 
+    def read_series(
+        self,
+        n0: int,
+        n1: int,
+        keys="all",
+        max_workers: int = 1,
+        zarr_flag: bool = False,
+    ):
+        """
+        Reads full data of 2D calculation from time step n0 to n1
+
+        Time steps without binary file are read from the zarr store
+        written by :meth:`pyR2D2.TwoDimension.compress`.
+
+        Parameters
+        ----------
+        n0 : int
+            first time step
+        n1 : int
+            last time step (inclusive)
+        keys : str or list or tuple, optional
+            Values to be read out of value_keys[:mtype]. If 'all', all values are read. By default 'all'.
+        max_workers : int
+            Number of workers for parallel reading of files
+        zarr_flag : bool
+            If True, read from the zarr store instead of binary format. By default, False.
+
+        Returns
+        -------
+        qq : dict of numpy.ndarray
+            (n1 - n0 + 1, ix, jx) float32 array for each key
+        """
+        keys_input = self._two_dimension_keys(keys)
+        steps = list(range(n0, n1 + 1))
+
+        qq = {}
+        for key in keys_input:
+            qq[key] = np.empty((len(steps), self.ix, self.jx), dtype=np.float32)
+
+        if zarr_flag:
+            binary_steps = []
+        else:
+            binary_steps = [
+                n for n in steps if self._get_filepath_two_dimension(n).exists()
+            ]
+        zarr_steps = sorted(set(steps) - set(binary_steps))
+
+        if zarr_steps:
+            zarr_filepath = self._get_filepath_two_dimension_zarr()
+            if not _zarr_zarrzip_exists(zarr_filepath):
+                raise FileNotFoundError(
+                    f"Binary files or zarr store do not exist for time steps {zarr_steps}"
+                )
+            qq_zarr = pyR2D2.zarr_util.load_steps(
+                zarr_filepath, zarr_steps, names=keys_input
+            )
+            index = np.array(zarr_steps) - n0
+            for key in keys_input:
+                qq[key][index] = qq_zarr[key]
+
+        self._read_binary_steps(
+            [n - n0 for n in binary_steps], binary_steps, qq, max_workers=max_workers
+        )
+
+        return qq
+
+    def _read_binary_steps(self, index, steps, qq, max_workers: int = 1):
+        """
+        Reads binary files of time steps into qq[key][index]
+
+        Parameters
+        ----------
+        index : list of int
+            position of each time step in the first axis of qq[key]
+        steps : list of int
+            time steps
+        qq : dict of numpy.ndarray
+            (nt, ix, jx) output array for each key
+        max_workers : int
+            Number of workers for parallel reading of files
+        """
+
+        def _read_one(m: int, n: int):
+            # each value is strided by mtype + 5 in the file
+            mm = np.memmap(
+                self._get_filepath_two_dimension(n),
+                dtype=self.endian + "f4",
+                mode="r",
+                shape=((self.mtype + 5) * self.ix * self.jx,),
+            ).reshape((self.mtype + 5, self.ix, self.jx), order="F")
+            for key in qq.keys():
+                qq[key][m] = mm[self.value_keys.index(key)]
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = [executor.submit(_read_one, m, n) for m, n in zip(index, steps)]
+            for future in as_completed(futures):
+                future.result()
+
+    def compress(
+        self,
+        n0: int = 0,
+        n1: int = None,
+        keys="all",
+        chunk_steps: int = 16,
+        max_workers: int = 1,
+    ):
+        """
+        Compress full data of 2D calculation into a time-chunked zarr store
+
+        The store remap/qq/zarr/qq2d.zarr has an (nt, ix, jx) array for each key
+        and the time steps in the array "n". Time steps after the last stored one
+        are appended, so the store can be updated as the calculation proceeds.
+
+        Parameters
+        ----------
+        n0 : int
+            first time step, by default 0
+        n1 : int
+            last time step (inclusive), by default self.nd
+        keys : str or list or tuple, optional
+            Values to be stored out of value_keys[:mtype]. If 'all', all values are stored.
+            By default 'all'. Has to be the same as the stored ones when appending.
+        chunk_steps : int
+            chunk size along time, by default 16
+        max_workers : int
+            Number of workers for parallel reading of files
+        """
+        keys_input = self._two_dimension_keys(keys)
+        if n1 is None:
+            n1 = self.nd
+
+        zarr_filepath = self._get_filepath_two_dimension_zarr()
+        if zarr_filepath.exists():
+            n_stored = pyR2D2.zarr_util.open_zarr_group(zarr_filepath)["n"][:]
+            if len(n_stored) > 0:
+                n0 = max(n0, int(n_stored[-1]) + 1)
+
+        steps = [
+            n for n in range(n0, n1 + 1) if self._get_filepath_two_dimension(n).exists()
+        ]
+        for i in range(0, len(steps), chunk_steps):
+            batch = steps[i : i + chunk_steps]
+            qq = {}
+            for key in keys_input:
+                qq[key] = np.empty((len(batch), self.ix, self.jx), dtype=np.float32)
+            self._read_binary_steps(
+                range(len(batch)), batch, qq, max_workers=max_workers
+            )
+            pyR2D2.zarr_util.append_steps(
+                zarr_filepath,
+                batch,
+                qq,
+                static_dict={"x": self.x, "y": self.y},
+                params={},
+                chunk_steps=chunk_steps,
+            )
+
 
 class ModelS(_BaseReader):
     """
@@ -2162,23 +3862,29 @@ class _BasePrevAftr(_BaseReader):
             self.ib_rte_bot = 0
         self.ix_prev_aftr = (self.ix0 - self.ib_rte_bot) * self.nx
 
-    def _allocate_prev_aftr_qq(self, dtype):
+    def _allocate_prev_aftr_qq(self, dtype, keys: list = None):
         """
         Allocate memory for previous and after time step data
 
+        Arrays of the same shape and dtype are reused.
+
         Parameters
         ----------
         dtype : data type
             Data type for allocation
+        keys : list of str, optional
+            Variables to be allocated. By default, all of prev_aftr_kind
         """
-        memflag = True
-        if self.ro is not None:
-            memflag = not self.ro.shape == (self.ix_prev_aftr, self.jx, self.kx)
-        if self.ro is None or memflag:
-            for key in self.prev_aftr_kind:
-                self.__dict__[key] = np.zeros(
-                    (self.ix_prev_aftr, self.jx, self.kx), dtype=dtype
-                )
+        if keys is None:
+            keys = self.prev_aftr_kind
+
+        shape = (self.ix_prev_aftr, self.jx, self.kx)
+        for key in keys:
+            qq = self.__dict__.get(key, None)
+            if not (
+                isinstance(qq, np.ndarray) and qq.shape == shape and qq.dtype == dtype
+            ):
+                self.__dict__[key] = np.empty(shape, dtype=dtype)
 
     def _dtype_prev_aftr_qq(self, kind):
         """
@@ -2290,6 +3996,10 @@ class _BasePrevAftr(_BaseReader):
         n: int,
         n_prev_aftr: int,
         zarr_flag: bool = False,
+        keys="all",
+        dtype=None,
+        max_workers: int = 1,
+        out: dict = None,
     ):
         """
         Core function to read previous and after time step data
@@ -2300,16 +4010,36 @@ class _BasePrevAftr(_BaseReader):
             A selected time step for data
         n_prev_aftr : int
             A selected previous or after time step for data
-        Core function to read previous and after time step data
-
-        Parameters
-        ----------
-        n : int
-            A selected time step for data
-        n_prev_aftr : int
-            A selected previous or after time step for data
+        zarr_flag : bool
+            If True, read from zarr format instead of binary format. By default, False.
+        keys : str or list or tuple, optional
+            Variables to be read. If 'all', all of prev_aftr_kind are read. By default 'all'.
+        dtype : data type, optional
+            Data type of the arrays, e.g., np.float32 to down-cast on read.
+            By default (None), float64 for binary and float32 for zarr as stored.
+        max_workers : int
+            Number of workers for parallel reading of rank files
+        out : dict of numpy.ndarray, optional
+            (ix_prev_aftr, jx, kx) output array for each key. Only for binary format.
+            If given, the data are read into these arrays instead of allocated ones.
         """
 
+        if isinstance(keys, str):
+            if keys == "all":
+                keys_input = self.prev_aftr_kind
+            else:
+                keys_input = [keys]
+        elif isinstance(keys, (list, tuple)):
+            keys_input = list(keys)
+        else:
+            raise TypeError("keys must be str, list, or tuple")
+
+        for key in keys_input:
+            if key not in self.prev_aftr_kind:
+                raise ValueError(
+                    f"key should be one of {self.prev_aftr_kind}, but got {key}"
+                )
+
         for np0 in range(self.npe):
             ib, jb, kb = self.xyz[np0]
             if ib == self.ib_rte_bot:
@@ -2330,10 +4060,15 @@ class _BasePrevAftr(_BaseReader):
                 raise FileNotFoundError(
                     f"zarr or zarr.zip file does not exist: {zarr_filepath}"
                 )
-            qq, params = pyR2D2.zarr_util.load(zarr_filepath, with_attrs=True)
+            qq, params = pyR2D2.zarr_util.load(
+                zarr_filepath, names=keys_input + ["x", "y", "z"], with_attrs=True
+            )
 
-            for key in self.prev_aftr_kind:
-                self.__dict__[key] = qq[key]
+            for key in keys_input:
+                if dtype is None:
+                    self.__dict__[key] = qq[key]
+                else:
+                    self.__dict__[key] = qq[key].astype(dtype, copy=False)
 
             self.x_prev_aftr = qq["x"]
             self.y_prev_aftr = qq["y"]
@@ -2349,37 +4084,49 @@ class _BasePrevAftr(_BaseReader):
             self.y_prev_aftr = self.data.y
             self.z_prev_aftr = self.data.z
 
-            self._allocate_prev_aftr_qq(dtype=np.float64)
-            dtype = self._dtype_prev_aftr_qq(kind="d")
+            if out is None:
+                self._allocate_prev_aftr_qq(
+                    dtype=np.float64 if dtype is None else np.dtype(dtype),
+                    keys=keys_input,
+                )
+            else:
+                shape = (self.ix_prev_aftr, self.jx, self.kx)
+                for key in keys_input:
+                    if key not in out or out[key].shape != shape:
+                        raise ValueError(f"out['{key}'] should be an array of {shape}")
+                    if dtype is not None and out[key].dtype != dtype:
+                        raise ValueError(f"out['{key}'] should be of dtype {dtype}")
+                    self.__dict__[key] = out[key]
 
-            for np0 in range(self.npe):
-                ib, jb, kb = self.xyz[np0]
-                if ib >= self.ib_rte_bot:
-                    ibt = ib - self.ib_rte_bot
+            n_ijk = self.nx * self.ny * self.nz
+            dtype_file = np.dtype(self.endian + "d")
 
-                    filepath = self._get_filepath_prev_aftr_qq(
-                        n, n_prev_aftr, np0, prev_aftr=self.prev_aftr
-                    )
-                    qqq_mem = np.memmap(
-                        filename=filepath,
-                        dtype=dtype,
-                        mode="r",
-                        shape=(1,),
-                    )
-                    qqq = qqq_mem[0]
-                    for key, m in zip(
-                        self.prev_aftr_kind, range(len(self.prev_aftr_kind))
-                    ):
+            def _read_one(np0: int):
+                # In the rank file, each variable is a contiguous block of
+                # nx*ny*nz float64 values in Fortran order
+                ib, jb, kb = self.xyz[np0]
+                ibt = ib - self.ib_rte_bot
+                filepath = self._get_filepath_prev_aftr_qq(
+                    n, n_prev_aftr, np0, prev_aftr=self.prev_aftr
+                )
+                with open(filepath, "rb") as f:
+                    for key in keys_input:
+                        m = self.prev_aftr_kind.index(key)
+                        f.seek(m * n_ijk * dtype_file.itemsize, os.SEEK_SET)
+                        buf = _read_into(f, dtype_file, n_ijk)
                         self.__dict__[key][
                             ibt * self.nx : (ibt + 1) * self.nx,
                             jb * self.ny : (jb + 1) * self.ny,
                             kb * self.nz : (kb + 1) * self.nz,
-                        ] = qqq["qq"].reshape(
-                            (self.nx, self.ny, self.nz, len(self.prev_aftr_kind)),
-                            order="F",
-                        )[
-                            :, :, :, m
-                        ]
+                        ] = buf.reshape((self.nx, self.ny, self.nz), order="F")
+
+            target_nps = [
+                np0 for np0 in range(self.npe) if self.xyz[np0][0] >= self.ib_rte_bot
+            ]
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                futures = [executor.submit(_read_one, np0) for np0 in target_nps]
+                for future in as_completed(futures):
+                    future.result()
 
     def _compress(
         self,
@@ -2393,6 +4140,8 @@ class _BasePrevAftr(_BaseReader):
         k_start: int = None,
         k_size: int = None,
         overwrite: bool = False,
+        store: str = "dir",
+        shards3d: tuple = None,
     ):
         """
         Core function to compress previous and after time step data into zarr format
@@ -2403,6 +4152,11 @@ class _BasePrevAftr(_BaseReader):
             A selected time step for data
         n_prev_aftr : int
             A selected previous or after time step for data
+        store : str, optional
+            "dir" for a .zarr directory, or "zip" for a .zarr.zip file written
+            directly without the directory. By default "dir".
+        shards3d : tuple, optional
+            Shard shape to store the chunks in fewer files. By default None (no sharding).
         """
 
         if zarr_filepath is None:
@@ -2412,10 +4166,11 @@ class _BasePrevAftr(_BaseReader):
         else:
             zarr_filepath = Path(zarr_filepath)
 
-        if not overwrite and zarr_filepath.exists():
+        output = pyR2D2.zarr_util.output_path(zarr_filepath, store)
+        if not overwrite and output.exists():
             print(
                 "zarr file ",
-                zarr_filepath,
+                output,
                 " already exists. Set overwrite=True to overwrite it.",
             )
             return
@@ -2472,7 +4227,9 @@ class _BasePrevAftr(_BaseReader):
             vars_dict["y"] = self.y_prev_aftr[j_start : j_start + j_size]
             vars_dict["z"] = self.z_prev_aftr[k_start : k_start + k_size]
 
-            pyR2D2.zarr_util.save(zarr_filepath, vars_dict, params_dict)
+            pyR2D2.zarr_util.save(
+                zarr_filepath, vars_dict, params_dict, store=store, shards3d=shards3d
+            )
 
     def check(self, n: int, n_prev_aftr: int):
         """
@@ -2489,8 +4246,10 @@ class _BasePrevAftr(_BaseReader):
         zarr_filepath = self._get_filepath_prev_aftr_zarr(
             n, n_prev_aftr, prev_aftr=self.prev_aftr
         )
-        if not zarr_filepath.exists():
-            print(f"Zarr file does not exist at n={n}, {self.prev_aftr}={n_prev_aftr}")
+        if not _zarr_zarrzip_exists(zarr_filepath):
+            print(
+                f"Zarr file does not exist or is incomplete at n={n}, {self.prev_aftr}={n_prev_aftr}"
+            )
             return False
 
         for np0 in range(self.npe):
@@ -2588,7 +4347,16 @@ class Previous(_BasePrevAftr):
 
     prev_aftr = "prev"
 
-    def read(self, n: int, n_prev: int, zarr_flag: bool = False):
+    def read(
+        self,
+        n: int,
+        n_prev: int,
+        zarr_flag: bool = False,
+        keys="all",
+        dtype=None,
+        max_workers: int = 1,
+        out: dict = None,
+    ):
         """
         Reads previous time step data
 
@@ -2598,9 +4366,28 @@ class Previous(_BasePrevAftr):
             A selected time step for data
         n_prev : int
             A selected previous time step for data
+        zarr_flag : bool
+            If True, read from zarr format instead of binary format. By default, False.
+        keys : str or list or tuple, optional
+            Variables to be read. If 'all', all of prev_aftr_kind are read. By default 'all'.
+        dtype : data type, optional
+            Data type of the arrays, e.g., np.float32 to down-cast on read.
+            By default (None), float64 for binary and float32 for zarr as stored.
+        max_workers : int
+            Number of workers for parallel reading of rank files
+        out : dict of numpy.ndarray, optional
+            (ix_prev_aftr, jx, kx) output array for each key. Only for binary format.
         """
 
-        self._read(n, n_prev, zarr_flag=zarr_flag)
+        self._read(
+            n,
+            n_prev,
+            zarr_flag=zarr_flag,
+            keys=keys,
+            dtype=dtype,
+            max_workers=max_workers,
+            out=out,
+        )
 
     def compress(
         self,
@@ -2614,6 +4401,8 @@ class Previous(_BasePrevAftr):
         k_start: int = None,
         k_size: int = None,
         overwrite: bool = False,
+        store: str = "dir",
+        shards3d: tuple = None,
     ):
         """
         Compress previous time step data into zarr format
@@ -2636,6 +4425,11 @@ class Previous(_BasePrevAftr):
             Size in y-direction for compression
         k_start : int, optional
             Starting index in z-direction for compression
+        store : str, optional
+            "dir" for a .zarr directory, or "zip" for a .zarr.zip file written
+            directly without the directory. By default "dir".
+        shards3d : tuple, optional
+            Shard shape to store the chunks in fewer files. By default None (no sharding).
         """
 
         self._compress(
@@ -2649,6 +4443,8 @@ class Previous(_BasePrevAftr):
             k_start=k_start,
             k_size=k_size,
             overwrite=overwrite,
+            store=store,
+            shards3d=shards3d,
         )
 
     def delete(self, n: int, n_prev: int):
@@ -2669,7 +4465,16 @@ class Previous(_BasePrevAftr):
 class After(_BasePrevAftr):
     prev_aftr = "aftr"
 
-    def read(self, n: int, n_aftr: int, zarr_flag: bool = False):
+    def read(
+        self,
+        n: int,
+        n_aftr: int,
+        zarr_flag: bool = False,
+        keys="all",
+        dtype=None,
+        max_workers: int = 1,
+        out: dict = None,
+    ):
         """
         Reads after time step data
 
@@ -2679,9 +4484,28 @@ class After(_BasePrevAftr):
             A selected time step for data
         n_aftr : int
             A selected after time step for data
+        zarr_flag : bool
+            If True, read from zarr format instead of binary format. By default, False.
+        keys : str or list or tuple, optional
+            Variables to be read. If 'all', all of prev_aftr_kind are read. By default 'all'.
+        dtype : data type, optional
+            Data type of the arrays, e.g., np.float32 to down-cast on read.
+            By default (None), float64 for binary and float32 for zarr as stored.
+        max_workers : int
+            Number of workers for parallel reading of rank files
+        out : dict of numpy.ndarray, optional
+            (ix_prev_aftr, jx, kx) output array for each key. Only for binary format.
         """
 
-        self._read(n, n_aftr, zarr_flag=zarr_flag)
+        self._read(
+            n,
+            n_aftr,
+            zarr_flag=zarr_flag,
+            keys=keys,
+            dtype=dtype,
+            max_workers=max_workers,
+            out=out,
+        )
 
     def compress(
         self,
@@ -2695,6 +4519,8 @@ class After(_BasePrevAftr):
         k_start: int = None,
         k_size: int = None,
         overwrite: bool = False,
+        store: str = "dir",
+        shards3d: tuple = None,
     ):
         """
         Compress after time step data into zarr format
@@ -2717,6 +4543,11 @@ class After(_BasePrevAftr):
             Size in y-direction for compression
         k_start : int, optional
             Starting index in z-direction for compression
+        store : str, optional
+            "dir" for a .zarr directory, or "zip" for a .zarr.zip file written
+            directly without the directory. By default "dir".
+        shards3d : tuple, optional
+            Shard shape to store the chunks in fewer files. By default None (no sharding).
         """
 
         self._compress(
@@ -2730,6 +4561,8 @@ class After(_BasePrevAftr):
             k_start=k_start,
             k_size=k_size,
             overwrite=overwrite,
+            store=store,
+            shards3d=shards3d,
         )
 
     def delete(self, n: int, n_aftr: int):
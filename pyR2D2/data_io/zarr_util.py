@@ -1,14 +1,21 @@
+import json
+import os
 import shutil
+import tempfile
 import zipfile
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from pathlib import Path
 
 import numpy as np
 import zarr
 
+# root attribute set after a store has been written completely
+_COMPLETE = "pyR2D2_complete"
 
-def open_zarr_group(path: str, use_zip: bool = False):
-    path = Path(path)
 
+def _open_zarr_group(path: Path, use_zip: bool = False):
     # normal .zarr directory
     if path.is_dir() and not use_zip:
         return zarr.open_group(path, mode="r")
@@ -26,6 +33,288 @@ def open_zarr_group(path: str, use_zip: bool = False):
     raise FileNotFoundError(f"Zarr directory or zip file not found: {path}")
 
 
+def open_zarr_group(path: str, use_zip: bool = False):
+    """
+    Open a zarr group from a .zarr directory or a .zarr.zip file for reading
+
+    Parameters
+    ----------
+    path : str
+        path to the .zarr directory or the .zarr.zip file
+    use_zip : bool, optional
+        If True, path + ".zip" is opened even if the directory exists. By default False.
+
+    Raises
+    ------
+    FileNotFoundError
+        If the store does not exist or it does not have the completion marker,
+        i.e., it may have been left half-written. See :func:`mark_complete`.
+    """
+    path = Path(path)
+    root = _open_zarr_group(path, use_zip=use_zip)
+    if not root.attrs.get(_COMPLETE, False):
+        raise FileNotFoundError(
+            f"Zarr store is incomplete: {path}. "
+            "If it was written completely by an older version, run zarr_util.mark_complete "
+            "or pyR2D2.Data.mark_zarr_complete."
+        )
+    return root
+
+
+def _read_root_metadata(path: Path, use_zip: bool = False):
+    if path.is_dir() and not use_zip:
+        meta = path / "zarr.json"
+        if not meta.is_file():
+            return None
+        return json.loads(meta.read_text())
+
+    zip_path = path if path.suffix == ".zip" else Path(str(path) + ".zip")
+    if not zip_path.is_file():
+        return None
+    try:
+        with zipfile.ZipFile(zip_path, "r") as zf:
+            return json.loads(zf.read("zarr.json"))
+    except (KeyError, zipfile.BadZipFile):
+        return None
+
+
+def is_complete(path: str, use_zip: bool = False):
+    """
+    True if the .zarr directory (or else the .zarr.zip file) has the completion marker
+
+    Only the root metadata is read.
+
+    Parameters
+    ----------
+    path : str
+        path to the .zarr directory or the .zarr.zip file
+    use_zip : bool, optional
+        If True, path + ".zip" is checked even if the directory exists. By default False.
+    """
+    meta = _read_root_metadata(Path(path), use_zip=use_zip)
+    if meta is None:
+        return False
+    return bool(meta.get("attributes", {}).get(_COMPLETE, False))
+
+
+def mark_complete(path: str):
+    """
+    Set the completion marker of a store written completely by an older version
+
+    Stores without the marker are rejected by the readers. Only mark stores
+    known to be complete, since a half-written store cannot be told apart.
+
+    For a .zarr.zip file, the new root metadata is appended and the old zarr.json
+    entry is dropped from the central directory, so the chunk entries are not copied
+    and every name stays unique. The central directory is rewritten in place and
+    restored if the append fails.
+
+    Parameters
+    ----------
+    path : str
+        path to the .zarr directory or the .zarr.zip file
+    """
+    path = Path(path)
+    if path.is_dir():
+        root = zarr.open_group(path, mode="r+")
+        root.attrs[_COMPLETE] = True
+        return
+
+    zip_path = path if path.suffix == ".zip" else Path(str(path) + ".zip")
+    if not zip_path.is_file():
+        raise FileNotFoundError(f"Zarr directory or zip file not found: {path}")
+
+    with zipfile.ZipFile(zip_path, "r") as zf:
+        meta = json.loads(zf.read("zarr.json"))
+        start_dir = zf.start_dir
+    meta.setdefault("attributes", {})[_COMPLETE] = True
+
+    # the central directory at the end is overwritten by the new entry
+    with open(zip_path, "rb") as f:
+        f.seek(start_dir)
+        tail = f.read()
+    try:
+        with zipfile.ZipFile(zip_path, "a", allowZip64=True) as zf:
+            # the old entry is left as unreferenced bytes before the new one
+            for info in [info for info in zf.filelist if info.filename == "zarr.json"]:
+                zf.filelist.remove(info)
+            del zf.NameToInfo["zarr.json"]
+            zf.writestr("zarr.json", json.dumps(meta, indent=2))
+    except BaseException:
+        with open(zip_path, "r+b") as f:
+            f.seek(start_dir)
+            f.write(tail)
+            f.truncate()
+        raise
+
+
+def mark_complete_tree(path: str):
+    """
+    Set the completion marker of all the stores below a directory
+
+    Used to migrate stores written by an older version. The .zarr directories and
+    .zarr.zip files below path without the marker are marked with :func:`mark_complete`.
+    Temporary stores of interrupted writes (.*.tmp) are skipped.
+    Only use it for stores known to be complete.
+
+    Parameters
+    ----------
+    path : str
+        directory to be searched recursively
+
+    Returns
+    -------
+    list of Path
+        stores newly marked
+    """
+    marked = []
+    for dirpath, dirnames, filenames in os.walk(path):
+        dirpath = Path(dirpath)
+        for name in list(dirnames):
+            if name.startswith(".") and name.endswith(".tmp"):
+                dirnames.remove(name)
+            elif name.endswith(".zarr"):
+                # a store is not searched further
+                dirnames.remove(name)
+                if not is_complete(dirpath / name):
+                    mark_complete(dirpath / name)
+                    marked.append(dirpath / name)
+        for name in filenames:
+            if name.endswith(".zarr.zip") and not is_complete(dirpath / name):
+                mark_complete(dirpath / name)
+                marked.append(dirpath / name)
+    return sorted(marked)
+
+
+@contextmanager
+def atomic_store(path: str, params: dict = None):
+    """
+    Context manager to build a zarr store in a temporary sibling directory
+
+    On success, the completion marker is set and the temporary directory is
+    renamed to path, replacing an existing store. On failure, it is removed,
+    so a killed job never leaves a half-written store at path.
+
+    Parameters
+    ----------
+    path : str
+        final path of the .zarr directory
+    params : dict, optional
+        additional parameters to save, by default None
+
+    Yields
+    ------
+    zarr.Group
+        root group in the temporary directory to be written
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = Path(tempfile.mkdtemp(prefix=f".{path.name}.", suffix=".tmp", dir=path.parent))
+    try:
+        attributes = {} if params is None else {"params": params}
+        root = zarr.create_group(tmp, attributes=attributes, overwrite=True)
+        yield root
+        root.attrs[_COMPLETE] = True
+        if path.exists():
+            # directories cannot be replaced atomically, so the old one is moved away first
+            old = Path(
+                tempfile.mkdtemp(prefix=f".{path.name}.", suffix=".old", dir=path.parent)
+            )
+            os.replace(path, old)
+            os.replace(tmp, path)
+            shutil.rmtree(old)
+        else:
+            os.replace(tmp, path)
+    finally:
+        if tmp.exists():
+            shutil.rmtree(tmp)
+
+
+@contextmanager
+def zip_store(path: str, params: dict = None):
+    """
+    Context manager to write a .zarr.zip file directly without the .zarr directory
+
+    Chunks are written straight into a zarr.storage.ZipStore (ZIP_STORED) on a
+    temporary sibling file, which replaces path on success.
+    Entries of a zip file cannot be replaced, so the metadata of the root group
+    including the completion marker is written once at the beginning.
+    The temporary file is not a valid zip file until it is closed, so the marker
+    is never seen in a half-written store.
+
+    Parameters
+    ----------
+    path : str
+        final path of the .zarr.zip file
+    params : dict, optional
+        additional parameters to save, by default None
+
+    Yields
+    ------
+    zarr.Group
+        root group to be written. Its attributes cannot be changed.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with _atomic_file(path) as tmp:
+        store = zarr.storage.ZipStore(tmp, mode="w")
+        try:
+            attributes = {_COMPLETE: True}
+            if params is not None:
+                attributes["params"] = params
+            yield zarr.create_group(store=store, attributes=attributes)
+        finally:
+            store.close()
+
+
+def store_writer(path: str, params: dict = None, store: str = "dir"):
+    """
+    Context manager to write a zarr store atomically
+
+    Parameters
+    ----------
+    path : str
+        path of the .zarr directory
+    params : dict, optional
+        additional parameters to save, by default None
+    store : str, optional
+        "dir" to write the .zarr directory with :func:`atomic_store`, or
+        "zip" to write path + ".zip" directly with :func:`zip_store`. By default "dir".
+
+    Returns
+    -------
+    contextmanager yielding the root zarr.Group
+    """
+    if store == "dir":
+        return atomic_store(path, params=params)
+    if store == "zip":
+        return zip_store(Path(str(path) + ".zip"), params=params)
+    raise ValueError(f"Invalid store: {store}. Must be 'dir' or 'zip'.")
+
+
+def output_path(path: str, store: str = "dir"):
+    """
+    Path of the .zarr directory or the .zarr.zip file written by :func:`store_writer`
+    """
+    return Path(path) if store == "dir" else Path(str(path) + ".zip")
+
+
+@contextmanager
+def _atomic_file(path: Path):
+    """
+    Context manager to write a file in a temporary sibling and replace path with it
+    """
+    fd, tmp = tempfile.mkstemp(prefix=f".{path.name}.", suffix=".tmp", dir=path.parent)
+    os.close(fd)
+    tmp = Path(tmp)
+    try:
+        yield tmp
+        os.replace(tmp, path)
+    finally:
+        if tmp.exists():
+            tmp.unlink()
+
+
 def _check_zarr_zip_equivalent(path, zip_path):
     root_org = open_zarr_group(path)
     root_zip = open_zarr_group(zip_path)
@@ -89,10 +378,12 @@ def zip_zarr(
     else:
         zip_path = Path(zip_path)
 
+    if not is_complete(path):
+        print(f"Warning: Zarr directory is incomplete: {path}")
+        return None
+
     if zip_path.exists():
-        if overwrite:
-            zip_path.unlink()
-        else:
+        if not overwrite:
             if remove_original:
                 _check_zarr_zip_equivalent(path, zip_path)
                 shutil.rmtree(path)
@@ -103,15 +394,17 @@ def zip_zarr(
 
     zip_path.parent.mkdir(parents=True, exist_ok=True)
 
-    with zipfile.ZipFile(
-        zip_path,
-        mode="w",
-        compression=zipfile.ZIP_STORED,
-        allowZip64=True,
-    ) as zf:
-        for f in path.rglob("*"):
-            if f.is_file():
-                zf.write(f, arcname=f.relative_to(path))
+    # the zip file is written to a temporary sibling and renamed when finished
+    with _atomic_file(zip_path) as tmp:
+        with zipfile.ZipFile(
+            tmp,
+            mode="w",
+            compression=zipfile.ZIP_STORED,
+            allowZip64=True,
+        ) as zf:
+            for f in path.rglob("*"):
+                if f.is_file():
+                    zf.write(f, arcname=f.relative_to(path))
 
     if remove_original:
         _check_zarr_zip_equivalent(path, zip_path)
@@ -137,6 +430,15 @@ def _check_chunks(chunks, shape_len):
             raise ValueError(f"Invalid chunk size {chunk}")
 
 
+def _codec_f32(clevel: int = 5):
+    return zarr.codecs.BloscCodec(
+        cname="zstd",
+        clevel=clevel,
+        shuffle=zarr.codecs.BloscShuffle.bitshuffle,
+        typesize=4,
+    )
+
+
 def save(
     path: str,
     vars_dict: dict,
@@ -147,18 +449,23 @@ def save(
     chunks3d: tuple = None,
     clevel: int = 5,
     mode: str = "w",
+    digests: bool = False,
+    store: str = "dir",
+    shards2d: tuple = None,
+    shards3d: tuple = None,
 ):
     """
 
 
     Parameters
     ----------
-    path : str
-        path to save zarr data
+    path : str or zarr.Group
+        path to save zarr data, or a root group yielded by :func:`store_writer`
     vars_dict : dict
         dictionary of variables to save
     params : dict, optional
-        additional parameters to save, by default None
+        additional parameters to save, by default None.
+        For a root group, they have to be given to :func:`store_writer` instead.
     max_chunk_size : int, optional
         maximum chunk size for zarr arrays, by default 512
     chunks1d : tuple, optional
@@ -170,72 +477,362 @@ def save(
     clevel : int, optional
         compression level for zarr, by default 5
     mode : str, optional
-        file mode for zarr (e.g., "w" for write, "a" for append), by default "w"
+        file mode for zarr (e.g., "w" for write, "a" for append), by default "w".
+        With "w", the store is built in a temporary sibling and renamed when
+        finished. See :func:`atomic_store`. With "a", the arrays are written in place.
+    digests : bool, optional
+        If True, per-chunk digests are recorded in the attributes of each array.
+        See :func:`verify`. By default False.
+    store : str, optional
+        With mode "w", "dir" writes the .zarr directory and "zip" writes
+        path + ".zip" directly. See :func:`store_writer`. By default "dir".
+    shards2d : tuple, optional
+        shard shape for 2D arrays, by default None (no sharding).
+        The chunks are stored as sub-chunks in one object per shard, and each
+        sub-chunk can still be read separately. The shard shape has to be
+        a multiple of the chunk size.
+    shards3d : tuple, optional
+        shard shape for 3D arrays, by default None (no sharding). See shards2d.
 
     Raises
     ------
     ValueError
         If an array with unsupported dimensions is encountered.
     """
-    root = zarr.open_group(path, mode=mode)
-
-    codec_f32 = zarr.codecs.BloscCodec(
-        cname="zstd",
+    kwargs = dict(
+        max_chunk_size=max_chunk_size,
+        chunks1d=chunks1d,
+        chunks2d=chunks2d,
+        chunks3d=chunks3d,
         clevel=clevel,
-        shuffle=zarr.codecs.BloscShuffle.bitshuffle,
-        typesize=4,
+        digests=digests,
+        shards2d=shards2d,
+        shards3d=shards3d,
     )
 
+    created = False
+    if isinstance(path, zarr.Group):
+        root = path
+    elif mode == "w":
+        with store_writer(path, params=params, store=store) as root:
+            save(root, vars_dict, **kwargs)
+        return
+    else:
+        created = not Path(path).exists()
+        root = zarr.open_group(path, mode=mode)
+
     if params is not None:
         root.attrs["params"] = params
 
+    codec_f32 = _codec_f32(clevel)
+    chunks_ndim = {1: chunks1d, 2: chunks2d, 3: chunks3d}
+    shards_ndim = {1: None, 2: shards2d, 3: shards3d}
+
     for name, array in vars_dict.items():
         array = np.asarray(array, dtype=np.float32, order="C")
-        if array.ndim == 3:
-            if chunks3d is None:
-                chunks = tuple(min(max_chunk_size, array.shape[i]) for i in range(3))
-            else:
-                _check_chunks(chunks3d, 3)
-                chunks = chunks3d
-            root.create_array(
-                name,
-                data=array,
-                chunks=chunks,
-                compressors=codec_f32,
-                overwrite=True,
-            )
-        elif array.ndim == 2:
-            if chunks2d is None:
-                chunks = tuple(min(max_chunk_size, array.shape[i]) for i in range(2))
-            else:
-                _check_chunks(chunks2d, 2)
-                chunks = chunks2d
-            root.create_array(
-                name,
-                data=array,
-                chunks=chunks,
-                compressors=codec_f32,
-                overwrite=True,
+        if array.ndim not in chunks_ndim:
+            raise ValueError(
+                f"Unsupported array dimension: {array.ndim} for variable {name}"
             )
-        elif array.ndim == 1:
-            if chunks1d is None:
-                chunks = (min(max_chunk_size, array.shape[0]),)
+        shards = shards_ndim[array.ndim]
+        _check_chunks(shards, array.ndim)
+        chunks = chunks_ndim[array.ndim]
+        if chunks is None:
+            if shards is None:
+                chunks = tuple(min(max_chunk_size, size) for size in array.shape)
             else:
-                _check_chunks(chunks1d, 1)
-                chunks = chunks1d
-            root.create_array(
-                name,
-                data=array,
-                chunks=chunks,
-                compressors=codec_f32,
-                overwrite=True,
-            )
+                chunks = inner_chunks(shards, [max_chunk_size] * array.ndim)
         else:
+            _check_chunks(chunks, array.ndim)
+            check_shards(shards, chunks)
+
+        # the attributes are given at creation, because metadata in a zip file
+        # cannot be rewritten
+        attributes = {}
+        if digests:
+            attributes["digests"] = block_digests(array, chunks)
+        root.create_array(
+            name,
+            data=array,
+            chunks=chunks,
+            shards=shards,
+            compressors=codec_f32,
+            attributes=attributes,
+            overwrite=name in root,
+        )
+
+    # a new store written by a single call is complete
+    if created:
+        root.attrs[_COMPLETE] = True
+
+
+def _chunk_slices(shape, chunks):
+    """
+    Yields the key, e.g. "0.1.0", and the slices of each chunk
+    """
+    grid = [-(-size // chunk) for size, chunk in zip(shape, chunks)]
+    for index in np.ndindex(*grid):
+        key = ".".join(str(i) for i in index)
+        slices = tuple(
+            slice(i * chunk, min((i + 1) * chunk, size))
+            for i, chunk, size in zip(index, chunks, shape)
+        )
+        yield key, slices
+
+
+def inner_chunks(shards: tuple, chunks: tuple, min_fraction: float = 0.5):
+    """
+    Largest chunk size not exceeding chunks that divides the shard shape
+
+    Parameters
+    ----------
+    shards : tuple
+        shard shape
+    chunks : tuple
+        maximum chunk size
+    min_fraction : float, optional
+        minimum ratio of the chunk size to the requested one (or to the shard
+        shape if it is smaller), by default 0.5
+
+    Returns
+    -------
+    tuple
+        chunk size to be used with the shards
+
+    Raises
+    ------
+    ValueError
+        If the chunk size would be smaller than min_fraction of the requested one,
+        e.g., for a prime shard shape, which would produce tiny chunks.
+    """
+    result = []
+    for shard, chunk in zip(shards, chunks):
+        target = min(chunk, shard)
+        inner = max(c for c in range(1, target + 1) if shard % c == 0)
+        if inner < min_fraction * target:
             raise ValueError(
-                f"Unsupported array dimension: {array.ndim} for variable {name}"
+                f"Shard size {shard} has no divisor close to the chunk size {chunk} "
+                f"(largest is {inner}). Use a shard shape that is a multiple of the chunk size."
+            )
+        result.append(inner)
+    return tuple(result)
+
+
+def check_shards(shards: tuple, chunks: tuple):
+    """
+    Check that the chunk size divides the shard shape
+
+    Parameters
+    ----------
+    shards : tuple
+        shard shape. Nothing is checked if None.
+    chunks : tuple
+        chunk size
+
+    Raises
+    ------
+    ValueError
+        If a shard size is not a multiple of the chunk size
+    """
+    if shards is None:
+        return
+    for shard, chunk in zip(shards, chunks):
+        if shard % chunk != 0:
+            raise ValueError(
+                f"Shard shape {tuple(shards)} must be a multiple of the chunk size {tuple(chunks)}"
             )
 
 
+def chunk_digest(block: np.ndarray):
+    """
+    Digest of a chunk: CRC32 of the little-endian float32 bytes and summary statistics
+
+    Parameters
+    ----------
+    block : numpy.ndarray
+        data of the chunk
+
+    Returns
+    -------
+    dict
+        "crc32", "min", "max" and "mean" of the chunk
+    """
+    block = np.ascontiguousarray(block, dtype="<f4")
+    return {
+        "crc32": zlib.crc32(block),
+        "min": float(block.min()),
+        "max": float(block.max()),
+        "mean": float(block.mean(dtype=np.float64)),
+    }
+
+
+def block_digests(block: np.ndarray, chunks: tuple, start: tuple = None):
+    """
+    Digests of the chunks in a block aligned to the chunks
+
+    Parameters
+    ----------
+    block : numpy.ndarray
+        data of the block
+    chunks : tuple
+        chunk size
+    start : tuple, optional
+        start index of the block in the array, by default None (the origin)
+
+    Returns
+    -------
+    dict
+        :func:`chunk_digest` of each chunk key, e.g. "0.1.0"
+    """
+    if start is None:
+        start = (0,) * block.ndim
+    offset = [s // c for s, c in zip(start, chunks)]
+
+    digests = {}
+    for key, slices in _chunk_slices(block.shape, chunks):
+        index = [int(i) + o for i, o in zip(key.split("."), offset)]
+        digests[".".join(str(i) for i in index)] = chunk_digest(block[slices])
+    return digests
+
+
+def set_digests(array, digests: dict):
+    """
+    Records per-chunk digests in the attributes of a zarr array
+
+    Parameters
+    ----------
+    array : zarr.Array
+        array written
+    digests : dict
+        :func:`chunk_digest` of each chunk key, e.g. "0.1.0"
+
+    Raises
+    ------
+    ValueError
+        If the array is in a zip store, whose metadata cannot be rewritten.
+        Pass the digests to :func:`create_arrays` instead.
+    """
+    if isinstance(array.store, zarr.storage.ZipStore):
+        raise ValueError(
+            "Metadata in a zip store cannot be rewritten. Pass the digests to create_arrays."
+        )
+    array.attrs["digests"] = digests
+
+
+def verify(path: str, names="all", use_zip: bool = False, max_workers: int = 1):
+    """
+    Verify arrays against the per-chunk digests recorded when they were written
+
+    Each chunk is read once and its CRC32 is compared with the recorded one.
+
+    Parameters
+    ----------
+    path : str
+        path to zarr data
+    names : list of str or "all", optional
+        arrays to be verified, by default "all"
+    use_zip : bool, optional
+        whether to read from zip file, by default False
+    max_workers : int, optional
+        number of threads reading chunks, by default 1
+
+    Returns
+    -------
+    dict
+        (key, slices) of the mismatched chunks for each array.
+        Arrays without digests are not included.
+    """
+    root = open_zarr_group(path, use_zip=use_zip)
+    if names == "all":
+        names = list(root.array_keys())
+
+    tasks = []
+    for name in names:
+        arr = root[name]
+        digests = arr.attrs.get("digests")
+        if digests is None:
+            continue
+        for key, slices in _chunk_slices(arr.shape, arr.chunks):
+            tasks.append((name, key, slices, digests.get(key)))
+
+    def _verify_one(task):
+        name, key, slices, digest = task
+        if digest is None:
+            return False
+        try:
+            block = np.ascontiguousarray(root[name][slices], dtype="<f4")
+        except Exception:
+            # a corrupted chunk cannot be decompressed
+            return False
+        return zlib.crc32(block) == digest["crc32"]
+
+    mismatched = {
+        name: [] for name in names if root[name].attrs.get("digests") is not None
+    }
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for task, ok in zip(tasks, executor.map(_verify_one, tasks)):
+            if not ok:
+                mismatched[task[0]].append((task[1], task[2]))
+    return mismatched
+
+
+def create_arrays(
+    path: str,
+    shapes: dict,
+    chunks: tuple,
+    clevel: int = 5,
+    shards: tuple = None,
+    attributes: dict = None,
+):
+    """
+    Create empty float32 arrays to be filled region by region
+
+    Parameters
+    ----------
+    path : str or zarr.Group
+        path to zarr data, or a root group yielded by :func:`store_writer`. The group has to exist.
+    shapes : dict
+        shape of each array
+    chunks : tuple
+        chunk size of the arrays
+    clevel : int, optional
+        compression level for zarr, by default 5
+    shards : tuple, optional
+        shard shape, by default None (no sharding)
+    attributes : dict, optional
+        attributes of each name, e.g. {"digests": ...}, written with the metadata.
+        In a zip store, the metadata cannot be rewritten later. By default None.
+
+    Returns
+    -------
+    dict
+        zarr.Array of each name. Regions covering whole chunks (whole shards
+        if sharded) can be written from different threads in parallel.
+    """
+    if isinstance(path, zarr.Group):
+        root = path
+    else:
+        root = zarr.open_group(path, mode="a")
+    codec_f32 = _codec_f32(clevel)
+
+    arrays = {}
+    for name, shape in shapes.items():
+        _check_chunks(chunks, len(shape))
+        _check_chunks(shards, len(shape))
+        arrays[name] = root.create_array(
+            name,
+            shape=shape,
+            dtype=np.float32,
+            chunks=chunks,
+            shards=shards,
+            compressors=codec_f32,
+            attributes=None if attributes is None else attributes.get(name),
+            # entries of a zip file cannot be deleted
+            overwrite=not isinstance(root.store, zarr.storage.ZipStore),
+        )
+    return arrays
+
+
 def load(
     path: str,
     names="all",
@@ -247,6 +844,7 @@ def load(
     k0: int = None,
     k1: int = None,
     use_zip: bool = False,
+    i_index: list = None,
 ):
     """
     Load zarr data
@@ -264,6 +862,9 @@ def load(
         Index ranges for slicing the arrays. If None, the full range is used.
     use_zip : bool, optional
         If True, load from a .zarr.zip file instead of a directory. By default, False.
+    i_index : list of int, optional
+        Indices in the i direction selected instead of the i0:i1 range.
+        Each chunk overlapping the indices is read only once. By default, None.
     Returns
     -------
     dict
@@ -313,7 +914,12 @@ def load(
         if name in ["x", "y", "z"]:
             data[name] = root[name]
         else:
-            if root[name].ndim == 3:
+            if i_index is not None:
+                if root[name].ndim == 3:
+                    data[name] = root[name].oindex[i_index, j0:j1, k0:k1]
+                elif root[name].ndim == 2:
+                    data[name] = root[name].oindex[i_index, j0:j1]
+            elif root[name].ndim == 3:
                 data[name] = root[name][i0:i1, j0:j1, k0:k1]
             elif root[name].ndim == 2:
                 data[name] = root[name][i0:i1, j0:j1]
@@ -325,6 +931,150 @@ def load(
     return data
 
 
+def append_steps(
+    path: str,
+    steps,
+    vars_dict: dict,
+    static_dict: dict = None,
+    params: dict = None,
+    chunk_steps: int = 16,
+    max_chunk_size: int = 512,
+    clevel: int = 5,
+):
+    """
+    Append time steps to a time-chunked zarr store
+
+    Each variable is stored as an (nt, ...) array chunked along time, and the
+    time steps are stored in the array "n". "n" is written last, so steps
+    whose data were only partly written by an interrupted append are
+    discarded by the next append and ignored by load_steps.
+
+    Parameters
+    ----------
+    path : str
+        path to zarr data
+    steps : list of int
+        time steps to be appended. They must be larger than the stored ones.
+    vars_dict : dict
+        (len(steps), ...) array of each variable
+    static_dict : dict, optional
+        variables without time axis, e.g., coordinates, written only when the store is created
+    params : dict, optional
+        additional parameters to save, written only when the store is created
+    chunk_steps : int, optional
+        chunk size along time, by default 16
+    max_chunk_size : int, optional
+        maximum chunk size in the other directions, by default 512
+    clevel : int, optional
+        compression level for zarr, by default 5
+
+    Raises
+    ------
+    ValueError
+        If the steps are not larger than the stored ones or the variables do not
+        match the stored ones.
+    """
+    steps = np.asarray(steps, dtype=np.int64)
+    codec_f32 = _codec_f32(clevel)
+
+    if not Path(path).exists():
+        # the empty store is created in a temporary sibling. See atomic_store
+        with atomic_store(path, params=params) as root:
+            if static_dict is not None:
+                save(root, static_dict, clevel=clevel)
+            for name, array in vars_dict.items():
+                shape = np.shape(array)[1:]
+                root.create_array(
+                    name,
+                    shape=(0,) + shape,
+                    dtype=np.float32,
+                    chunks=(chunk_steps,)
+                    + tuple(min(max_chunk_size, s) for s in shape),
+                    compressors=codec_f32,
+                )
+            root.create_array("n", shape=(0,), dtype=np.int64, chunks=(4096,))
+
+    root = zarr.open_group(path, mode="a")
+    n_stored = root["n"][:]
+    if len(n_stored) > 0 and len(steps) > 0 and steps[0] <= n_stored[-1]:
+        raise ValueError(
+            f"Steps to be appended ({steps[0]}) must be larger than the stored ones ({n_stored[-1]})"
+        )
+    if np.any(np.diff(steps) <= 0):
+        raise ValueError("Steps must be in increasing order")
+
+    for name, array in vars_dict.items():
+        if name not in root:
+            raise ValueError(f"Variable {name} does not exist in {path}")
+        array = np.asarray(array, dtype=np.float32, order="C")
+        if array.shape != (len(steps),) + root[name].shape[1:]:
+            raise ValueError(
+                f"Shape {array.shape} of {name} does not match {root[name].shape[1:]} in {path}"
+            )
+        # discard steps of an interrupted append
+        if root[name].shape[0] != len(n_stored):
+            root[name].resize((len(n_stored),) + root[name].shape[1:])
+        root[name].append(array, axis=0)
+
+    root["n"].append(steps)
+
+
+def load_steps(path: str, steps, names="all", use_zip: bool = False):
+    """
+    Load time steps from a time-chunked zarr store written by append_steps
+
+    Parameters
+    ----------
+    path : str
+        path to zarr data
+    steps : list of int
+        time steps to be loaded
+    names : str or list of str
+        Variable name(s) to load. If "all", all variables with time axis are loaded.
+    use_zip : bool, optional
+        If True, load from a .zarr.zip file instead of a directory. By default, False.
+
+    Returns
+    -------
+    dict
+        (len(steps), ...) array of each variable
+
+    Raises
+    ------
+    FileNotFoundError
+        If a time step is not stored
+    """
+    root = open_zarr_group(path, use_zip=use_zip)
+    n_stored = root["n"][:]
+
+    steps = np.asarray(steps, dtype=np.int64)
+    if len(n_stored) == 0:
+        if len(steps) > 0:
+            raise FileNotFoundError(f"No steps are stored in {path}")
+        index = np.zeros(0, dtype=np.int64)
+    else:
+        index = np.searchsorted(n_stored, steps)
+        index = np.minimum(index, len(n_stored) - 1)
+        missing = steps[n_stored[index] != steps]
+        if len(missing) > 0:
+            raise FileNotFoundError(f"Steps {missing.tolist()} are not stored in {path}")
+
+    if isinstance(names, str):
+        if names == "all":
+            names = [
+                name
+                for name in root.array_keys()
+                if name != "n" and root[name].shape[:1] == root["n"].shape
+            ]
+        else:
+            names = [names]
+
+    data = {}
+    for name in names:
+        data[name] = root[name].oindex[(index,) + (slice(None),) * (root[name].ndim - 1)]
+    return data
+
+
 def list_vars(path: str, use_zip: bool = False):
     """
     List variables in zarr data
@@ -0,0 +1,75 @@
+import shutil
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+import pyR2D2
+
+TESTS_DIR = Path(__file__).resolve().parent
+
+
+def copy_run(dst):
+    """Copy the test run (data/ and input_data/) below dst and return its datadir."""
+    dst = Path(dst)
+    shutil.copytree(TESTS_DIR / "data", dst / "data")
+    shutil.copytree(TESTS_DIR / "input_data", dst / "input_data")
+    return dst / "data"
+
+
+def write_remap_qq(d, n, seed=0):
+    """Write synthetic remap/qq/ rank files at time step n.
+
+    The rank files are cut out from random full 3D arrays, which are returned
+    as a dict keyed by remap_keys + remap_keys_add for comparison.
+    """
+    rng = np.random.default_rng(seed)
+    keys = d.remap_keys + d.remap_keys_add
+    full = {
+        key: rng.standard_normal((d.ix, d.jx, d.kx), dtype=np.float32) for key in keys
+    }
+
+    for np0 in range(d.npe):
+        if d.iixl[np0] * d.jjxl[np0] == 0:
+            continue
+        i0, i1 = d.iss[np0], d.iee[np0] + 1
+        j0, j1 = d.jss[np0], d.jee[np0] + 1
+        filepath = (
+            d.datadir
+            / "remap"
+            / "qq"
+            / f"{np0//1000:05d}"
+            / f"{np0:08d}"
+            / f"qq.dac.{n:08d}.{np0:08d}"
+        )
+        filepath.parent.mkdir(parents=True, exist_ok=True)
+        with open(filepath, "wb") as f:
+            for key in keys:
+                block = full[key][i0:i1, j0:j1, :].astype(d.endian + "f4")
+                f.write(block.tobytes(order="F"))
+
+    return full
+
+
+@pytest.fixture(scope="session", autouse=True)
+def cache_dir(tmp_path_factory):
+    """Keep the parameter cache files of the tests out of the user cache directory."""
+    path = tmp_path_factory.mktemp("cache")
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setenv("PYR2D2_CACHE_DIR", str(path))
+        yield path
+
+
+@pytest.fixture(scope="session")
+def remap_run(tmp_path_factory):
+    """A test run with remap/qq/ rank files at time steps 0 and 1."""
+    datadir = copy_run(tmp_path_factory.mktemp("remap_run"))
+    d = pyR2D2.Data(datadir)
+    expected = {n: write_remap_qq(d, n, seed=n) for n in [0, 1]}
+    return datadir, expected
+
+
+@pytest.fixture
+def run(tmp_path):
+    """A fresh copy of the test run without any output data."""
+    return copy_run(tmp_path)
@@ -0,0 +1,326 @@
+import os
+
+import numpy as np
+import pytest
+
+import pyR2D2
+from pyR2D2.data_io import parameters
+
+
+def _assert_same_parameters(p1, p2):
+    assert list(p1.__dict__) == list(p2.__dict__)
+    for key, value in p1.__dict__.items():
+        if key in ("data", "_cache_path"):
+            continue
+        other = p2.__dict__[key]
+        assert type(value) is type(other), key
+        if isinstance(value, np.ndarray):
+            assert value.dtype == other.dtype, key
+            np.testing.assert_array_equal(value, other)
+        else:
+            assert value == other, key
+
+
+# ---------------------------------------------------------------------------
+# parameter cache
+# ---------------------------------------------------------------------------
+
+
+def test_parameters_cache_roundtrip(run, monkeypatch):
+    cache = parameters.cache_path(run)
+    d0 = pyR2D2.Data(run, cache=False)
+    assert not cache.exists()
+
+    d1 = pyR2D2.Data(run)
+    assert cache.exists()
+    assert not (run / cache.name).exists()
+    _assert_same_parameters(d0.p, d1.p)
+
+    def _fail(self):
+        raise AssertionError("source files should not be read")
+
+    monkeypatch.setattr(parameters.Parameters, "_read_sources", _fail)
+    d2 = pyR2D2.Data(run)
+    _assert_same_parameters(d0.p, d2.p)
+
+
+def test_parameters_cache_in_given_directory(run):
+    pyR2D2.Data(run, cache=run)
+    assert parameters.cache_path(run, cache_dir=run).exists()
+    assert not parameters.cache_path(run).exists()
+
+
+def test_parameters_cache_is_invalidated(run, monkeypatch, capsys):
+    d0 = pyR2D2.Data(run)
+
+    calls = []
+    read_sources = parameters.Parameters._read_sources
+
+    def _read_sources(self):
+        calls.append(1)
+        read_sources(self)
+
+    monkeypatch.setattr(parameters.Parameters, "_read_sources", _read_sources)
+
+    back = run / "param" / "back.dac"
+    st = back.stat()
+    os.utime(back, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+    capsys.readouterr()
+    parameters.Parameters(d0, verbose=True)
+    assert "out of date" in capsys.readouterr().out
+    d1 = pyR2D2.Data(run)
+    d2 = pyR2D2.Data(run)
+    assert calls == [1]
+    _assert_same_parameters(d0.p, d2.p)
+    assert d1.nd == d0.nd
+
+
+def test_parameters_cache_ignores_corrupt_and_unwritable_files(run, monkeypatch, capsys):
+    cache = parameters.cache_path(run)
+    cache.parent.mkdir(parents=True, exist_ok=True)
+    cache.write_bytes(b"not a cache")
+    d = pyR2D2.Data(run)
+    assert d.ix == 72
+    assert cache.read_bytes() != b"not a cache"
+
+    cache.unlink()
+
+    def _replace(src, dst):
+        raise PermissionError(dst)
+
+    monkeypatch.setattr(os, "replace", _replace)
+    capsys.readouterr()
+    d = pyR2D2.Data(run)
+    assert d.ix == 72
+    parameters.Parameters(d, verbose=True)
+    assert "is not written" in capsys.readouterr().out
+    assert list(cache.parent.glob(f"{cache.name}*")) == []
+
+
+# ---------------------------------------------------------------------------
+# lazy construction
+# ---------------------------------------------------------------------------
+
+
+def test_readers_are_constructed_on_first_access(run):
+    d = pyR2D2.Data(run)
+    for name in pyR2D2.Data._readers:
+        assert name not in d.__dict__
+    assert "eos" not in d.__dict__
+    assert "yinyang" not in d.__dict__
+
+    qf = d.qf
+    assert isinstance(qf, pyR2D2.FullData)
+    assert d.qf is qf
+    assert "qx" not in d.__dict__
+
+    assert d.eos is d.eos
+    assert d.yinyang is d.yinyang
+
+    with pytest.raises(AttributeError):
+        d.no_such_attribute
+
+
+def test_docstrings_are_extended_once(run):
+    d = pyR2D2.Data(run)
+    d.qx, d.vc
+    doc = pyR2D2.XSelect.__doc__
+    doc_p = pyR2D2.Parameters.__doc__
+    doc_vc = pyR2D2.OnTheFly.__doc__
+    for _ in range(3):
+        d = pyR2D2.Data(run)
+        d.qx, d.vc
+    assert pyR2D2.XSelect.__doc__ == doc
+    assert pyR2D2.Parameters.__doc__ == doc_p
+    assert pyR2D2.OnTheFly.__doc__ == doc_vc
+    assert doc.count("Attributes") == 1
+
+
+# ---------------------------------------------------------------------------
+# time
+# ---------------------------------------------------------------------------
+
+
+def _write_time(datadir, subdir, times):
+    timedir = datadir / "time" / subdir
+    timedir.mkdir(parents=True, exist_ok=True)
+    for n, t in enumerate(times):
+        np.array([t], dtype="<f8").tofile(timedir / f"t.dac.{n:08d}")
+
+
+def test_time_series(run):
+    times = np.linspace(0.0, 3600.0, 6)
+    _write_time(run, "mhd", times)
+    _write_time(run, "tau", times[:4] + 0.5)
+    d = pyR2D2.Data(run)
+
+    np.testing.assert_array_equal(d.time_series(0, 5), times)
+    np.testing.assert_array_equal(d.time_series(1, 3, tau=True), times[1:4] + 0.5)
+    assert d.time_series(2, 2).dtype == np.float64
+    assert d.time_read(4, verbose=False) == times[4]
+
+    with pytest.raises(FileNotFoundError):
+        d.time_series(0, 6)
+
+
+def test_time_series_from_zip(run):
+    times = np.linspace(10.0, 20.0, 5)
+    _write_time(run, "mhd", times[:3])
+    d = pyR2D2.Data(run)
+    d.zip_time(remove_original=True)
+    np.testing.assert_array_equal(d.time_series(0, 2), times[:3])
+    zf = d._time_zip()
+
+    # new loose files are read directly, and the archive is reopened once they are added
+    _write_time(run, "mhd", times)
+    np.testing.assert_array_equal(d.time_series(0, 4), times)
+    d.zip_time(remove_original=True)
+    np.testing.assert_array_equal(d.time_series(0, 4), times)
+    assert d._time_zip() is not zf
+    assert d.time_read(3, verbose=False, use_zip=True) == times[3]
+
+
+def test_index_time(run, monkeypatch):
+    times = np.linspace(0.0, 100.0, 8)
+    _write_time(run, "mhd", times[:5])
+    d = pyR2D2.Data(run)
+    d.zip_time(remove_original=True)
+    assert (run / "time" / "mhd.idx").stat().st_size == 5 * 8
+    assert not (run / "time" / "tau.idx").exists()
+
+    # only new steps are appended
+    _write_time(run, "mhd", times)
+    read_time_file = d._read_time_file
+    calls = []
+
+    def _read_time_file(subdir, n, use_zip=False):
+        calls.append((subdir, n))
+        return read_time_file(subdir, n, use_zip=use_zip)
+
+    monkeypatch.setattr(d, "_read_time_file", _read_time_file)
+    d.index_time()
+    assert [n for subdir, n in calls if subdir == "mhd"][-5:] == [4, 5, 6, 7, 8]
+    np.testing.assert_array_equal(
+        np.fromfile(run / "time" / "mhd.idx", dtype="<f8"), times
+    )
+
+    # the index is checked against the files once after it is loaded,
+    # and indexed steps are not read from the files afterwards
+    d.time_series(0, 0)
+    calls.clear()
+    for n in range(8):
+        assert d.time_read(n, verbose=False) == times[n]
+    np.testing.assert_array_equal(d.time_series(2, 7), times[2:])
+    assert calls == []
+
+    # a restart that rewrites the last steps rebuilds the index
+    _write_time(run, "mhd", times[:7] + 1.0)
+    (run / "time" / "mhd" / "t.dac.00000007").unlink()
+    d.index_time()
+    np.testing.assert_array_equal(d.time_series(0, 6), times[:7] + 1.0)
+    assert len(d._time_index()) == 7
+    assert list(run.glob("time/*.tmp")) == []
+
+    # a restart that rewrites steps up to nd is detected before index_time
+    d.p.nd = 3
+    _write_time(run, "mhd", times[:4] + 2.0)
+    np.testing.assert_array_equal(d.time_series(0, 3), times[:4] + 2.0)
+
+
+def test_time_to_step(run):
+    times = np.array([0.0, 10.0, 20.0, 35.0])
+    _write_time(run, "mhd", times)
+    d = pyR2D2.Data(run)
+    d.p.nd = 3
+    d.index_time()
+
+    assert d.time_to_step(12.0) == 1
+    assert d.time_to_step(16.0) == 2
+    assert d.time_to_step(-5.0) == 0
+    assert d.time_to_step(100.0) == 3
+    np.testing.assert_array_equal(d.time_to_step([0.0, 28.0, 27.0]), [0, 3, 2])
+
+
+def test_nd_tau_is_found_without_listing(run, monkeypatch):
+    _write_time(run, "tau", np.arange(38.0))
+
+    def _listdir(path):
+        raise AssertionError("time/tau should not be listed")
+
+    monkeypatch.setattr(os, "listdir", _listdir)
+    assert pyR2D2.Data(run, cache=False).nd_tau == 37
+
+    # steps in time.zip and the time index are taken into account
+    d = pyR2D2.Data(run)
+    d.zip_time(remove_original=True)
+    _write_time(run, "tau", np.arange(41.0))
+    for n in range(38):
+        (run / "time" / "tau" / f"t.dac.{n:08d}").unlink()
+    assert pyR2D2.Data(run).nd_tau == 40
+
+
+def test_nd_tau_falls_back_to_listing(run):
+    _write_time(run, "tau", np.arange(5.0))
+    (run / "time" / "tau" / "t.dac.00000000").unlink()
+    (run / "param" / "nd.dac").write_text("       0       9\n")
+    # nd.dac is ahead of the files, which are not archived in time.zip
+    assert pyR2D2.Data(run).nd_tau == 9
+    (run / "param" / "nd.dac").write_text("       0       0\n")
+    assert pyR2D2.Data(run).nd_tau == 3
+
+
+# ---------------------------------------------------------------------------
+# compress_range
+# ---------------------------------------------------------------------------
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_compress_range_is_resumable(run, workers, monkeypatch):
+    from conftest import write_remap_qq
+
+    d = pyR2D2.Data(run)
+    expected = {n: write_remap_qq(d, n, seed=n) for n in [0, 1]}
+
+    # the step 2 does not exist and is reported as failed
+    failed = d.compress_range(kinds=["qf"], steps=range(3), workers=workers)
+    assert failed == [("qf", 2)]
+
+    for n in [0, 1]:
+        data = pyR2D2.zarr_util.load(d.qf._get_filepath_remap_zarr(n))
+        np.testing.assert_array_equal(data["vx"], expected[n]["vx"])
+
+    state_file = run / ".pyR2D2_compress_state.jsonl"
+    settings = '"store": "dir", "shards3d": null, "overwrite": false}'
+    assert sorted(state_file.read_text().splitlines()) == [
+        '{"kind": "qf", "n": 0, ' + settings,
+        '{"kind": "qf", "n": 1, ' + settings,
+    ]
+
+    # finished steps are skipped, the failed step is retried
+    write_remap_qq(d, 2, seed=2)
+    with open(state_file, "a") as f:
+        f.write('{"kind": "qf"')  # truncated by a crash
+    assert d.compress_range(kinds=["qf"], steps=range(3), workers=workers) == []
+    assert pyR2D2.zarr_util.load(d.qf._get_filepath_remap_zarr(2))["vx"].shape == (
+        d.ix,
+        d.jx,
+        d.kx,
+    )
+    assert state_file.read_text().splitlines()[-1] == '{"kind": "qf", "n": 2, ' + settings
+
+    # steps journaled with other settings are not skipped
+    calls = []
+    monkeypatch.setattr(
+        pyR2D2.data, "_compress_one", lambda d, kind, n, *args: calls.append(n)
+    )
+    d.compress_range(kinds=["qf"], steps=range(3), overwrite=True)
+    assert calls == [0, 1, 2]
+
+    # without steps, only the steps with rank files are compressed
+    calls.clear()
+    d.p.nd = 5
+    d.compress_range(kinds=["qf"], resume=False)
+    assert calls == [0, 1, 2]
+
+    with pytest.raises(ValueError):
+        d.compress_range(kinds=["qq"])
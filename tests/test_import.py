@@ -0,0 +1,37 @@
+import subprocess
+import sys
+
+import pyR2D2
+
+
+def _run(code):
+    result = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    )
+    return result.stdout.split()
+
+
+def test_import_defers_heavy_dependencies():
+    heavy = ["zarr", "scipy", "matplotlib", "pyR2D2.cpp_util", "pyR2D2.util"]
+    loaded = _run(
+        "import sys, pyR2D2; "
+        f"print(*[m for m in {heavy!r} if m in sys.modules])"
+    )
+    assert loaded == []
+
+
+def test_lazy_attributes():
+    assert pyR2D2.zarr_util.load is pyR2D2.data_io.load
+    assert pyR2D2.EOS is pyR2D2.cpp_util.EOS
+    assert "zarr_util" in dir(pyR2D2)
+    for name in ["util", "write", "fortran_util"]:
+        assert getattr(pyR2D2, name).__name__ == f"pyR2D2.{name}"
+
+
+def test_from_import_of_lazy_submodule():
+    names = _run(
+        "from pyR2D2.data_io import zarr_util, load; "
+        "from pyR2D2 import util; "
+        "print(zarr_util.__name__, load.__module__, util.__name__)"
+    )
+    assert names == ["pyR2D2.data_io.zarr_util"] * 2 + ["pyR2D2.util"]
@@ -0,0 +1,744 @@
+import os
+import shutil
+import zipfile
+
+import numpy as np
+import pytest
+import zarr
+
+import pyR2D2
+from conftest import write_remap_qq
+
+
+@pytest.fixture
+def d(remap_run):
+    datadir, _ = remap_run
+    return pyR2D2.Data(datadir)
+
+
+@pytest.fixture
+def expected(remap_run):
+    _, expected = remap_run
+    return expected
+
+
+# ---------------------------------------------------------------------------
+# remap/qq/ manifest
+# ---------------------------------------------------------------------------
+
+
+def test_manifest_lists_rank_files(d):
+    manifest = d.qf._manifest()
+
+    assert manifest.nested
+    assert manifest.steps() == [0, 1]
+    assert manifest.missing(0, range(d.npe)) == []
+    assert manifest.missing(2, [0, 3]) == [0, 3]
+
+    size = (d.mtype + 3) * d.iixl[0] * d.jjxl[0] * d.kx * 4
+    np.testing.assert_array_equal(manifest.sizes(0), size)
+
+
+def test_manifest_is_shared_and_not_rescanned(d, monkeypatch):
+    manifest = d.qf._manifest()
+    assert d.qx._manifest() is manifest
+
+    d.qf.read(0, keys="ro")
+
+    def _fail(*args, **kwargs):
+        raise AssertionError("remap/qq/ should not be rescanned")
+
+    monkeypatch.setattr(manifest, "_stat_step", _fail)
+    monkeypatch.setattr(manifest, "_scan_zarr", _fail)
+    d.qf.read(0, keys="ro")
+    d.qx.read(d.x[5], 0, keys="ro")
+
+
+def test_manifest_stats_only_the_read_step(d, monkeypatch):
+    manifest = d.qf._manifest()
+    manifest.invalidate()
+
+    scandir = os.scandir
+
+    def _scandir(path=".", *args, **kwargs):
+        if "remap" in str(path):
+            raise AssertionError("remap/qq/ tree should not be listed")
+        return scandir(path, *args, **kwargs)
+
+    monkeypatch.setattr(os, "scandir", _scandir)
+    d.qf._manifest()
+    assert manifest.missing(1, range(d.npe)) == []
+    assert sorted(manifest._sizes) == [1]
+
+
+def test_manifest_is_invalidated_by_new_step(run):
+    d = pyR2D2.Data(run)
+    assert d.qf._manifest().steps() == []
+    assert d.qf._manifest().missing(3, [0]) == [0]
+
+    expected = write_remap_qq(d, 3)
+    assert d.qf._manifest().steps() == [3]
+    assert d.qf._manifest().missing(3, range(d.npe)) == []
+
+    d.qf.read(3, keys=["vx"])
+    np.testing.assert_array_equal(d.qf.vx, expected["vx"])
+
+
+# ---------------------------------------------------------------------------
+# remap/qq/ readers
+# ---------------------------------------------------------------------------
+
+
+def test_full_data_read(d, expected):
+    d.qf.read(1, keys=["ro", "bz", "te"], max_workers=4)
+    for key in ["ro", "bz", "te"]:
+        np.testing.assert_array_equal(d.qf.__dict__[key], expected[1][key])
+
+
+def test_x_select_read(d, expected):
+    i0 = 40
+    d.qx.read(d.x[i0], 0, keys=["vy", "op"])
+    for key in ["vy", "op"]:
+        np.testing.assert_array_equal(d.qx.__dict__[key], expected[0][key][i0])
+
+
+def test_full_data_lazy_read(d, expected):
+    d.qf.read(0, keys=["vz", "pr"], lazy=True)
+    vz = d.qf.vz
+
+    assert vz.shape == (d.ix, d.jx, d.kx)
+    np.testing.assert_array_equal(vz[3:20, 40:60, 5], expected[0]["vz"][3:20, 40:60, 5])
+    np.testing.assert_array_equal(vz[-1, ::7, 10:2:-3], expected[0]["vz"][-1, ::7, 10:2:-3])
+    np.testing.assert_array_equal(vz[..., 100], expected[0]["vz"][..., 100])
+    np.testing.assert_array_equal(np.asarray(d.qf.pr), expected[0]["pr"])
+    assert vz[0, 0].dtype == np.float32
+    assert vz[0, 0].dtype.isnative
+
+    pr = np.array(d.qf.pr, copy=True, dtype=np.float64)
+    np.testing.assert_array_equal(pr, expected[0]["pr"])
+    assert pr.dtype == np.float64 and pr.flags.writeable
+    with pytest.raises(ValueError):
+        np.asarray(d.qf.pr, copy=False)
+
+    # a regular read does not reuse the lazy array as a buffer
+    d.qf.read(0, keys="vz")
+    assert isinstance(d.qf.vz, np.ndarray)
+
+
+def test_x_select_read_many(d, expected):
+    i_list = [71, 3, 40, 41, 3]
+    qq = d.qx.read_many(d.x[i_list], 1, keys=["bx", "te"], max_workers=3)
+
+    for key in ["bx", "te"]:
+        assert qq[key].shape == (len(i_list), d.jx, d.kx)
+        np.testing.assert_array_equal(qq[key], expected[1][key][i_list])
+    np.testing.assert_array_equal(d.qx.info["xs"], d.x[i_list])
+
+
+def test_z_select_read(d, expected):
+    k0 = 123
+    d.qz.read(d.z[k0], 0, keys=["se", "pr"], max_workers=2)
+    for key in ["se", "pr"]:
+        np.testing.assert_array_equal(d.qz.__dict__[key], expected[0][key][:, :, k0])
+    assert d.qz.ro is None
+
+
+def test_restricted_data_read(d, expected):
+    i0, i1, j0, j1, k0, k1 = 5, 30, 40, 70, 100, 102
+    d.qr.read(
+        0,
+        keys=["vx", "op"],
+        x0=d.x[i0],
+        x1=d.x[i1],
+        y0=d.y[j0],
+        y1=d.y[j1],
+        z0=d.z[k0],
+        z1=d.z[k1],
+        max_workers=4,
+    )
+    for key in ["vx", "op"]:
+        np.testing.assert_array_equal(
+            d.qr.__dict__[key],
+            expected[0][key][i0 : i1 + 1, j0 : j1 + 1, k0 : k1 + 1],
+        )
+
+
+def test_invalid_key_raises(d):
+    with pytest.raises(ValueError):
+        d.qf.read(0, keys=["vx", "foo"])
+    with pytest.raises(ValueError):
+        d.qx.read(d.x[5], 0, keys="foo")
+    with pytest.raises(ValueError):
+        d.qz.read(d.z[5], 0, keys="foo")
+    with pytest.raises(ValueError):
+        d.qr.read(0, keys="foo")
+
+
+def test_full_data_compress_streams_chunks(d, expected, tmp_path):
+    path = tmp_path / "qq.zarr"
+    d.qf.compress(
+        1,
+        zarr_filepath=path,
+        i_start=10,
+        i_size=30,
+        j_start=20,
+        j_size=50,
+        k_start=100,
+        k_size=70,
+        chunks3d=(16, 32, 32),
+        keys=["ro", "vx"],
+        max_workers=3,
+    )
+
+    data = pyR2D2.zarr_util.load(path)
+    for key in ["ro", "vx"]:
+        np.testing.assert_array_equal(
+            data[key], expected[1][key][10:40, 20:70, 100:170]
+        )
+    np.testing.assert_allclose(data["z"], d.z[100:170], rtol=1e-6)
+    assert "se" not in data
+
+    with pytest.warns(DeprecationWarning):
+        d.qf.compress(1, zarr_filepath=path, keys=["ro"], overwrite=True, lightweight=True)
+
+
+def test_full_data_check_uses_digests(run, monkeypatch):
+    d = pyR2D2.Data(run)
+    write_remap_qq(d, 0)
+    d.qf.compress(0, chunks3d=(36, 48, 96), keys=["ro", "vx"], max_workers=2)
+    path = d.qf._get_filepath_remap_zarr(0)
+
+    # the rank files are not read when all the digests match
+    read_region = type(d.qf)._read_remap_qq_region
+    monkeypatch.setattr(
+        type(d.qf), "_read_remap_qq_region", lambda *args: pytest.fail("read")
+    )
+    assert d.qf.check(0, keys=["ro", "vx"], max_workers=2)
+    monkeypatch.setattr(type(d.qf), "_read_remap_qq_region", read_region)
+
+    root = zarr.open_group(path, mode="a")
+
+    # a stale digest is compared with the rank files
+    digests = root["vx"].attrs["digests"]
+    digests["1.0.1"]["crc32"] += 1
+    root["vx"].attrs["digests"] = digests
+    assert pyR2D2.zarr_util.verify(path, ["ro", "vx"]) == {
+        "ro": [],
+        "vx": [("1.0.1", (slice(36, 72), slice(0, 48), slice(96, 192)))],
+    }
+    assert d.qf.check(0, keys=["ro", "vx"])
+
+    # modified data are detected
+    root["ro"][0, 0, 0] += 1.0
+    assert not d.qf.check(0, keys=["ro", "vx"])
+
+
+def test_mpi_region_read_into_buffer(d, expected):
+    d.qm.read(2, 0, keys="by")
+    i_ixrt = d.qm.i_ixrt
+    np.testing.assert_array_equal(d.qm.by, expected[0]["by"][i_ixrt])
+
+    out = {"bx": np.empty((len(i_ixrt), d.jx, d.kx), dtype=np.float32)}
+    for ixrt in [3, 5]:
+        d.qm.read(ixrt, 1, keys=["bx"], max_workers=2, out=out)
+        assert d.qm.bx is out["bx"]
+        np.testing.assert_array_equal(out["bx"], expected[1]["bx"][d.qm.i_ixrt])
+
+    with pytest.raises(ValueError):
+        d.qm.read(0, 1, keys=["bz"], out=out)
+
+
+def test_big_endian_reads_are_native(run):
+    d = pyR2D2.Data(run)
+    d.endian = ">"
+    expected = write_remap_qq(d, 0, seed=2)
+
+    d.qf.read(0, keys=["ro", "te"], max_workers=2)
+    d.qz.read(d.z[7], 0, keys="vy")
+    d.qr.read(0, keys="bx", x0=d.x[2], x1=d.x[50], y0=d.y[10], y1=d.y[20])
+    for qq, key, ref in [
+        (d.qf, "ro", expected["ro"]),
+        (d.qf, "te", expected["te"]),
+        (d.qz, "vy", expected["vy"][:, :, 7]),
+        (d.qr, "bx", expected["bx"][2:51, 10:21, :]),
+    ]:
+        assert qq.__dict__[key].dtype == np.float32
+        assert qq.__dict__[key].dtype.isnative
+        np.testing.assert_array_equal(qq.__dict__[key], ref)
+
+
+# ---------------------------------------------------------------------------
+# prefetching iterators
+# ---------------------------------------------------------------------------
+
+
+def test_full_data_iter_steps(d, expected):
+    steps = [1, 0, 1, 0, 0]
+    seen = []
+    for n, qq in d.qf.iter_steps(steps, keys=["ro", "se"], prefetch=2):
+        assert sorted(qq) == ["ro", "se"]
+        np.testing.assert_array_equal(qq["ro"], expected[n]["ro"])
+        np.testing.assert_array_equal(qq["se"], expected[n]["se"])
+        seen.append(n)
+    assert seen == steps
+    # the reader itself is untouched
+    assert d.qf.se is None
+
+
+def test_x_select_iter_steps_can_be_stopped(d, expected):
+    i0 = 70
+    it = d.qx.iter_steps(d.x[i0], [0, 1, 0, 1], keys="vz", prefetch=1)
+    n, qq = next(it)
+    np.testing.assert_array_equal(qq["vz"], expected[0]["vz"][i0])
+    it.close()
+
+
+def test_iter_steps_propagates_errors(d):
+    with pytest.raises(FileNotFoundError):
+        for _ in d.qx.iter_steps(d.x[0], [0, 7], keys="vz", prefetch=1):
+            pass
+
+
+# ---------------------------------------------------------------------------
+# prev/ and aftr/ readers
+# ---------------------------------------------------------------------------
+
+
+@pytest.fixture
+def prev_run(run):
+    """The test run as a single Yin-Yang panel with prev/ rank files at n=3, n_prev=1."""
+    d = pyR2D2.Data(run)
+    # xyz.dac of the test run covers one Yin-Yang panel
+    d.p.npe = len(d.xyz)
+    d.p.jx, d.p.kx = d.jx_yy, d.kx_yy
+    d.p.ib_rte_bot = 1
+
+    rng = np.random.default_rng(3)
+    kinds = pyR2D2.Previous.prev_aftr_kind
+    full = {key: rng.standard_normal((d.ix, d.jx, d.kx)) for key in kinds}
+    for np0 in range(d.npe):
+        ib, jb, kb = d.xyz[np0]
+        filepath = d.qp._get_filepath_prev_aftr_qq(3, 1, np0, prev_aftr="prev")
+        filepath.parent.mkdir(parents=True, exist_ok=True)
+        block = np.stack(
+            [
+                full[key][
+                    ib * d.nx : (ib + 1) * d.nx,
+                    jb * d.ny : (jb + 1) * d.ny,
+                    kb * d.nz : (kb + 1) * d.nz,
+                ]
+                for key in kinds
+            ],
+            axis=-1,
+        )
+        filepath.write_bytes(block.astype(d.endian + "f8").tobytes(order="F"))
+
+    expected = {key: full[key][d.nx :] for key in kinds}
+    return d, expected
+
+
+def test_previous_read(prev_run):
+    d, expected = prev_run
+    d.qp.read(3, 1, max_workers=3)
+    for key in pyR2D2.Previous.prev_aftr_kind:
+        assert d.qp.__dict__[key].dtype == np.float64
+        np.testing.assert_array_equal(d.qp.__dict__[key], expected[key])
+
+
+def test_previous_read_keys_dtype_out(prev_run):
+    d, expected = prev_run
+    d.qp.read(3, 1, keys="vx", dtype=np.float32)
+    assert d.qp.vx.dtype == np.float32
+    np.testing.assert_array_equal(d.qp.vx, expected["vx"].astype(np.float32))
+    assert "ro" not in d.qp.__dict__
+
+    out = {"se": np.empty((d.qp.ix_prev_aftr, d.jx, d.kx), dtype=np.float32)}
+    d.qp.read(3, 1, keys=["se"], max_workers=2, out=out)
+    assert d.qp.se is out["se"]
+    np.testing.assert_array_equal(out["se"], expected["se"].astype(np.float32))
+
+    with pytest.raises(ValueError):
+        d.qp.read(3, 1, keys=["se"], dtype=np.float64, out=out)
+    with pytest.raises(ValueError):
+        d.qp.read(3, 1, keys=["te"])
+
+
+# ---------------------------------------------------------------------------
+# 2D calculation
+# ---------------------------------------------------------------------------
+
+
+@pytest.fixture
+def two_dimension_run(run):
+    d = pyR2D2.Data(run)
+    rng = np.random.default_rng(4)
+    qq = rng.standard_normal((6, d.mtype + 5, d.ix, d.jx), dtype=np.float32)
+    (run / "remap" / "qq").mkdir(parents=True, exist_ok=True)
+    for n in range(len(qq)):
+        (run / "remap" / "qq" / f"qq.dac.{n:08d}").write_bytes(
+            qq[n].astype(d.endian + "f4").tobytes(order="F")
+        )
+    expected = {key: qq[:, m] for m, key in enumerate(d.q2.value_keys[: d.mtype])}
+    return d, expected
+
+
+def test_two_dimension_read_series(two_dimension_run):
+    d, expected = two_dimension_run
+    qq = d.q2.read_series(1, 4, keys=["vx", "se"], max_workers=3)
+    assert sorted(qq) == ["se", "vx"]
+    for key in ["vx", "se"]:
+        assert qq[key].shape == (4, d.ix, d.jx)
+        np.testing.assert_array_equal(qq[key], expected[key][1:5])
+
+    d.q2.read(2)
+    np.testing.assert_array_equal(d.q2.bz, expected["bz"][2])
+
+    with pytest.raises(ValueError):
+        d.q2.read_series(0, 1, keys="tu")
+
+
+def test_two_dimension_compress(two_dimension_run):
+    d, expected = two_dimension_run
+    d.p.nd = 5
+    d.q2.compress(0, 2, chunk_steps=2)
+    d.q2.compress(chunk_steps=2, max_workers=2)
+
+    for n in [0, 1, 4]:
+        (d.datadir / "remap" / "qq" / f"qq.dac.{n:08d}").unlink()
+
+    qq = d.q2.read_series(0, 5)
+    for key, value in expected.items():
+        np.testing.assert_array_equal(qq[key], value)
+    d.q2.read(4)
+    np.testing.assert_array_equal(d.q2.ro, expected["ro"][4])
+
+
+# ---------------------------------------------------------------------------
+# on the fly analysis
+# ---------------------------------------------------------------------------
+
+
+@pytest.fixture
+def on_the_fly_run(run):
+    d = pyR2D2.Data(run)
+    rng = np.random.default_rng(5)
+    planes = [
+        ("xy", d.m2d_xy, (d.ix, d.jx)),
+        ("xz", d.m2d_xz, (d.ix, d.kx)),
+        ("flux", d.m2d_flux, (d.ix + 1, d.jx)),
+        ("spex", d.m2d_spex, (d.ix, d.kx // 4)),
+    ]
+    for n in range(3):
+        for plane, m2d, shape in planes:
+            vl = rng.standard_normal(shape + (m2d,), dtype=np.float32)
+            (run / "remap" / "vl" / f"vl_{plane}.dac.{n:08d}").write_bytes(
+                vl.astype(d.endian + "f4").tobytes(order="F")
+            )
+    return d
+
+
+def test_on_the_fly_read_series(on_the_fly_run):
+    d = on_the_fly_run
+    keys = [d.cl[3], d.cl[d.m2d_xy + 1], d.cl[-1], d.cl[d.m2d_xy + d.m2d_xz]]
+    vc = d.vc.read_series(0, 2, keys=keys, max_workers=2)
+    for n in range(3):
+        d.vc.read(n)
+        for key in keys:
+            assert vc[key].dtype == np.float32
+            np.testing.assert_array_equal(vc[key][n], d.vc.__dict__[key])
+
+    with pytest.raises(ValueError):
+        d.vc.read_series(0, 0, keys="no_such_value")
+
+
+def test_on_the_fly_read_series_reduce(on_the_fly_run):
+    d = on_the_fly_run
+    key_xy, key_xz = d.cl[0], d.cl[d.m2d_xy]
+    key_flux = d.cl[d.m2d_xy + d.m2d_xz]
+    keys = [key_xy, key_xz, key_flux]
+    mean = d.vc.read_series(1, 2, keys=keys, reduce="mean")
+    rms = d.vc.read_series(1, 2, keys=keys, reduce="rms")
+
+    sinyy = np.sin(d.y)
+    for n in range(1, 3):
+        d.vc.read(n)
+        for key, w in [(key_xy, sinyy), (key_xz, None), (key_flux, sinyy)]:
+            q = d.vc.__dict__[key].astype(np.float64)
+            np.testing.assert_allclose(mean[key][n - 1], np.average(q, axis=1, weights=w))
+            np.testing.assert_allclose(
+                rms[key][n - 1], np.sqrt(np.average(q**2, axis=1, weights=w))
+            )
+
+    with pytest.raises(ValueError):
+        d.vc.read_series(0, 0, keys=d.cl[-1], reduce="mean")
+
+
+def test_on_the_fly_compress(on_the_fly_run):
+    d = on_the_fly_run
+    d.p.nd = 2
+    expected = d.vc.read_series(0, 2)
+
+    d.vc.compress(0, 1, chunk_steps=2)
+    assert not d.vc.check(0, 2)
+    d.vc.compress(max_workers=2)
+    assert d.vc.check()
+
+    d.vc.delete(1, 2)
+    assert not (d.datadir / "remap" / "vl" / "vl_xy.dac.00000002").exists()
+    assert (d.datadir / "remap" / "vl" / "vl_xy.dac.00000000").exists()
+
+    vc = d.vc.read_series(0, 2, max_workers=2)
+    for key in d.cl:
+        np.testing.assert_array_equal(vc[key], expected[key])
+    d.vc.read(2)
+    np.testing.assert_array_equal(d.vc.__dict__[d.cl[-1]], expected[d.cl[-1]][2])
+
+    d.vc.zip(remove_original=True)
+    mean = d.vc.read_series(1, 2, keys=d.cl[0], reduce="mean")
+    np.testing.assert_allclose(
+        mean[d.cl[0]],
+        np.average(expected[d.cl[0]][1:].astype(np.float64), axis=2, weights=np.sin(d.y)),
+    )
+
+
+def test_on_the_fly_compress_with_gap(on_the_fly_run):
+    d = on_the_fly_run
+    d.p.nd = 2
+    expected = d.vc.read_series(0, 2)
+    for plane in ["xy", "xz", "flux", "spex"]:
+        (d.datadir / "remap" / "vl" / f"vl_{plane}.dac.00000001").unlink()
+
+    d.vc.compress(chunk_steps=4)
+    assert d.vc.check()
+    for path in (d.datadir / "remap" / "vl" / "zarr").iterdir():
+        stored = pyR2D2.zarr_util.load_steps(path, [0, 2])
+        for key, value in stored.items():
+            np.testing.assert_array_equal(value, expected[key][[0, 2]])
+
+
+def test_load_steps(tmp_path):
+    path = tmp_path / "series.zarr"
+    zarr_util = pyR2D2.zarr_util
+
+    # a store without steps
+    zarr_util.append_steps(path, [], {"ro": np.zeros((0, 3, 4))})
+    with pytest.raises(FileNotFoundError):
+        zarr_util.load_steps(path, [0])
+    assert zarr_util.load_steps(path, [])["ro"].shape == (0, 3, 4)
+
+    ro = np.arange(5 * 3 * 4, dtype=np.float32).reshape(5, 3, 4)
+    zarr_util.append_steps(path, [2, 4], {"ro": ro[:2]})
+    zarr_util.append_steps(path, [6, 8, 10], {"ro": ro[2:]})
+    np.testing.assert_array_equal(zarr_util.load_steps(path, [10, 2])["ro"], ro[[4, 0]])
+    with pytest.raises(FileNotFoundError):
+        zarr_util.load_steps(path, [4, 5])
+
+
+# ---------------------------------------------------------------------------
+# crash-safe zarr stores
+# ---------------------------------------------------------------------------
+
+
+def test_save_is_atomic(tmp_path):
+    path = tmp_path / "qq.zarr"
+    zarr_util = pyR2D2.zarr_util
+
+    zarr_util.save(path, {"ro": np.ones((4, 5, 6))})
+    assert zarr_util.is_complete(path)
+
+    # a failure while writing leaves the old store and no temporary directory
+    with pytest.raises(ValueError):
+        zarr_util.save(path, {"ro": np.zeros((4, 5, 6)), "bad": np.zeros((1,) * 4)})
+    np.testing.assert_array_equal(zarr_util.load(path)["ro"], 1.0)
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["qq.zarr"]
+
+    zarr_util.save(path, {"ro": np.zeros((4, 5, 6))})
+    np.testing.assert_array_equal(zarr_util.load(path)["ro"], 0.0)
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["qq.zarr"]
+
+
+def test_incomplete_stores_are_rejected(tmp_path):
+    path = tmp_path / "qq.zarr"
+    zarr_util = pyR2D2.zarr_util
+
+    # a store written without the marker, e.g. by an older version
+    root = zarr.open_group(path, mode="w")
+    root.create_array("ro", data=np.ones((4, 5), dtype=np.float32))
+    assert not zarr_util.is_complete(path)
+    with pytest.raises(FileNotFoundError):
+        zarr_util.load(path)
+    assert zarr_util.zip_zarr(path) is None
+
+    zarr_util.mark_complete(path)
+    np.testing.assert_array_equal(zarr_util.load(path)["ro"], 1.0)
+
+    zip_path = zarr_util.zip_zarr(path)
+    assert zarr_util.is_complete(path, use_zip=True)
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["qq.zarr", "qq.zarr.zip"]
+
+    # the marker is appended to a legacy zip file without copying the chunks
+    root = zarr.open_group(path, mode="r+")
+    del root.attrs["pyR2D2_complete"]
+    zip_path.unlink()
+    _write_legacy_zip(path, zip_path)
+    assert not zarr_util.is_complete(zip_path)
+    with zipfile.ZipFile(zip_path) as zf:
+        offsets = {info.filename: info.header_offset for info in zf.infolist()}
+    zarr_util.mark_complete(zip_path)
+    with zipfile.ZipFile(zip_path) as zf:
+        infos = zf.infolist()
+    del offsets["zarr.json"]
+    assert {info.filename: info.header_offset for info in infos[:-1]} == offsets
+    assert infos[-1].filename == "zarr.json"
+    assert [info.filename for info in infos].count("zarr.json") == 1
+    with zipfile.ZipFile(zip_path) as zf:
+        assert zf.testzip() is None
+    np.testing.assert_array_equal(zarr_util.load(path, use_zip=True)["ro"], 1.0)
+
+
+def _write_legacy_zip(path, zip_path):
+    # a .zarr.zip file made by an older version, without the marker
+    with zipfile.ZipFile(zip_path, "w") as zf:
+        for f in sorted(path.rglob("*")):
+            if f.is_file():
+                zf.write(f, arcname=f.relative_to(path))
+
+
+def test_legacy_stores_are_read_after_migration(run):
+    d = pyR2D2.Data(run)
+    expected = {n: write_remap_qq(d, n, seed=n) for n in [0, 1]}
+    for n in [0, 1]:
+        d.qf.compress(n, keys=["ro"])
+        path = d.qf._get_filepath_remap_zarr(n)
+        del zarr.open_group(path, mode="r+").attrs["pyR2D2_complete"]
+
+    # step 1 only as a legacy zip file
+    path = d.qf._get_filepath_remap_zarr(1)
+    zip_path = path.with_name(path.name + ".zip")
+    _write_legacy_zip(path, zip_path)
+    shutil.rmtree(path)
+    assert not d.qf._remap_zarr_exists(0) and not d.qf._remap_zarr_exists(1)
+
+    assert d.mark_zarr_complete() == [d.qf._get_filepath_remap_zarr(0), zip_path]
+    assert d.mark_zarr_complete() == []
+    for n in [0, 1]:
+        d.qf.read(n, keys="ro", zarr_flag=True)
+        np.testing.assert_array_equal(d.qf.ro, expected[n]["ro"])
+
+
+def test_full_data_rejects_incomplete_store(run):
+    d = pyR2D2.Data(run)
+    write_remap_qq(d, 0)
+    d.qf.compress(0, keys=["ro"])
+    assert d.qf._remap_zarr_exists(0)
+
+    path = d.qf._get_filepath_remap_zarr(0)
+    del zarr.open_group(path, mode="r+").attrs["pyR2D2_complete"]
+    assert not d.qf._remap_zarr_exists(0)
+    assert not d.qf.check(0, keys=["ro"])
+
+
+def test_full_data_compress_to_zip(run):
+    d = pyR2D2.Data(run)
+    expected = write_remap_qq(d, 0)
+    d.qf.compress(
+        0, chunks3d=(36, 48, 96), keys=["ro", "vx"], max_workers=2, store="zip"
+    )
+
+    path = d.qf._get_filepath_remap_zarr(0)
+    zip_path = run / "remap" / "qq" / "zarr" / "qq.00000000.zarr.zip"
+    assert not path.exists()
+    assert sorted(p.name for p in zip_path.parent.iterdir()) == [zip_path.name]
+
+    # every entry, including the metadata with the digests, is written once
+    with zipfile.ZipFile(zip_path) as zf:
+        names = zf.namelist()
+    assert len(names) == len(set(names))
+    assert "digests" in zarr.open_array(zarr.storage.ZipStore(zip_path, mode="r"), path="ro").attrs
+
+    d.qf.read(0, keys=["ro", "vx"], zarr_flag=True)
+    for key in ["ro", "vx"]:
+        np.testing.assert_array_equal(d.qf.__dict__[key], expected[key])
+    assert d.qf.check(0, keys=["ro", "vx"])
+
+
+def test_save_to_zip(tmp_path):
+    path = tmp_path / "qq.zarr"
+    data = np.arange(120, dtype=np.float32).reshape(4, 5, 6)
+    pyR2D2.zarr_util.save(
+        path, {"ro": data}, {"a": 1}, chunks3d=(2, 5, 3), digests=True, store="zip"
+    )
+
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["qq.zarr.zip"]
+    loaded, params = pyR2D2.zarr_util.load(path, with_attrs=True)
+    np.testing.assert_array_equal(loaded["ro"], data)
+    assert params == {"a": 1}
+    assert pyR2D2.zarr_util.verify(path) == {"ro": []}
+
+    with pytest.raises(ValueError):
+        pyR2D2.zarr_util.save(path, {"ro": data}, store="tar")
+
+
+# ---------------------------------------------------------------------------
+# sharded zarr stores
+# ---------------------------------------------------------------------------
+
+
+@pytest.mark.parametrize("store", ["dir", "zip"])
+def test_full_data_compress_sharded(run, store):
+    d = pyR2D2.Data(run)
+    expected = write_remap_qq(d, 0)
+    d.qf.compress(
+        0,
+        keys=["ro", "vx"],
+        chunks3d=(12, 48, 48),
+        shards3d=(36, 96, 96),
+        max_workers=3,
+        store=store,
+    )
+
+    path = d.qf._get_filepath_remap_zarr(0)
+    root = pyR2D2.zarr_util.open_zarr_group(path)
+    assert root["ro"].chunks == (12, 48, 48)
+    assert root["ro"].shards == (36, 96, 96)
+    if store == "dir":
+        # zarr.json and one object for each of the 2 x 1 x 2 shards
+        files = [p for p in (path / "ro").rglob("*") if p.is_file()]
+        assert len(files) == 1 + 4
+
+    d.qf.read(0, keys=["ro", "vx"], zarr_flag=True)
+    for key in ["ro", "vx"]:
+        np.testing.assert_array_equal(d.qf.__dict__[key], expected[key])
+    np.testing.assert_array_equal(
+        root["vx"][40:50, 3, 100:110], expected["vx"][40:50, 3, 100:110]
+    )
+    assert d.qf.check(0, keys=["ro", "vx"])
+
+
+def test_save_sharded(tmp_path):
+    path = tmp_path / "qq.zarr"
+    data = np.arange(8 * 6 * 10, dtype=np.float32).reshape(8, 6, 10)
+    pyR2D2.zarr_util.save(
+        path, {"ro": data}, shards3d=(4, 6, 10), max_chunk_size=4, digests=True
+    )
+
+    root = pyR2D2.zarr_util.open_zarr_group(path)
+    assert root["ro"].shards == (4, 6, 10)
+    assert root["ro"].chunks == (4, 3, 2)
+    np.testing.assert_array_equal(pyR2D2.zarr_util.load(path)["ro"], data)
+    assert pyR2D2.zarr_util.verify(path) == {"ro": []}
+
+
+def test_shards_must_be_multiples_of_chunks(d, tmp_path):
+    zarr_util = pyR2D2.zarr_util
+    assert zarr_util.inner_chunks((96, 100), (64, 64)) == (48, 50)
+    # a prime shard shape would give tiny chunks
+    with pytest.raises(ValueError):
+        zarr_util.inner_chunks((97, 100), (64, 64))
+
+    path = tmp_path / "qq.zarr"
+    with pytest.raises(ValueError):
+        d.qf.compress(0, zarr_filepath=path, chunks3d=(36, 48, 64), shards3d=(72, 96, 96))
+    with pytest.raises(ValueError):
+        zarr_util.save(path, {"ro": np.zeros((8, 6, 10))}, chunks3d=(4, 4, 5), shards3d=(8, 6, 10))
+    assert list(tmp_path.iterdir()) == []